@@ -1,13 +1,28 @@
 import logging
+from praw.const import API_PATH
+from praw.models import MoreComments
 
 from .runner import Runner, verify_run
 from ..core.comment_filter import CommentFilter
 from ..core.submittable_creator import SubmittableCreator
-from ..utils import injector
+from ..database.models import Comment
+from ..utils import injector, reddit_utils
+
+
+MORE_CHILDREN_BATCH_SIZE = 100  # max number of comment ids reddit accepts in one /api/morechildren request
+QUERY_CHUNK_SIZE = 500  # keeps the number of parameters in an IN query under sqlite's limit
 
 
 class CommentHandler(Runner):
 
+    """
+    Extracts the comments of a submission breadth first, one level of the comment tree at a time.  The comments that
+    reddit returns with the submission are walked in memory.  Replies that reddit left out of the tree are collected for
+    the whole level and requested together from /api/morechildren, one hundred per request, with the remaining comment
+    depth and sort order sent with the request so reddit only returns the part of the tree that will be used.  The
+    comments of each level are checked for duplicates with a single query and added to the database in a single commit.
+    """
+
     def __init__(self, submission, post, download_session_id, stop_run, session=None):
         super().__init__(stop_run)
         self.logger = logging.getLogger(__name__)
@@ -23,7 +38,8 @@ class CommentHandler(Runner):
         self.comments_to_download = []
         self.comments_to_extract_links = []
 
-        self.working_comments = {}
+        # replies of comments that were returned from /api/morechildren, keyed by the fullname of the parent comment
+        self.fetched_replies = {}
         self.depth = 0
 
     def get_sort_order(self):
@@ -44,41 +60,152 @@ class CommentHandler(Runner):
     def extract_comments(self, session):
         self.submission.comment_sort = self.sort_order
         self.submission.comment_limit = self.significant_ro.comment_limit
-        self.submission.comments.replace_more(limit=0)
-        for praw_comment in self.submission.comments:
-            comment_id = self.handle_found_comment(praw_comment, session)
-            if comment_id is not None:
-                self.working_comments[praw_comment] = comment_id
-        while len(self.working_comments) > 0:
-            self.cascade_comments(session)
+        level = [(praw_comment, None) for praw_comment in
+                 self.expand_replies(list(self.submission.comments), self.significant_ro.comment_limit)]
+        while len(level) > 0 and self.continue_run:
+            comment_ids = self.store_level(level, session)
+            self.depth += 1
+            if self.depth >= self.significant_ro.comment_depth:
+                break
+            level = self.get_next_level(level, comment_ids)
 
-    @verify_run
-    def cascade_comments(self, session):
-        self.depth += 1
-        if self.depth < self.significant_ro.comment_depth:
-            next_level_comments = {}
-            for praw_comment, comment_id in self.working_comments.items():
-                praw_comment.reply_sort = self.sort_order
-                # TODO: try adding replace more here
-                praw_comment.replies.replace_more(limit=0)
-                for reply in praw_comment.replies[: self.significant_ro.comment_reply_limit]:
-                    reply_id = self.handle_found_comment(reply, session, comment_id)
-                    if reply_id is not None:
-                        next_level_comments[reply] = reply_id
-            self.working_comments = next_level_comments
-        else:
-            self.working_comments.clear()
+    def get_next_level(self, level, comment_ids):
+        """
+        Returns the replies to the comments in the supplied level whose replies are to be extracted, limited to the
+        reddit object's comment reply limit per comment.
+        :param level: A list of (praw comment, parent comment id) tuples that make up the current level.
+        :param comment_ids: A dict of the database ids of the current level's comments keyed by reddit id.
+        :return: A list of (praw comment, parent comment id) tuples that make up the next level.
+        """
+        next_level = []
+        parent_ids = {}
+        more_children = []
+        for praw_comment, _ in level:
+            comment_id = comment_ids.get(praw_comment.id)
+            if comment_id is None:
+                continue
+            replies, children = self.split_replies(self.get_replies(praw_comment),
+                                                   self.significant_ro.comment_reply_limit)
+            next_level.extend((reply, comment_id) for reply in replies)
+            more_children.extend(children)
+            parent_ids[praw_comment.fullname] = comment_id
+        for reply in self.fetch_more_children(more_children):
+            next_level.append((reply, parent_ids[reply.parent_id]))
+        return next_level
 
-    @verify_run
-    def handle_found_comment(self, praw_comment, session, parent_id=None):
-        if self.comment_filter.filter_extraction(praw_comment, self.significant_ro) and \
-                self.comment_filter.filter_score_limit(praw_comment, self.significant_ro):
-            comment = SubmittableCreator.create_comment(praw_comment, self.post, session, self.download_session_id,
-                                                        parent_comment_id=parent_id)
-            if comment is not None:
+    def get_replies(self, praw_comment):
+        try:
+            return self.fetched_replies[praw_comment.fullname]
+        except KeyError:
+            praw_comment.reply_sort = self.sort_order
+            return list(praw_comment.replies)
+
+    def expand_replies(self, replies, limit):
+        """Returns up to the supplied limit of the supplied replies, requesting any that reddit left out of the tree."""
+        comments, children = self.split_replies(replies, limit)
+        return comments + self.fetch_more_children(children)
+
+    def split_replies(self, replies, limit):
+        """
+        Splits a list of replies into the comments that were returned in the tree and the ids of the comments that
+        reddit left out of it, together limited to the supplied limit.  "Continue this thread" links are loaded
+        directly, as they are not part of a /api/morechildren request.
+        :return: A tuple of the list of loaded comments and the list of the ids of the comments that are to be
+                 requested from /api/morechildren.
+        """
+        comments = [x for x in replies if not isinstance(x, MoreComments)][:limit]
+        children = []
+        remaining = limit - len(comments)
+        for more in (x for x in replies if isinstance(x, MoreComments)):
+            if remaining <= 0:
+                break
+            if more.children:
+                children.extend(more.children[:remaining])
+                remaining -= len(more.children[:remaining])
+            else:
+                more.submission = self.submission
+                continued = [x for x in more.comments() if not isinstance(x, MoreComments)][:remaining]
+                comments.extend(continued)
+                remaining -= len(continued)
+        return comments, children
+
+    def fetch_more_children(self, children):
+        """
+        Requests the comments with the supplied ids from /api/morechildren, one hundred ids per request.  Reddit also
+        returns the replies of the requested comments down to the remaining comment depth.  These are kept in
+        fetched_replies so that the following levels do not have to be requested again.
+        :param children: The reddit ids of the comments that are to be requested.
+        :return: A list of the requested praw comments.
+        """
+        requested = set(children)
+        results = []
+        reddit = reddit_utils.get_reddit_instance()
+        for i in range(0, len(children), MORE_CHILDREN_BATCH_SIZE):
+            if not self.continue_run:
+                break
+            things = reddit.post(API_PATH['morechildren'], data={
+                'children': ','.join(children[i:i + MORE_CHILDREN_BATCH_SIZE]),
+                'link_id': self.submission.fullname,
+                'sort': self.sort_order,
+                'depth': max(self.significant_ro.comment_depth - self.depth, 1),
+                'limit_children': False,
+            })
+            for thing in things:
+                thing.submission = self.submission
+                if not isinstance(thing, MoreComments):
+                    self.fetched_replies.setdefault(thing.fullname, [])
+                if thing.id in requested and not isinstance(thing, MoreComments):
+                    results.append(thing)
+                else:
+                    self.fetched_replies.setdefault(thing.parent_id, []).append(thing)
+        return results
+
+    def store_level(self, level, session):
+        """
+        Adds the comments in the supplied level that pass the comment filter to the database in a single commit.
+        Comments that already exist are not added again, but their ids are returned so that replies to them that are
+        new are still extracted.
+        :param level: A list of (praw comment, parent comment id) tuples.
+        :param session: The database session that the comments are added with.
+        :return: A dict of database comment ids keyed by reddit id for the comments whose replies are to be extracted.
+        """
+        passing = [(praw_comment, parent_id) for praw_comment, parent_id in level
+                   if self.comment_filter.filter_extraction(praw_comment, self.significant_ro) and
+                   self.comment_filter.filter_score_limit(praw_comment, self.significant_ro)]
+        comment_ids = self.get_existing_comment_ids([praw_comment.id for praw_comment, _ in passing], session)
+        new = []
+        for praw_comment, parent_id in passing:
+            if praw_comment.id not in comment_ids:
+                new.append((praw_comment, parent_id))
+                comment_ids[praw_comment.id] = None
+        # authors and subreddits that are not in the database yet are committed from a separate session, so they are
+        # all resolved before any comment of the level is built and added to this session
+        reddit_object_ids = [(SubmittableCreator.get_author(praw_comment, session),
+                              SubmittableCreator.get_subreddit(praw_comment, session)) for praw_comment, _ in new]
+        new_comments = []
+        for (praw_comment, parent_id), (author_id, subreddit_id) in zip(new, reddit_object_ids):
+            comment = SubmittableCreator.make_comment(praw_comment, self.post, session, self.download_session_id,
+                                                      parent_comment_id=parent_id, author_id=author_id,
+                                                      subreddit_id=subreddit_id)
+            new_comments.append((praw_comment, comment))
+        if len(new_comments) > 0:
+            session.add_all([comment for _, comment in new_comments])
+            session.flush()
+            for praw_comment, comment in new_comments:
+                comment_ids[praw_comment.id] = comment.id
+            session.commit()
+            for praw_comment, comment in new_comments:
                 if self.comment_filter.filter_download(praw_comment, self.significant_ro):
                     self.comments_to_download.append(comment)
                 if self.comment_filter.filter_content_download(praw_comment, self.significant_ro):
                     self.comments_to_extract_links.append(comment)
-                return comment.id
-        return None
+        return comment_ids
+
+    @staticmethod
+    def get_existing_comment_ids(reddit_ids, session):
+        existing = {}
+        for i in range(0, len(reddit_ids), QUERY_CHUNK_SIZE):
+            query = session.query(Comment.reddit_id, Comment.id) \
+                .filter(Comment.reddit_id.in_(reddit_ids[i:i + QUERY_CHUNK_SIZE]))
+            existing.update((reddit_id.lower(), comment_id) for reddit_id, comment_id in query)
+        return existing
@@ -1,8 +1,9 @@
 import logging
 from concurrent.futures import ThreadPoolExecutor
 from queue import Empty
+from threading import BoundedSemaphore
 
-from .runner import Runner, verify_run
+from .runner import Runner, TaskTracker, verify_run, put_while_running
 from .submission_handler import SubmissionHandler
 from .submittable_creator import SubmittableCreator
 from ..database.models import Post
@@ -23,15 +24,20 @@ class ContentRunner(Runner):
 
         self.thread_count = self.settings_manager.extraction_thread_count
         self.executor = ThreadPoolExecutor(max_workers=self.thread_count)
-        self.futures = []
-        self.hold = False
+        # limits how many submissions are handed to the executor at once.  Without this the executor's internal work
+        # queue is unbounded and would drain the bounded submission queue into memory as fast as it can be filled
+        self.executor_slots = BoundedSemaphore(self.thread_count * 2)
+        # Comment extraction is its own stage with its own pool so that posts with very large comment threads do not
+        # hold up link extraction for other posts.  The comment slots bound the number of posts waiting for, or having
+        # their comments extracted, which is the comment stage's queue.
+        self.comment_executor = ThreadPoolExecutor(max_workers=self.settings_manager.comment_thread_count)
+        self.comment_slots = BoundedSemaphore(self.settings_manager.comment_queue_size)
+        self.tasks = TaskTracker()
         self.submit_hold = False
 
     @property
     def running(self):
-        if self.hold:
-            return len(self.futures) > 0
-        return True
+        return not self.tasks.finished.is_set()
 
     def run(self):
         self.logger.debug('Content extractor running')
@@ -40,12 +46,15 @@ class ContentRunner(Runner):
                 item = self.submission_queue.get(timeout=2)
                 if item is not None:
                     if item == 'HOLD':
-                        self.hold = True
+                        self.tasks.set_hold(True)
                         self.submit_hold = True
                     elif item == 'RELEASE_HOLD':
-                        self.hold = False
-                        self.download_queue.put('RELEASE_HOLD')
+                        self.tasks.set_hold(False)
+                        put_while_running(self.download_queue, 'RELEASE_HOLD', self.stop_run)
                     else:
+                        if not self.acquire_executor_slot():
+                            break
+                        self.tasks.add()
                         extraction_type, extraction_object, significant_id = item
                         if extraction_type == 'SUBMISSION':
                             future = self.executor.submit(self.handle_submission, submission=extraction_object,
@@ -53,25 +62,67 @@ class ContentRunner(Runner):
                         else:
                             future = self.executor.submit(self.finish_post, post_id=extraction_object)
                         future.add_done_callback(self.remove_future)
-                        self.futures.append(future)
                 else:
                     break
             except Empty:
                 if self.submit_hold and not self.running:
-                    self.download_queue.put('HOLD')
+                    put_while_running(self.download_queue, 'HOLD', self.stop_run)
                     self.submit_hold = False
         self.executor.shutdown(wait=True)
-        self.download_queue.put(None)
+        self.comment_executor.shutdown(wait=True)  # only after the extraction tasks that add to it have finished
+        put_while_running(self.download_queue, None, self.stop_run)
         self.logger.debug('Content extractor exiting')
 
+    def acquire_executor_slot(self, slots=None):
+        """
+        Blocks until the executor has room for another submission or the run is stopped.
+        :param slots: The semaphore of the executor that a slot is to be acquired from.  Defaults to the extraction
+                      executor.
+        :return: True if a slot was acquired, False if the run was stopped first.
+        """
+        slots = slots or self.executor_slots
+        while self.continue_run:
+            if slots.acquire(timeout=1):
+                return True
+        return False
+
     def remove_future(self, future):
-        self.futures.remove(future)
+        self.tasks.remove(future)
+        self.executor_slots.release()
+
+    def remove_comment_future(self, future):
+        self.tasks.remove(future)
+        self.comment_slots.release()
+
+    def queue_comments(self, post_id, submission=None):
+        """
+        Hands the comment extraction for the supplied post to the comment pool.  Blocks while the comment stage is full.
+        The task is added to the task tracker before the calling extraction task finishes, so the content runner is not
+        considered finished while comments are still being extracted.
+        :param post_id: The id of the post whose comments are to be extracted.
+        :param submission: The praw submission of the post, if it has already been retrieved from reddit.
+        """
+        if not self.acquire_executor_slot(self.comment_slots):
+            return
+        self.tasks.add()
+        future = self.comment_executor.submit(self.extract_comments, post_id=post_id, submission=submission)
+        future.add_done_callback(self.remove_comment_future)
+
+    @verify_run
+    def extract_comments(self, post_id, submission=None):
+        with self.db.get_scoped_session() as session:
+            post = session.query(Post).get(post_id)
+            if submission is None:
+                submission = reddit_utils.get_reddit_instance().submission(post.reddit_id)
+            submission_handler = SubmissionHandler(submission, post, self.download_session_id, session,
+                                                   self.download_queue, self.stop_run)
+            submission_handler.extract_comments()
 
     @verify_run
     def handle_submission(self, submission, significant_id):
         """
         Takes a reddit submission and creates a Post from its data.  Then calls the appropriate methods for the post.
-        If comments are to be extracted from the submission, this is also handled here.
+        If comments are to be extracted from the submission, they are handed to the comment stage.
         :param submission: The reddit submission that is to be extracted.
         :param significant_id: The id of the reddit object for which the submissions was extracted from reddit.
         """
@@ -82,7 +133,7 @@ class ContentRunner(Runner):
                                                        self.download_queue, self.stop_run)
                 submission_handler.extract_submission()
                 if post.significant_reddit_object.run_comment_operations:
-                    submission_handler.extract_comments()
+                    self.queue_comments(post.id, submission)
 
     def finish_post(self, post_id):
         with self.db.get_scoped_session() as session:
@@ -103,6 +154,4 @@ class ContentRunner(Runner):
             else:
                 submission_handler.extract_self_post()
             if post.significant_reddit_object.run_comment_operations:
-                submission = reddit_utils.get_reddit_instance().submission(post.reddit_id)
-                submission_handler.submission = submission
-                submission_handler.extract_comments()
+                self.queue_comments(post.id)
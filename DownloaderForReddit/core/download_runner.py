@@ -1,20 +1,33 @@
 import platform
 import logging
+import heapq
+from time import time
+from math import ceil
+from itertools import islice
 from queue import Queue, Empty
-from threading import Thread, Event
+from threading import Thread, Event, Lock
+from concurrent.futures import ThreadPoolExecutor, Future, CancelledError
 from datetime import datetime
 import prawcore
 from PyQt5.QtCore import QObject, pyqtSignal
 from collections import namedtuple
+from praw.const import API_PATH
 from praw.models import Redditor
 
 from .downloader import Downloader
 from .content_runner import ContentRunner
+from .submittable_creator import SubmittableCreator
+from .validation_cache import validation_cache
+from .perpetual_scheduler import PerpetualScheduler
 from .submission_filter import SubmissionFilter
-from .runner import verify_run
+from .runner import verify_run, put_while_running
 from .errors import NON_DOWNLOADABLE
+from . import const
 from ..database.models import DownloadSession, RedditObject, User, Subreddit, Post, Content
+from ..database.model_enums import PostSortMethod
+from ..database import statistics
 from ..utils import injector, reddit_utils, video_merger
+from ..utils.rate_governor import rate_governor, Priority
 from ..messaging.message import Message
 from ..version import __version__
 
@@ -22,6 +35,14 @@ from ..version import __version__
 ExtractionSet = namedtuple('ExtractionSet', 'extraction_type extraction_object significant_id')
 RunPair = namedtuple('RunPair', 'reddit_object_id praw_object')
 
+LISTING_PAGE_SIZE = 100  # max number of items reddit returns per listing request
+# a listing cursor is checked for deletion once the object has been quiet for this many of its post intervals
+CURSOR_CHECK_INTERVALS = 2
+SEARCH_SUBREDDIT_CHUNK_SIZE = 50  # max number of subreddits combined into one search to keep the url length reasonable
+SEARCH_RESULT_LIMIT = 250  # reddit stops returning results for a search query at about this many
+STATISTICS_REFRESH_INTERVAL = 300  # seconds between statistics refreshes while the download session is running
+QUEUE_DEPTH_REPORT_INTERVAL = 30  # seconds between queue depth reports while the download session is running
+
 
 class DownloadRunner(QObject):
 
@@ -62,22 +83,76 @@ class DownloadRunner(QObject):
         self.continue_run = True
         self.stopped = False
         self.filter_subreddits = False
-        self.validated_subreddits = []
+        self.validated_subreddits = set()  # lower case names of the subreddits a user download is constrained to
+        # number of listing requests made and the number of new submissions they produced during the session
+        self.listing_pages_fetched = 0
+        self.listing_items_gained = 0
+        self.listing_stats_lock = Lock()
+        # requests made for users whose submissions are searched for in the validated subreddits, and the listing
+        # requests that a listing download would have needed for the same submissions
+        self.search_requests = 0
+        self.search_listing_requests = 0
+        self.search_listing_requests_needed = 0
+        # maps reddit object ids to futures of the error found when the objects are validated ahead of their listings,
+        # which are resolved with None if the object is valid
+        self.validation_results = {}
 
-        self.submission_queue = Queue(maxsize=-1)
+        self.submission_queue = Queue(maxsize=self.settings_manager.submission_queue_size)
         self.extractor = None
         self.extraction_thread = None
-        self.download_queue = Queue(maxsize=-1)
+        self.download_queue = Queue(maxsize=self.settings_manager.download_queue_size)
         self.downloader = None
         self.download_thread = None
 
         self.perpetual_download = self.settings_manager.perpetual_download
-        self.perpetual_queue = Queue(maxsize=-1)
+        self.perpetual_scheduler = PerpetualScheduler()
         self.failed_connection_attempts = 0
+        self.failed_connection_lock = Lock()  # connection failures are counted from each of the listing threads
         self.download_session_id = None
+        # the ids returned by the last statistics refresh of the download session, and the time it was made
+        self.statistics_refresh_ids = None
+        self.last_statistics_refresh = time()
+        self.last_queue_depth_report = time()
 
+        # The reddit object queue is filled from the GUI thread, so it can not be bounded without risking blocking the
+        # GUI.  It only ever holds one entry per reddit object.
         self.reddit_object_queue = Queue(maxsize=-1)
 
+    @property
+    def queue_depths(self):
+        """
+        Returns a dict of the current number of items waiting in each of the download session's queues, and the number
+        of tasks that the content runner and downloader have in flight.
+        """
+        return {
+            'submission_queue': self.submission_queue.qsize(),
+            'download_queue': self.download_queue.qsize(),
+            'perpetual_scheduler': len(self.perpetual_scheduler),
+            'reddit_object_queue': self.reddit_object_queue.qsize(),
+            'extraction_tasks': self.extractor.tasks.count if self.extractor is not None else 0,
+            'download_tasks': self.downloader.tasks.count if self.downloader is not None else 0,
+        }
+
+    def report_queue_depths_if_due(self):
+        """
+        Sends the queue depths and in flight task counts to the output as a debug message once the report interval has
+        passed, so that a stage that is holding up the download session can be seen while the session is running.
+        """
+        if time() - self.last_queue_depth_report < QUEUE_DEPTH_REPORT_INTERVAL:
+            return
+        depths = self.queue_depths
+        self.logger.debug('Download session queue depths', extra=depths)
+        Message.send_debug('Queued: {submission_queue} submissions, {download_queue} downloads.  In progress: '
+                           '{extraction_tasks} extractions, {download_tasks} downloads'.format(**depths))
+        self.last_queue_depth_report = time()
+
+    def put_submission(self, item):
+        """
+        Puts the supplied item into the submission queue, blocking until the content runner has room for it or the run
+        is stopped.
+        """
+        return put_while_running(self.submission_queue, item, self.stop_run)
+
     def validate_user(self, user_obj):
         redditor = self.reddit_instance.redditor(user_obj.name)
         if self.validate_object(redditor, user_obj):
@@ -95,20 +170,146 @@ class DownloadRunner(QObject):
             return None
 
     def validate_object(self, praw_object, reddit_object):
+        """
+        Checks that the supplied praw object exists on reddit and handles the reddit object appropriately if it does
+        not.  Objects that are being validated ahead of their listings wait for that result, and objects validated
+        recently enough to be in the validation cache are not checked again.
+        :return: True if the reddit object is valid, False if it is not.
+        """
+        error = None
+        future = self.validation_results.pop(reddit_object.id, None)
+        if future is not None:
+            try:
+                error = future.result()
+            except CancelledError:
+                future = None
+        if future is None and not validation_cache.is_valid(reddit_object.object_type, reddit_object.name):
+            error = self.check_praw_object(praw_object)
+        if error is None:
+            validation_cache.set_valid(reddit_object.object_type, reddit_object.name)
+            return True
+        self.handle_validation_error(error, reddit_object)
+        return False
+
+    @staticmethod
+    def check_praw_object(praw_object):
+        """
+        Forces the supplied lazy praw object to be fetched from reddit.  This does not touch the database, so it is safe
+        to call from validation worker threads.
+        :return: The exception raised while fetching the object, or None if the object exists.
+        """
         try:
             praw_object.fullname
-            return True
-        except (prawcore.exceptions.Redirect, prawcore.exceptions.NotFound, AttributeError):
+            return None
+        except Exception as e:
+            return e
+
+    def handle_validation_error(self, error, reddit_object):
+        if isinstance(error, (prawcore.exceptions.Redirect, prawcore.exceptions.NotFound, AttributeError)):
             self.handle_invalid_reddit_object(reddit_object)
             reddit_object.set_inactive()
-        except prawcore.exceptions.Forbidden:
+        elif isinstance(error, prawcore.exceptions.Forbidden):
             self.handle_forbidden_reddit_object(reddit_object)
             reddit_object.set_inactive()
-        except prawcore.RequestException:
+        elif isinstance(error, prawcore.RequestException):
             self.handle_failed_connection()
-        except:
-            self.handle_unknown_error(reddit_object)
-        return False
+        else:
+            self.handle_unknown_error(reddit_object, error)
+
+    def validate_reddit_objects(self, reddit_object_id_list, executor):
+        """
+        Starts validating the reddit objects with the supplied ids on the supplied executor so that large lists do not
+        have to wait on one request per object.  The listings are not held back until the whole list is validated: a
+        future of each object's result is stored, and the listing of an object only waits for that object's result, so
+        listings start as soon as the objects at the front of the list are validated.  Subreddits are first checked in
+        batches through reddit's info endpoint, and any that are not confirmed this way, along with all users, are
+        checked individually.  Objects found in the validation cache are skipped.  The results are handled when each
+        object is reached by the download session, so that database changes and signals happen on the listing threads.
+        :param reddit_object_id_list: The ids of the reddit objects that are to be validated.
+        :param executor: The executor that the validation requests are made on.
+        """
+        pending = {}
+        id_list = list(reddit_object_id_list)
+        with self.db.get_scoped_session() as session:
+            for i in range(0, len(id_list), 500):
+                query = session.query(RedditObject.id, RedditObject.name, RedditObject.object_type)\
+                    .filter(RedditObject.id.in_(id_list[i:i + 500]))
+                for ro_id, name, object_type in query:
+                    if not validation_cache.is_valid(object_type, name):
+                        pending[ro_id] = (name, object_type)
+        if len(pending) <= 1:
+            return  # nothing to gain from validating a single object ahead of time
+
+        check_praw_object = rate_governor.prioritize(self.check_praw_object)
+        subreddits = {}
+        # submitted in the order of the listings so that the first listings are not left waiting on the last objects
+        for ro_id in (x for x in id_list if x in pending):
+            name, object_type = pending.pop(ro_id)
+            if object_type == 'USER':
+                self.validation_results[ro_id] = executor.submit(check_praw_object, self.reddit_instance.redditor(name))
+            else:
+                future = Future()
+                subreddits[name.lower()] = (ro_id, future)
+                self.validation_results[ro_id] = future
+        if len(subreddits) > 0:
+            batch = executor.submit(rate_governor.prioritize(self.validate_subreddit_batch),
+                                    {name: ro_id for name, (ro_id, future) in subreddits.items()})
+            batch.add_done_callback(
+                lambda f: self.finish_subreddit_batch(f, subreddits, executor, check_praw_object))
+
+    def finish_subreddit_batch(self, batch, subreddits, executor, check_praw_object):
+        """
+        Resolves the futures of the subreddits that were confirmed by a subreddit batch, and checks the rest of them
+        individually.
+        :param batch: The future of the confirmed subreddit ids returned by validate_subreddit_batch.
+        :param subreddits: A dict of lower case subreddit names to the id of the matching reddit object and the future
+                           of its validation result.
+        """
+        confirmed = set() if batch.cancelled() or batch.exception() is not None else set(batch.result())
+        for name, (ro_id, future) in subreddits.items():
+            if ro_id in confirmed:
+                future.set_result(None)
+                continue
+            try:
+                check = executor.submit(check_praw_object, self.reddit_instance.subreddit(name))
+            except RuntimeError:  # the executor was shut down because the download was stopped
+                future.cancel()
+                continue
+            check.add_done_callback(lambda f, future=future: self.copy_future(f, future))
+
+    @staticmethod
+    def copy_future(source, destination):
+        if source.cancelled():
+            destination.cancel()
+        elif source.exception() is not None:
+            destination.set_exception(source.exception())
+        else:
+            destination.set_result(source.result())
+
+    def cancel_validation(self):
+        """Cancels the validation of reddit objects that were not reached by the download session."""
+        for future in self.validation_results.values():
+            future.cancel()
+        self.validation_results.clear()
+
+    def validate_subreddit_batch(self, subreddit_names):
+        """
+        Uses reddit's info endpoint to confirm that the supplied subreddits exist, one hundred subreddits per request.
+        Subreddits that are not returned, and private subreddits, are not confirmed so that they can be checked
+        individually and handled as either invalid or forbidden.
+        :param subreddit_names: A dict of lower case subreddit names to the id of the matching reddit object.
+        :return: A list of the ids of the subreddits that were confirmed to exist.
+        """
+        confirmed = []
+        if len(subreddit_names) > 0:
+            try:
+                for subreddit in self.reddit_instance.info(subreddits=list(subreddit_names.keys())):
+                    ro_id = subreddit_names.get(subreddit.display_name.lower())
+                    if ro_id is not None and getattr(subreddit, 'subreddit_type', None) != 'private':
+                        confirmed.append(ro_id)
+            except Exception:
+                self.logger.warning('Failed to validate subreddit batch', exc_info=True)
+        return confirmed
 
     def handle_invalid_reddit_object(self, reddit_object):
         self.logger.warning('Invalid reddit object detected', extra={'object_type': reddit_object.object_type,
@@ -123,22 +324,24 @@ class DownloadRunner(QObject):
         self.remove_forbidden_object.emit(reddit_object.id)
 
     def handle_failed_connection(self):
-        if self.failed_connection_attempts >= 3:
+        with self.failed_connection_lock:
+            attempts = self.failed_connection_attempts
+            self.failed_connection_attempts += 1
+        if attempts >= 3:
             self.continue_run = False
-            self.logger.error('Failed connection attempts exceeded.  Ending download session', exc_info=True)
-            Message.send_critical('Failed connection attempts exceeded.  The download session has been canceled.  '
-                                  'Please try the download again later.')
+            # listing threads that fail after the session is canceled do not report it again
+            if attempts == 3:
+                self.logger.error('Failed connection attempts exceeded.  Ending download session', exc_info=True)
+                Message.send_critical('Failed connection attempts exceeded.  The download session has been canceled.  '
+                                      'Please try the download again later.')
         else:
-            self.logger.error('Failed to connect to reddit',
-                              extra={'connection_attempts': self.failed_connection_attempts})
-            Message.send_error(f'Failed to connect to reddit.  Connection attempts remaining: '
-                               f'{3 - self.failed_connection_attempts}')
-            self.failed_connection_attempts += 1
+            self.logger.error('Failed to connect to reddit', extra={'connection_attempts': attempts})
+            Message.send_error(f'Failed to connect to reddit.  Connection attempts remaining: {3 - attempts}')
 
-    def handle_unknown_error(self, reddit_object):
+    def handle_unknown_error(self, reddit_object, error=True):
         self.logger.error('Failed to validate reddit object due to unknown error',
                           extra={'object_type': reddit_object.object_type, 'reddit_object': reddit_object.name},
-                          exc_info=True)
+                          exc_info=error)
 
     def run_unextracted_posts(self):
         self.logger.debug('Running unextracted posts')
@@ -152,7 +355,8 @@ class DownloadRunner(QObject):
         self.logger.debug(f'{post_id_list.count()} unfinished posts to download')
         for post_id, in post_id_list.all():  # comma used to unpack result tuple
             extraction_set = ExtractionSet(extraction_type='POST', extraction_object=post_id, significant_id=None)
-            self.submission_queue.put(extraction_set)
+            if not self.put_submission(extraction_set):
+                break
         self.logger.debug('Finished unextracted posts')
 
     def run_undownloaded_content(self):
@@ -166,23 +370,26 @@ class DownloadRunner(QObject):
                     .filter(Content.download_error.notin_(NON_DOWNLOADABLE))
         self.logger.debug(f'{content_id_list.count()} unfinished content items to download')
         for content in content_id_list.all():
-            self.download_queue.put(content.id)
+            if not put_while_running(self.download_queue, content.id, self.stop_run):
+                break
         self.logger.debug('Finished undownloaded content')
 
     def run(self):
-        self.create_download_session()
-        self.start_extractor()
-        self.start_downloader()
-        if self.run_unextracted:
-            self.run_unextracted_posts()
-        if self.run_undownloaded:
-            self.run_undownloaded_content()
-        if self.run_new:
-            self.run_download()
-        if self.perpetual_download:
-            self.perpetuate_run()
-        else:
-            self.hold()
+        # listings and validation are sent ahead of other requests made while the download is running
+        with rate_governor.priority(Priority.HIGH):
+            self.create_download_session()
+            self.start_extractor()
+            self.start_downloader()
+            if self.run_unextracted:
+                self.run_unextracted_posts()
+            if self.run_undownloaded:
+                self.run_undownloaded_content()
+            if self.run_new:
+                self.run_download()
+            if self.perpetual_download:
+                self.perpetuate_run()
+            else:
+                self.hold()
 
     def log_download_settings(self):
         self.logger.info('Download runner started.', extra={
@@ -196,12 +403,16 @@ class DownloadRunner(QObject):
             'last_update': self.settings_manager.last_update,
             'extraction_thread_count': self.settings_manager.extraction_thread_count,
             'download_thread_count': self.settings_manager.download_thread_count,
+            'comment_thread_count': self.settings_manager.comment_thread_count,
+            'submission_queue_size': self.settings_manager.submission_queue_size,
+            'download_queue_size': self.settings_manager.download_queue_size,
             'multi_part_threshold': self.settings_manager.multi_part_threshold,
             'finish_incomplete_extractions': self.settings_manager.finish_incomplete_extractions_at_session_start,
             'finish_incomplete_downloads': self.settings_manager.finish_incomplete_downloads_at_session_start,
         })
 
     def create_download_session(self):
+        SubmittableCreator.clear_cache()
         with self.db.get_scoped_session() as session:
             download_session = DownloadSession(
                 start_time=datetime.now(),
@@ -211,6 +422,8 @@ class DownloadRunner(QObject):
             session.add(download_session)
             session.commit()
             self.download_session_id = download_session.id
+            # gives the running session a statistics row so that it is not sorted with sessions that have none
+            statistics.refresh_statistics(session, download_session_ids=[self.download_session_id])
 
     def start_extractor(self):
         self.extractor = ContentRunner(self.submission_queue, self.download_queue, self.download_session_id,
@@ -224,32 +437,61 @@ class DownloadRunner(QObject):
         self.download_thread.start()
 
     def run_download(self):
-        if self.reddit_object_id_list is not None:
-            for ro_id in self.reddit_object_id_list:
-                self.get_reddit_object_submissions(ro_id)
-        else:
-            if self.user_id_list is not None and self.subreddit_id_list is not None:
-                self.filter_subreddits = True
-                self.validate_subreddit_list()
-            if self.user_id_list is not None:
-                for user_id in self.user_id_list:
-                    self.get_user_submissions(user_id)
-            else:
-                for subreddit_id in self.subreddit_id_list:
-                    self.get_subreddit_submissions(subreddit_id)
+        with ThreadPoolExecutor(max_workers=self.settings_manager.validation_thread_count) as executor:
+            try:
+                if self.reddit_object_id_list is not None:
+                    self.validate_reddit_objects(self.reddit_object_id_list, executor)
+                    self.run_listings(self.get_reddit_object_submissions, self.reddit_object_id_list)
+                else:
+                    if self.user_id_list is not None and self.subreddit_id_list is not None:
+                        self.filter_subreddits = True
+                        self.validate_subreddit_list(executor)
+                    if self.user_id_list is not None:
+                        self.validate_reddit_objects(self.user_id_list, executor)
+                        self.run_listings(self.get_user_submissions, self.user_id_list)
+                    else:
+                        self.validate_reddit_objects(self.subreddit_id_list, executor)
+                        self.run_listings(self.get_subreddit_submissions, self.subreddit_id_list)
+            finally:
+                self.cancel_validation()
+
+    def run_listings(self, submission_method, reddit_object_id_list):
+        """
+        Calls the supplied submission method for each of the supplied reddit object ids.  The listings for several
+        reddit objects are fetched from reddit at the same time on a thread pool sized by the settings manager's
+        listing_thread_count, so that extraction threads are not left idle while listing requests are made one after
+        another.  Each call uses its own database session.
+        :param submission_method: The method used to get the submissions for a single reddit object id.
+        :param reddit_object_id_list: The ids of the reddit objects whose submissions are to be retrieved.
+        """
+        thread_count = self.settings_manager.listing_thread_count
+        if thread_count <= 1:
+            for ro_id in reddit_object_id_list:
+                submission_method(ro_id)
+            return
+        with ThreadPoolExecutor(max_workers=thread_count) as executor:
+            submission_method = rate_governor.prioritize(submission_method)
+            futures = {executor.submit(submission_method, ro_id): ro_id for ro_id in reddit_object_id_list}
+            for future, ro_id in futures.items():
+                try:
+                    future.result()
+                except Exception:
+                    self.logger.error('Failed to get submissions for reddit object',
+                                      extra={'reddit_object_id': ro_id}, exc_info=True)
 
-    def validate_subreddit_list(self):
+    def validate_subreddit_list(self, executor):
         """
         Validates the list of subreddits to make sure they all exist so that the user list can be constrained to the
         list of verified subreddits.
         """
+        self.validate_reddit_objects(self.subreddit_id_list, executor)
         with self.db.get_scoped_session() as session:
             for subreddit_id in self.subreddit_id_list:
                 if self.continue_run:
                     subreddit = session.query(Subreddit).get(subreddit_id)
                     sub = self.validate_subreddit(subreddit)
                     if sub is not None:
-                        self.validated_subreddits.append(sub)
+                        self.validated_subreddits.add(subreddit.name.lower())
                     else:
                         subreddit.set_inactive()
                 else:
@@ -294,53 +536,200 @@ class DownloadRunner(QObject):
             self.handle_submissions(subreddit, sub)
 
     def handle_submissions(self, reddit_object, praw_object):
-        submissions = self.get_submissions(praw_object, reddit_object)
-        date_limit = 0
-        for submission in submissions:
-            if submission.created > date_limit:
-                date_limit = submission.created
-            extraction_set = ExtractionSet(extraction_type='SUBMISSION', extraction_object=submission,
-                                           significant_id=reddit_object.id)
-            self.submission_queue.put(extraction_set)
-        if date_limit > 0:
-            reddit_object.set_date_limit(date_limit)  # date limit modified after submissions are extracted
+        """
+        Queues each submission for extraction as soon as it is received from reddit and passes the submission filter,
+        so that extraction of the first submissions can begin while the rest of the listing is still being fetched.
+        The newest creation date seen is tracked as the submissions are queued and is set as the reddit object's date
+        limit once the whole listing has been handled.  During a perpetual download the reddit object is then scheduled
+        to be checked again based on how often it posts.
+        """
+        previous_latest = reddit_object.absolute_date_limit.timestamp() \
+            if reddit_object.absolute_date_limit is not None else None
+        post_times = []
+        newest = None
+        try:
+            for submission in self.get_submissions(praw_object, reddit_object):
+                extraction_set = ExtractionSet(extraction_type='SUBMISSION', extraction_object=submission,
+                                               significant_id=reddit_object.id)
+                if not self.put_submission(extraction_set):
+                    return
+                post_times.append(submission.created)
+                if not (submission.pinned or submission.stickied) and \
+                        (newest is None or submission.created > newest.created):
+                    newest = submission
+        finally:
+            self.add_listing_stats(items=len(post_times))
+        if not self.continue_run:
+            # the listing was not finished, so older submissions that passed the filter may not have been queued yet
+            return
+        if post_times:
+            reddit_object.set_date_limit(max(post_times))  # date limit modified after submissions are extracted
+        if newest is not None and reddit_object.post_sort_method == PostSortMethod.NEW and \
+                newest.fullname != reddit_object.last_seen_fullname:
+            # only moved to a submission that was queued so that the cursor never skips a submission
+            reddit_object.last_seen_fullname = newest.fullname
+            reddit_object.get_session().commit()
         if self.perpetual_download:
             pair = RunPair(reddit_object_id=reddit_object.id, praw_object=praw_object)
-            self.perpetual_queue.put(pair)
+            delay = self.perpetual_scheduler.schedule(pair, reddit_object, post_times, previous_latest)
+            reddit_object.get_session().commit()
+            self.logger.debug('Scheduled next perpetual check',
+                              extra={'reddit_object': reddit_object.name, 'delay': round(delay),
+                                     'post_interval': reddit_object.post_interval})
 
-    @verify_run
     def get_submissions(self, praw_object, reddit_object):
         """
-        Extracts submissions from the supplied praw object's submission generator.  The submissions are passed through
-        the SubmissionFilter before being added for extraction.
+        Yields submissions from the supplied praw object's submission generator as they are received from reddit.  Only
+        submissions that pass the SubmissionFilter are yielded.  The generator stops early if the run is stopped.
         :param praw_object: The praw object from which submissions are extracted.
         :param reddit_object: The reddit object which the praw object is based on.
-        :return: A list of submissions extracted from reddit.  May be an empty list if no passing submissions are found.
+        :return: A generator of the passing submissions extracted from reddit.
         """
-        submissions = []
+        # a listing continued from a cursor only holds submissions added since the last download, so a submission that
+        # fails the date filter (eg: one approved long after it was posted) does not mean the rest are old
+        from_cursor = self.get_listing_cursor(reddit_object) is not None
         for submission in self.get_raw_submissions(praw_object, reddit_object):
+            if not self.continue_run:
+                break
             passes_date_limit = self.submission_filter.date_filter(submission, reddit_object)
             # stickied posts are taken first when getting submissions by new, even when they are not the newest
             # submissions.  So the first filter pass allows stickied posts through so they do not trip the date filter
             # before more recent posts are allowed through
             if (submission.pinned or submission.stickied) or passes_date_limit:
                 if passes_date_limit:
-                    if (not self.filter_subreddits or submission.subreddit.display_name in self.validated_subreddits) \
+                    if (not self.filter_subreddits or
+                        submission.subreddit.display_name.lower() in self.validated_subreddits) \
                             and self.submission_filter.filter_submission(submission, reddit_object):
-                        submissions.append(submission)
-            else:
+                        yield submission
+            elif not from_cursor:
                 break
-        return submissions
 
     def get_raw_submissions(self, praw_object, reddit_object):
         """
         Returns a praw submission generator for the supplied praw object sorted and limited by the settings of the
-        supplied reddit object.
+        supplied reddit object.  If a user download is constrained to a list of subreddits, the user's posts are
+        searched for in those subreddits instead of pulling the user's whole listing, where the user's sort method
+        allows it.  If the reddit object's new listing was read during its last download, only the submissions added
+        to the listing since then are requested.
         :param praw_object: The praw object (Redditor or Subreddit) from which a submission generator is to be returned.
         :param reddit_object: The reddit object matching the praw object which contains the settings to be used to sort
                               and limit the submission generator.
         :return: A submission generator for the supplied praw object.
         """
+        if self.use_search(praw_object, reddit_object):
+            return self.search_user_submissions(praw_object, reddit_object)
+        return self.get_listing(praw_object, reddit_object)
+
+    def get_listing(self, praw_object, reddit_object):
+        """
+        Returns a generator of the supplied praw object's listing, continued from the reddit object's listing cursor if
+        it has one.
+        """
+        cursor = self.get_listing_cursor(reddit_object)
+        if cursor is not None:
+            return self.get_submissions_since(praw_object, reddit_object, cursor)
+        return self.count_listing_pages(self.get_listing_submissions(praw_object, reddit_object))
+
+    def use_search(self, praw_object, reddit_object):
+        return self.filter_subreddits and isinstance(praw_object, Redditor) and \
+               self.settings_manager.search_constrained_user_submissions and \
+               reddit_object.post_sort_method == PostSortMethod.NEW and len(self.validated_subreddits) > 0
+
+    @staticmethod
+    def get_listing_cursor(reddit_object):
+        """
+        Returns the fullname of the newest submission taken from the reddit object's new listing during its last
+        download, if the listing can be continued from it.  The cursor is not used if the reddit object has a custom
+        date limit, as the user has asked for submissions from before the last download.
+        """
+        if reddit_object.post_sort_method != PostSortMethod.NEW or reddit_object.date_limit is not None:
+            return None
+        return reddit_object.last_seen_fullname
+
+    def get_submissions_since(self, praw_object, reddit_object, cursor):
+        """
+        Yields the submissions added to the supplied praw object's new listing after the submission with the supplied
+        fullname, newest first.  The listing is paged forward from the cursor with reddit's 'before' parameter so that
+        only new submissions are requested.  If there are more new submissions than the reddit object's post limit, or
+        the cursor submission has been removed from the listing, the newest submissions are taken from the start of the
+        listing instead.
+        :param praw_object: The praw object (Redditor or Subreddit) whose listing is read.
+        :param reddit_object: The reddit object matching the praw object.
+        :param cursor: The fullname of the newest submission taken from the listing during the last download.
+        """
+        path = self.get_listing_path(praw_object)
+        pages = []
+        count = 0
+        before = cursor
+        while self.continue_run:
+            page = list(self.reddit_instance.get(path, params={'before': before, 'limit': LISTING_PAGE_SIZE,
+                                                               'sort': 'new'}))
+            self.add_listing_stats(pages=1)
+            if len(page) == 0:
+                break
+            pages.append(page)
+            count += len(page)
+            if count > reddit_object.post_limit:
+                self.logger.debug('More new submissions than post limit, reading listing from start',
+                                  extra={'reddit_object': reddit_object.name})
+                yield from self.get_listing_submissions_until_date_limit(praw_object, reddit_object)
+                return
+            if len(page) < LISTING_PAGE_SIZE:
+                break
+            before = page[0].fullname
+        if count == 0 and not self.cursor_exists(reddit_object, cursor):
+            self.logger.info('Listing cursor no longer exists, reading listing from start',
+                             extra={'reddit_object': reddit_object.name, 'cursor': cursor})
+            reddit_object.last_seen_fullname = None
+            reddit_object.get_session().commit()
+            yield from self.get_listing_submissions_until_date_limit(praw_object, reddit_object)
+            return
+        for page in reversed(pages):
+            yield from page
+
+    def get_listing_submissions_until_date_limit(self, praw_object, reddit_object):
+        """
+        Yields submissions from the start of the listing until the first one that is older than the reddit object's
+        date limit.  Used when a cursor can not be followed, as get_submissions does not stop at old submissions that
+        are read from a cursor.
+        """
+        for submission in self.count_listing_pages(self.get_listing_submissions(praw_object, reddit_object)):
+            if not (submission.pinned or submission.stickied or
+                    self.submission_filter.date_filter(submission, reddit_object)):
+                break
+            yield submission
+
+    def cursor_exists(self, reddit_object, cursor):
+        """
+        Returns False if the cursor submission has been deleted or removed, in which case reddit returns nothing before
+        it.  So that a request is not added to every check that finds nothing new, the cursor is only looked up once the
+        reddit object has gone without posting for longer than usual.
+        """
+        if reddit_object.post_interval is not None and reddit_object.absolute_date_limit is not None:
+            quiet_time = time() - reddit_object.absolute_date_limit.timestamp()
+            if quiet_time < reddit_object.post_interval * CURSOR_CHECK_INTERVALS:
+                return True
+        submission = next(iter(self.reddit_instance.info(fullnames=[cursor])), None)
+        return submission is not None and submission.author is not None and \
+            getattr(submission, 'removed_by_category', None) is None
+
+    @staticmethod
+    def get_listing_path(praw_object):
+        if isinstance(praw_object, Redditor):
+            return API_PATH['user'].format(user=praw_object.name) + 'submitted'
+        return API_PATH['subreddit'].format(subreddit=praw_object.display_name) + 'new'
+
+    def count_listing_pages(self, submissions):
+        """Yields the supplied listing's submissions, counting the number of listing requests they took."""
+        pulled = 0
+        try:
+            for submission in submissions:
+                pulled += 1
+                yield submission
+        finally:
+            self.add_listing_stats(pages=max(1, ceil(pulled / LISTING_PAGE_SIZE)))
+
+    def get_listing_submissions(self, praw_object, reddit_object):
         sort_method = reddit_object.post_sort_method
         if sort_method.value <= 4:
             submission_method = self.get_raw_submission_method(praw_object, sort_method.name.lower())
@@ -350,6 +739,121 @@ class DownloadRunner(QObject):
             submission_method = self.get_raw_submission_method(praw_object, sort)
             return submission_method(sort_period, limit=reddit_object.post_limit)
 
+    def search_user_submissions(self, redditor, user):
+        """
+        Yields the supplied user's newest submissions to the validated subreddits by searching those subreddits for
+        posts by the user, so that only matching posts are requested from reddit.  The subreddits are searched in
+        groups and the results of the groups are merged so that they are yielded newest first.  Search is only used for
+        the new sort, as the results of groups searched by any other sort can not be merged into one ordered listing.
+        If the user has been downloaded before, the first submission of the user's listing is requested first, so that
+        a user with nothing new costs one request instead of a search of every group.  Reddit search is not a complete
+        listing, so the user's listing is used instead if the search fails, if a group returns as many results as
+        search will return while the post limit asks for more, or if the newest submission in the listing is missing
+        from the search because reddit has not indexed it yet.
+        :param redditor: The praw Redditor that the listing is taken from if the search can not be used.
+        :param user: The user whose submissions are searched for.
+        """
+        date_limit = self.get_search_date_limit(user)
+        newest = None
+        if date_limit is not None:
+            newest = next(iter(redditor.submissions.new(limit=1)), None)
+            self.add_listing_stats(pages=1)
+            self.add_search_stats(listing_requests=1)
+            if newest is None or newest.created <= date_limit:
+                self.add_search_stats(listing_requests_needed=1)  # a listing download stops at the same page
+                return
+        searches = self.search_subreddits(user)
+        if searches is not None and self.search_is_missing(newest, searches):
+            self.logger.debug('Newest user submission is not indexed by search yet, using user listing instead',
+                              extra={'user': user.name})
+            searches = None
+        if searches is None:
+            yield from self.count_search_listing(self.get_listing(redditor, user))
+            return
+        yielded = 0
+        try:
+            for submission in islice(heapq.merge(*searches, key=lambda submission: -submission.created),
+                                     user.post_limit):
+                yielded += 1
+                yield submission
+        finally:
+            # a listing download would have read at least as many pages as it takes to hold the same submissions
+            self.add_search_stats(listing_requests_needed=max(1, ceil(yielded / LISTING_PAGE_SIZE)))
+
+    def get_search_date_limit(self, user):
+        """
+        Returns the timestamp of the supplied user's date limit if it is after the first post epoch, which means that
+        the user has been downloaded before or has a custom date limit, or None if it is not.
+        """
+        date_limit = self.submission_filter.get_date_limit(user)
+        if date_limit is not None and date_limit.timestamp() > const.FIRST_POST_EPOCH:
+            return date_limit.timestamp()
+        return None
+
+    def search_is_missing(self, newest, searches):
+        """
+        Returns True if the supplied newest submission from the user's listing was posted to one of the validated
+        subreddits but is newer than every search result, which means that search has not indexed it yet.
+        """
+        if newest is None or newest.subreddit.display_name.lower() not in self.validated_subreddits:
+            return False
+        newest_found = max((search[0].created for search in searches if search), default=None)
+        return newest_found is None or newest_found < newest.created
+
+    def count_search_listing(self, submissions):
+        """
+        Yields the submissions of a listing used instead of a search, counting its requests for the search statistics.
+        The listing is what a listing download would have made, so its requests are also the requests needed.
+        """
+        pulled = 0
+        try:
+            for submission in submissions:
+                pulled += 1
+                yield submission
+        finally:
+            pages = max(1, ceil(pulled / LISTING_PAGE_SIZE))
+            self.add_search_stats(listing_requests=pages, listing_requests_needed=pages)
+
+    def search_subreddits(self, user):
+        """
+        Searches each group of validated subreddits for the supplied user's submissions.
+        :return: A list of the submissions found in each group, newest first, or None if the search failed or its
+                 results may be incomplete.
+        """
+        names = sorted(self.validated_subreddits)
+        limit = min(user.post_limit, SEARCH_RESULT_LIMIT)
+        searches = []
+        try:
+            for i in range(0, len(names), SEARCH_SUBREDDIT_CHUNK_SIZE):
+                subreddits = self.reddit_instance.subreddit('+'.join(names[i:i + SEARCH_SUBREDDIT_CHUNK_SIZE]))
+                search = list(subreddits.search(f'author:{user.name}', sort='new', time_filter='all', syntax='lucene',
+                                                limit=limit))
+                pages = max(1, ceil(len(search) / LISTING_PAGE_SIZE))
+                self.add_listing_stats(pages=pages)
+                self.add_search_stats(requests=pages)
+                # a group holding the post limit already has every submission the merge can take from it
+                if limit < user.post_limit and len(search) >= limit:
+                    self.logger.info('User submission search may be truncated, using user listing instead',
+                                     extra={'user': user.name, 'result_count': len(search)})
+                    return None
+                searches.append(search)
+        except prawcore.PrawcoreException:
+            self.logger.warning('User submission search failed, using user listing instead', extra={'user': user.name},
+                                exc_info=True)
+            return None
+        return searches
+
+    def add_search_stats(self, requests=0, listing_requests=0, listing_requests_needed=0):
+        with self.listing_stats_lock:
+            self.search_requests += requests
+            self.search_listing_requests += listing_requests
+            self.search_listing_requests_needed += listing_requests_needed
+
+    def add_listing_stats(self, pages=0, items=0):
+        with self.listing_stats_lock:
+            self.listing_pages_fetched += pages
+            self.listing_items_gained += items
+
     def get_raw_submission_method(self, praw_object, sort_type: str):
         """
         Creates and returns the method that should be used to retrieve the submissions for the praw_object.
@@ -365,39 +869,44 @@ class DownloadRunner(QObject):
 
     def perpetuate_run(self):
         """
-        Enters a perpetual loop that recycles reddit objects from the perpetual queue and checks for new posts.  After
-        each object from the perpetual queue is checked, a check is also performed for new reddit objects that may have
-        been added to the session after it began.
+        Enters a perpetual loop that checks each reddit object for new posts as it becomes due in the perpetual
+        scheduler.  Between checks, a check is also performed for new reddit objects that may have been added to the
+        session after it began.
         """
         self.logger.debug('Entering perpetual run')
         while self.continue_run:
             self.run_next_perpetual_pair()
             self.check_added_object_queue(block=False)
+            self.refresh_statistics_if_due()
+            self.report_queue_depths_if_due()
         self.finish_download()
 
     def run_next_perpetual_pair(self):
         """
-        Extracts a run_pair from the perpetual download queue and checks it for new submissions.
+        Waits up to one second for a reddit object to become due in the perpetual scheduler and checks it for new
+        submissions.
         """
-        try:
-            run_pair = self.perpetual_queue.get(timeout=1)
-            if run_pair is not None:
-                reddit_object_id, praw_object = run_pair
-                with self.db.get_scoped_session() as session:
-                    reddit_object = session.query(RedditObject).get(reddit_object_id)
-                    self.handle_submissions(reddit_object, praw_object)
-        except Empty:
-            pass
+        run_pair = self.perpetual_scheduler.get_next(timeout=1)
+        if run_pair is not None:
+            reddit_object_id, praw_object = run_pair
+            with self.db.get_scoped_session() as session:
+                reddit_object = session.query(RedditObject).get(reddit_object_id)
+                self.handle_submissions(reddit_object, praw_object)
 
     def hold(self):
         """
         Holds the download runner while the content extractor and downloader finish their work loads.  During this time,
         reddit objects that were not initially in the download list can be added to the download queue.
         """
-        self.logger.debug('DownloadRunner holding')
-        self.submission_queue.put('HOLD')
+        self.logger.debug('DownloadRunner holding', extra=self.queue_depths)
+        self.put_submission('HOLD')
         while self.continue_run and (self.extractor.running or self.downloader.running):
-            self.check_added_object_queue()
+            # the downloader only holds after the extractor has finished, so its finished event is set once both have
+            # completed their work loads
+            self.downloader.tasks.finished.wait(timeout=1)
+            self.check_added_object_queue(block=False)
+            self.refresh_statistics_if_due()
+            self.report_queue_depths_if_due()
         self.finish_download()
 
     def check_added_object_queue(self, block=True):
@@ -411,19 +920,36 @@ class DownloadRunner(QObject):
         try:
             reddit_object_id = self.reddit_object_queue.get(timeout=1, block=block)
             if reddit_object_id is not None:
-                self.submission_queue.put('RELEASE_HOLD')
+                self.put_submission('RELEASE_HOLD')
                 self.get_reddit_object_submissions(reddit_object_id)
-                self.submission_queue.put('HOLD')  # reapply holds after new submissions added to queue
+                self.put_submission('HOLD')  # reapply holds after new submissions added to queue
         except Empty:
             pass
 
+    def refresh_statistics_if_due(self):
+        """
+        Refreshes the statistics of what the download session has added since the last refresh once the refresh
+        interval has passed, so that the views sorted and filtered by them are not out of date while a long session,
+        such as a perpetual download, is running, and are at most one interval behind if the application is closed
+        without the session finishing.
+        """
+        if time() - self.last_statistics_refresh < STATISTICS_REFRESH_INTERVAL:
+            return
+        try:
+            with self.db.get_scoped_session() as session:
+                self.statistics_refresh_ids = statistics.refresh_download_session_statistics(
+                    session, self.download_session_id, self.statistics_refresh_ids)
+        except Exception:
+            self.logger.error('Failed to refresh download session statistics', exc_info=True)
+        self.last_statistics_refresh = time()
+
     def finish_download(self):
         """
         Wraps up the download session by shutting down the extractor and downloader, adding the finishing information
         to the download session model, saving it to the database and generally any cleanign up that needs to happen.
         """
-        self.logger.debug('DownloadRunner finished')
-        self.submission_queue.put(None)
+        self.logger.debug('DownloadRunner finished', extra=self.queue_depths)
+        self.put_submission(None)  # not needed if the run was stopped, the content runner exits on its own
         try:
             self.extraction_thread.join()
         except AttributeError:
@@ -432,9 +958,13 @@ class DownloadRunner(QObject):
             self.download_thread.join()
         except AttributeError:
             pass
+        # the session ends once every status change queued by the extraction and download threads is committed
+        self.db.writer.flush()
         video_merger.merge_videos()
         with self.db.get_scoped_session() as session:
             dl_session = self.finish_download_session(session)
+            statistics.refresh_download_session_statistics(session, self.download_session_id,
+                                                           self.statistics_refresh_ids)
             self.finish_messages(dl_session)
         self.download_session_signal.emit(self.download_session_id)
         self.finished.emit()
@@ -472,12 +1002,26 @@ class DownloadRunner(QObject):
             'comment_extraction_count': extracted_comment_count,
             'download_count': downloaded_content_count,
         }
+        extra.update(listing_pages_fetched=self.listing_pages_fetched, listing_items_gained=self.listing_items_gained)
+        search_calls = self.search_requests + self.search_listing_requests
+        api_calls_saved = self.search_listing_requests_needed - search_calls
+        if search_calls > 0:
+            extra.update(search_requests=self.search_requests, search_listing_requests=self.search_listing_requests,
+                         search_listing_requests_needed=self.search_listing_requests_needed,
+                         api_calls_saved=api_calls_saved)
+        extra.update(database_writes=self.db.writer.write_count,
+                     database_write_transactions=self.db.writer.transaction_count)
         message = f'Finished\nRun Time: {dl_session.duration_display}\n' \
                   f'Download Count: {downloaded_content_count}\n' \
                   f'Downloaded Users: {significant_user_count}\n' \
                   f'Downloaded Subreddits: {significant_subreddit_count}\n' \
                   f'Post Count: {extracted_post_count}\n' \
                   f'Comment Count: {extracted_comment_count}\n'
+        if search_calls > 0:
+            if api_calls_saved >= 0:
+                message += f'Reddit Requests Saved By Search: {api_calls_saved}\n'
+            else:
+                message += f'Extra Reddit Requests Made By Search: {-api_calls_saved}\n'
         if self.stopped:
             extra.update(download_stopped=True)
             message = f'\nDownload stopped{message}'
@@ -1,9 +1,11 @@
 import os
 import requests
 import logging
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, Future
+from queue import Empty
+from threading import BoundedSemaphore
 
-from .runner import Runner, verify_run
+from .runner import Runner, TaskTracker, verify_run
 from .multipart_downloader import MultipartDownloader
 from .errors import Error
 from ..utils import injector, system_util, general_utils
@@ -25,7 +27,9 @@ class Downloader(Runner):
         """
         super().__init__(stop_run)
         self.logger = logging.getLogger(__name__)
-        self.download_queue = download_queue  # contains the id of content created elsewhere that is to be downloaded
+        # contains the ids of content created elsewhere that is to be downloaded, or futures that resolve to the ids of
+        # content that is still being added by the database writer
+        self.download_queue = download_queue
         self.download_session_id = download_session_id
         self.output_queue = injector.get_message_queue()
         self.db = injector.get_database_handler()
@@ -34,16 +38,16 @@ class Downloader(Runner):
         self.thread_count = self.settings_manager.download_thread_count
         self.executor = ThreadPoolExecutor(self.thread_count)
         self.multi_part_executor = ThreadPoolExecutor(8)
-        self.futures = []
-        self.hold = False
+        # limits how many downloads are handed to the executor at once so that the bounded download queue is not
+        # drained into the executor's unbounded internal work queue
+        self.executor_slots = BoundedSemaphore(self.thread_count * 2)
+        self.tasks = TaskTracker()
         self.hard_stop = False
         self.download_count = 0
 
     @property
     def running(self):
-        if self.hold:
-            return len(self.futures) > 0
-        return True
+        return not self.tasks.finished.is_set()
 
     def run(self):
         """
@@ -51,30 +55,56 @@ class Downloader(Runner):
         """
         self.logger.debug('Downloader running')
         while self.continue_run:
-            item = self.download_queue.get()
+            try:
+                item = self.download_queue.get(timeout=2)
+            except Empty:
+                continue
             if item is not None:
                 if item == 'HOLD':
-                    self.hold = True
+                    self.tasks.set_hold(True)
                 elif item == 'RELEASE_HOLD':
-                    self.hold = False
+                    self.tasks.set_hold(False)
                 else:
+                    if not self.acquire_executor_slot():
+                        break
+                    self.tasks.add()
                     future = self.executor.submit(self.download, content_id=item)
                     future.add_done_callback(self.remove_future)
-                    self.futures.append(future)
             else:
                 break
         self.executor.shutdown(wait=True)
         self.logger.debug('Downloader exiting')
 
+    def acquire_executor_slot(self):
+        """
+        Blocks until the executor has room for another download or the run is stopped.
+        :return: True if a slot was acquired, False if the run was stopped first.
+        """
+        while self.continue_run:
+            if self.executor_slots.acquire(timeout=1):
+                return True
+        return False
+
     def remove_future(self, future):
-        self.futures.remove(future)
+        self.tasks.remove(future)
+        self.executor_slots.release()
 
     @verify_run
     def download(self, content_id: int):
         """
         Connects to the content url and downloads the content item to the file path specified by the content item.
-        :param content_id: The id of the content item which is to be queried from the database, then downloaded.
+        :param content_id: The id of the content item which is to be queried from the database, then downloaded, or a
+                           future that is resolved with the id once the content has been committed.
         """
+        if isinstance(content_id, Future):
+            try:
+                # Future.result is called directly as the database writer's future hurries the writer, which would
+                # commit every content insert in its own transaction.  The insert is committed with its batch instead.
+                content_id = Future.result(content_id)
+            except Exception:
+                self.logger.error('Content was not downloaded because it failed to be added to the database',
+                                  exc_info=True)
+                return
         try:
             with self.db.get_scoped_session() as session:
                 content = session.query(Content).get(content_id)
@@ -0,0 +1,105 @@
+import time
+import heapq
+import random
+from itertools import count
+from threading import Condition
+
+from . import const
+from ..utils import injector
+
+
+class PerpetualScheduler:
+
+    """
+    Schedules the reddit objects in a perpetual download so that each one is checked for new posts at a rate matched to
+    how often it actually posts.  The time between an object's posts is tracked as an exponentially weighted moving
+    average (stored on the reddit object so that it survives restarts), and the object is next checked after half of
+    that interval, bounded by the settings manager's perpetual min and max poll intervals.  A small random jitter is
+    added so that objects added at the same time do not stay synchronized.
+
+    Scheduled objects are kept in a min-heap ordered by the time they are next due to be checked.
+    """
+
+    POLL_FRACTION = 0.5
+
+    def __init__(self):
+        self.settings_manager = injector.get_settings_manager()
+        self.condition = Condition()
+        self.heap = []
+        self.sequence = count()
+
+    def __len__(self):
+        with self.condition:
+            return len(self.heap)
+
+    def schedule(self, run_pair, reddit_object, post_times, previous_latest=None):
+        """
+        Updates the reddit object's post interval from the posts found during its last check and schedules its next
+        check.
+        :param run_pair: The RunPair that is returned by get_next when the object is due to be checked.
+        :param reddit_object: The reddit object that was checked.
+        :param post_times: The creation times, in epoch seconds, of the new posts found during the check.
+        :param previous_latest: The creation time, in epoch seconds, of the newest post known before the check.
+        :return: The number of seconds until the reddit object is next checked.
+        """
+        reddit_object.post_interval = self.calculate_post_interval(reddit_object.post_interval, post_times,
+                                                                   previous_latest)
+        delay = self.get_poll_delay(reddit_object.post_interval)
+        self.push(run_pair, delay)
+        return delay
+
+    def push(self, run_pair, delay):
+        with self.condition:
+            heapq.heappush(self.heap, (time.monotonic() + delay, next(self.sequence), run_pair))
+            self.condition.notify()
+
+    def get_next(self, timeout=1):
+        """
+        Returns the run pair of the next reddit object that is due to be checked, waiting up to the supplied timeout for
+        one to become due.
+        :return: The due run pair, or None if no object became due before the timeout.
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                if self.heap and self.heap[0][0] <= now:
+                    return heapq.heappop(self.heap)[2]
+                if now >= deadline:
+                    return None
+                wake_time = min(deadline, self.heap[0][0]) if self.heap else deadline
+                self.condition.wait(wake_time - now)
+
+    def calculate_post_interval(self, post_interval, post_times, previous_latest=None, now=None):
+        """
+        Returns the supplied post interval updated with the gaps between the supplied post times.  If no new posts were
+        found and the time since the last known post is already longer than the current interval, the interval is
+        lengthened toward that quiet time.
+        """
+        smoothing = self.settings_manager.perpetual_post_rate_smoothing
+        if previous_latest is not None and previous_latest <= const.FIRST_POST_EPOCH:
+            previous_latest = None  # the object has never been downloaded, so there is no real last post
+        last = previous_latest
+        for post_time in sorted(post_times):
+            if last is not None and post_time > last:
+                gap = post_time - last
+                post_interval = gap if post_interval is None else smoothing * gap + (1 - smoothing) * post_interval
+            last = post_time if last is None else max(last, post_time)
+        if not post_times and last is not None:
+            quiet_time = (now or time.time()) - last
+            if post_interval is None:
+                post_interval = quiet_time
+            elif quiet_time > post_interval:
+                post_interval = smoothing * quiet_time + (1 - smoothing) * post_interval
+        return post_interval
+
+    def get_poll_delay(self, post_interval):
+        """Returns the number of seconds to wait before checking an object with the supplied post interval again."""
+        min_interval = self.settings_manager.perpetual_min_poll_interval
+        max_interval = self.settings_manager.perpetual_max_poll_interval
+        if post_interval is None:
+            delay = min_interval
+        else:
+            delay = min(max(post_interval * self.POLL_FRACTION, min_interval), max_interval)
+        jitter = self.settings_manager.perpetual_poll_jitter
+        return delay * random.uniform(1 - jitter, 1 + jitter)
@@ -1,10 +1,14 @@
 import logging
+from datetime import datetime, timedelta
 from sqlalchemy import func
 
-from ..database.models import User, Subreddit, RedditObjectList
+from ..database.models import User, Subreddit, RedditObjectList, NameValidation
 from ..utils import injector, reddit_utils
 
 
+QUERY_CHUNK_SIZE = 500  # keeps the number of parameters in an IN query under sqlite's limit
+
+
 class RedditObjectCreator:
 
     def __init__(self, list_type):
@@ -23,6 +27,10 @@ class RedditObjectCreator:
             self.name_checker = reddit_utils.NameChecker(self.list_type)
         return self.name_checker
 
+    @property
+    def model(self):
+        return User if self.list_type == 'USER' else Subreddit
+
     def create_reddit_object(self, name, list_defaults):
         if self.list_type == 'USER':
             return self.create_user(name, list_defaults)
@@ -46,7 +54,7 @@ class RedditObjectCreator:
         with self.db.get_scoped_session() as session:
             user = session.query(User).filter(func.lower(User.name) == user_name.lower()).first()
             if user is None:
-                validation_set = self.get_name_checker().check_user_name(user_name)
+                validation_set = self.validate_names([user_name])[user_name.lower()]
                 if validation_set.valid:
                     list_defaults['significant'] = True
                     user = User(name=validation_set.name, date_created=validation_set.date_created, **list_defaults)
@@ -62,7 +70,7 @@ class RedditObjectCreator:
         with self.db.get_scoped_session() as session:
             subreddit = session.query(Subreddit).filter(func.lower(Subreddit.name) == sub_name.lower()).first()
             if subreddit is None:
-                validation_set = self.get_name_checker().check_subreddit_name(sub_name)
+                validation_set = self.validate_names([sub_name])[sub_name.lower()]
                 if validation_set.valid:
                     list_defaults['significant'] = True
                     subreddit = \
@@ -74,6 +82,112 @@ class RedditObjectCreator:
                 return subreddit.id, False
             return None
 
+    def create_reddit_objects(self, names, list_defaults):
+        """
+        Creates reddit objects for a batch of names, such as those imported from a file.  Names that already exist in
+        the database are found with one query per chunk of names instead of one query per name, and only the remaining
+        names are validated with reddit.  All new reddit objects are added to the database in a single commit.
+        :param names: The names of the reddit objects that are to be created.
+        :param list_defaults: A dict of default values to be used in the creation of the new reddit objects.
+        :return: A dict keyed by each unique supplied name (the first of any names that only differ in case) whose
+                 values are a tuple of the reddit object id and whether the object was created, as returned by
+                 create_user, or None if the name is not valid.
+        :type names: list
+        :type list_defaults: dict
+        :rtype: dict
+        """
+        unique_names = {}
+        for name in names:
+            unique_names.setdefault(name.lower(), name)
+        names = list(unique_names.values())
+        model = self.model
+        with self.db.get_scoped_session() as session:
+            existing = {}
+            for chunk in self.chunk(names):
+                for ro_id, name in session.query(model.id, model.name).filter(model.name.in_(chunk)):
+                    existing[name.lower()] = ro_id
+            validations = self.validate_names([name for name in names if name.lower() not in existing])
+            created = {}
+            defaults = dict(list_defaults, significant=True)
+            for key, validation_set in validations.items():
+                if validation_set.valid:
+                    reddit_object = model(name=validation_set.name, date_created=validation_set.date_created,
+                                          **defaults)
+                    session.add(reddit_object)
+                    created[key] = reddit_object
+            session.commit()
+            results = {}
+            for name in names:
+                key = name.lower()
+                if key in existing:
+                    results[name] = (existing[key], False)
+                elif key in created:
+                    results[name] = (created[key].id, True)
+                else:
+                    results[name] = None
+            return results
+
+    def validate_names(self, names):
+        """
+        Validates the supplied names with reddit.  Names that were checked within the number of hours set by the
+        settings manager's name_validation_cache_hours are taken from the stored results of that check instead.
+        :param names: The names that are to be validated.
+        :return: A dict of ValidationSets keyed by the lower case version of each supplied name.
+        """
+        if len(names) == 0:
+            return {}
+        results = self.get_cached_validations(names)
+        unchecked = [name for name in names if name.lower() not in results]
+        if len(unchecked) > 0:
+            checked = self.get_name_checker().check_names(unchecked)
+            self.cache_validations(checked)
+            results.update(checked)
+        return results
+
+    def get_cached_validations(self, names):
+        cache_hours = self.settings_manager.name_validation_cache_hours
+        if cache_hours <= 0:
+            return {}
+        cutoff = datetime.now() - timedelta(hours=cache_hours)
+        results = {}
+        with self.db.get_scoped_session() as session:
+            for chunk in self.chunk(names):
+                query = session.query(NameValidation) \
+                    .filter(NameValidation.object_type == self.list_type) \
+                    .filter(NameValidation.name.in_(chunk)) \
+                    .filter(NameValidation.validation_date > cutoff)
+                for validation in query:
+                    results[validation.name.lower()] = reddit_utils.ValidationSet(
+                        name=validation.actual_name, date_created=validation.date_created, valid=validation.valid)
+        return results
+
+    def cache_validations(self, validations):
+        """Stores the supplied validation results, except for names that could not be checked because of an error."""
+        validations = {key: value for key, value in validations.items() if not value.error}
+        if len(validations) == 0 or self.settings_manager.name_validation_cache_hours <= 0:
+            return
+        now = datetime.now()
+        with self.db.get_scoped_update_session() as session:
+            for chunk in self.chunk(list(validations.keys())):
+                session.query(NameValidation) \
+                    .filter(NameValidation.object_type == self.list_type) \
+                    .filter(NameValidation.name.in_(chunk)) \
+                    .delete(synchronize_session=False)
+            session.bulk_insert_mappings(NameValidation, [
+                {
+                    'object_type': self.list_type,
+                    'name': key,
+                    'actual_name': value.name,
+                    'date_created': value.date_created,
+                    'valid': value.valid,
+                    'validation_date': now,
+                } for key, value in validations.items()
+            ])
+
+    @staticmethod
+    def chunk(items):
+        return [items[i:i + QUERY_CHUNK_SIZE] for i in range(0, len(items), QUERY_CHUNK_SIZE)]
+
     def create_reddit_object_list(self, name, commit=True):
         with self.db.get_scoped_session() as session:
             exists = session.query(RedditObjectList.id)\
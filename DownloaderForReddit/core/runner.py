@@ -1,4 +1,6 @@
 from abc import ABC
+from queue import Full
+from threading import Lock, Event
 
 
 def verify_run(method):
@@ -14,6 +16,26 @@ def verify_run(method):
     return check
 
 
+def put_while_running(queue, item, stop_run, timeout=1):
+    """
+    Puts the supplied item into the supplied queue, blocking while the queue is full so that producers can not outrun
+    their consumers.  The stop_run event is checked between put attempts so that a producer blocked on a full queue is
+    released when the run is stopped.
+    :param queue: The queue that the item is to be put into.
+    :param item: The item that is to be put into the queue.
+    :param stop_run: The threading event that signals the run has been stopped.
+    :param timeout: The number of seconds to wait for space in the queue before checking the stop_run event again.
+    :return: True if the item was put into the queue, False if the run was stopped before space became available.
+    """
+    while not stop_run.is_set():
+        try:
+            queue.put(item, timeout=timeout)
+            return True
+        except Full:
+            pass
+    return False
+
+
 class Runner(ABC):
 
     def __init__(self, stop_run):
@@ -22,3 +44,44 @@ class Runner(ABC):
     @property
     def continue_run(self):
         return not self.stop_run.is_set()
+
+
+class TaskTracker:
+
+    """
+    Thread safe record of how many tasks a runner has handed to its executor that have not yet finished, and whether
+    the runner has been told to hold.  The finished event is set while the runner is holding with no tasks in flight so
+    that other threads can wait on the runner's work load to finish instead of polling it.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.count = 0
+        self.hold = False
+        self.finished = Event()
+
+    def add(self):
+        """Records a task that has been submitted to the executor."""
+        with self.lock:
+            self.count += 1
+            self.finished.clear()
+
+    def remove(self, future=None):
+        """
+        Records that a task has finished.  Accepts the finished future so that it can be used directly as a done
+        callback.
+        """
+        with self.lock:
+            self.count -= 1
+            self.update_finished()
+
+    def set_hold(self, hold):
+        with self.lock:
+            self.hold = hold
+            self.update_finished()
+
+    def update_finished(self):
+        if self.hold and self.count == 0:
+            self.finished.set()
+        else:
+            self.finished.clear()
@@ -5,16 +5,17 @@ from praw.models import Submission
 from sqlalchemy.orm.session import Session
 from bs4 import BeautifulSoup, SoupStrainer
 
-from .runner import Runner, verify_run
+from .runner import Runner, verify_run, put_while_running
 from .comment_handler import CommentHandler
 from .errors import Error
 from . import const
 from ..database.models import Post
-from ..extractors.base_extractor import BaseExtractor
+from ..extractors import extractor_registry
 from ..extractors.direct_extractor import DirectExtractor
 from ..extractors.self_post_extractor import SelfPostExtractor
 from ..extractors.comment_extractor import CommentExtractor
 from ..messaging.message import Message
+from ..utils import injector
 
 
 class SubmissionHandler(Runner):
@@ -28,6 +29,7 @@ class SubmissionHandler(Runner):
         self.download_session_id = download_session_id
         self.session = session
         self.download_queue = download_queue
+        self.writer = injector.get_database_handler().writer
 
         self.content = []
 
@@ -47,7 +49,8 @@ class SubmissionHandler(Runner):
         significant_ro = self.post.significant_reddit_object
         if significant_ro.download_self_post_text:
             try:
-                extractor = SelfPostExtractor(self.post, download_session_id=self.download_session_id)
+                extractor = SelfPostExtractor(self.post, download_session_id=self.download_session_id,
+                                              writer=self.writer)
                 self.finish_extractor(extractor)
                 if self.post.significant_reddit_object.extract_self_post_links:
                     self.extract_text_links(self.post.text_html)
@@ -90,7 +93,8 @@ class SubmissionHandler(Runner):
     def extract_link(self, url, text_link_extraction=False, **kwargs):
         try:
             extractor_class = self.assign_extractor(url)
-            extractor = extractor_class(self.post, url=url, submission=self.submission, **kwargs)
+            extractor = extractor_class(self.post, url=url, submission=self.submission,
+                                        content_callback=self.queue_content, writer=self.writer, **kwargs)
             self.finish_extractor(extractor, text_link_extraction=text_link_extraction)
         except Exception as e:
             self.handle_error(e)
@@ -111,15 +115,26 @@ class SubmissionHandler(Runner):
                     else:
                         comment.set_extraction_failed(Error.TEXT_LINK_FAILURE,
                                                       'Failed to extract links from comment text')
-            for content in extractor.extracted_content:
-                self.download_queue.put(content.id)
+            if extractor.content_callback is None:
+                # content from extractors that were not given the callback is queued once extraction is complete
+                for content in extractor.extracted_content:
+                    self.queue_content(content, extractor.content_id_futures[content])
+
+    def queue_content(self, content, content_id):
+        """
+        Sends the supplied content item to the download queue.  Extractors call this as each content item is created so
+        that the first items of an album begin downloading while the rest of the album is still being extracted.
+        :param content: The content item that is to be downloaded.
+        :param content_id: The future of the content's id, which is resolved once the database writer commits the
+                           content.  The downloader waits for it, so extraction does not have to.
+        """
+        put_while_running(self.download_queue, content_id, self.stop_run)
 
     @verify_run
     def assign_extractor(self, url):
-        for extractor in BaseExtractor.__subclasses__():
-            key = extractor.get_url_key()
-            if key is not None and any(x in url.lower() for x in key):
-                return extractor
+        extractor = extractor_registry.get_extractor(url)
+        if extractor is not None:
+            return extractor
         if url.lower().endswith(const.ALL_EXT):
             return DirectExtractor
         return None
@@ -1,5 +1,6 @@
 import logging
 from datetime import datetime
+from threading import Lock
 from typing import Optional, Union
 from sqlalchemy.orm.session import Session
 from praw.models import Submission, Comment as PrawComment
@@ -12,6 +13,13 @@ class SubmittableCreator:
 
     logger = logging.getLogger(f'DownloaderForReddit.{__name__}')
     db = None
+    # Maps (model, lowercase name) to the id of the matching reddit object row.  Shared by every extraction thread so
+    # that authors and subreddits which repeat across submissions and comments are only looked up once per session.
+    reddit_object_id_cache = {}
+    cache_lock = Lock()
+    # Maps (model, lowercase name) to a lock held while a name that is not cached is looked up or created.  Only threads
+    # looking up the same name wait for each other, so no thread waits on the cache lock during a database query.
+    name_locks = {}
 
     @classmethod
     def get_db(cls):
@@ -19,13 +27,22 @@ class SubmittableCreator:
             cls.db = injector.get_database_handler()
         return cls.db
 
+    @classmethod
+    def clear_cache(cls):
+        """
+        Clears the reddit object id cache.  Should be called at the start of each download session so that ids of reddit
+        objects which have been deleted since the last session are not reused.
+        """
+        with cls.cache_lock:
+            cls.reddit_object_id_cache.clear()
+
     @classmethod
     def create_post(cls, submission: Submission, significant_id: int, session: Session, download_session_id: int) \
             -> Optional[Post]:
         post = None
         if cls.check_duplicate_post_url(submission.url, session):
-            author = cls.get_author(submission, session)
-            subreddit = cls.get_subreddit(submission, session)
+            author_id = cls.get_author(submission, session)
+            subreddit_id = cls.get_subreddit(submission, session)
 
             post = Post(
                 title=submission.title,
@@ -39,8 +56,8 @@ class SubmittableCreator:
                 text=submission.selftext if submission.selftext != '' else None,
                 text_html=submission.selftext_html,
                 extraction_date=datetime.now(),
-                author=author,
-                subreddit=subreddit,
+                author_id=author_id,
+                subreddit_id=subreddit_id,
                 download_session_id=download_session_id,
                 significant_reddit_object_id=significant_id
             )
@@ -56,47 +73,103 @@ class SubmittableCreator:
     def create_comment(cls, praw_comment: PrawComment, post: Post, session: Session, download_session_id: int,
                        parent_comment_id: Optional[int] = None):
         if cls.check_duplicate_comment(praw_comment.id, session):
-            author = cls.get_author(praw_comment, session)
-            subreddit = cls.get_subreddit(praw_comment, session)
-            comment = Comment(
-                author=author,
-                subreddit=subreddit,
-                post=post,
-                reddit_id=praw_comment.id,
-                body=praw_comment.body,
-                body_html=praw_comment.body_html,
-                score=praw_comment.score,
-                date_posted=datetime.fromtimestamp(praw_comment.created),
-                parent_id=parent_comment_id,
-                download_session_id=download_session_id
-            )
+            comment = cls.make_comment(praw_comment, post, session, download_session_id, parent_comment_id)
             session.add(comment)
             session.commit()
             return comment
         return None
 
+    @classmethod
+    def make_comment(cls, praw_comment: PrawComment, post: Post, session: Session, download_session_id: int,
+                     parent_comment_id: Optional[int] = None, author_id: Optional[int] = None,
+                     subreddit_id: Optional[int] = None) -> Comment:
+        """
+        Builds a Comment from the supplied praw comment without adding it to the session, so that callers can add a
+        group of comments to the database at once.  Duplicates are not checked for.  The comment references the post
+        by id rather than through the relationship, which would cascade it into the post's session.  A pending comment
+        in the session would be flushed by the next reddit object lookup and hold the database write lock while
+        create_reddit_object commits a new author or subreddit from its own session.
+        :param author_id: The id of the comment's author if it has already been looked up.
+        :param subreddit_id: The id of the comment's subreddit if it has already been looked up.
+        """
+        return Comment(
+            author_id=author_id if author_id is not None else cls.get_author(praw_comment, session),
+            subreddit_id=subreddit_id if subreddit_id is not None else cls.get_subreddit(praw_comment, session),
+            post_id=post.id,
+            reddit_id=praw_comment.id,
+            body=praw_comment.body,
+            body_html=praw_comment.body_html,
+            score=praw_comment.score,
+            date_posted=datetime.fromtimestamp(praw_comment.created),
+            parent_id=parent_comment_id,
+            download_session_id=download_session_id
+        )
+
     @classmethod
     def check_duplicate_comment(cls, praw_comment_id: str, session: Session):
         return session.query(Comment).filter(Comment.reddit_id == praw_comment_id).scalar() is None
 
     @classmethod
-    def get_author(cls, praw_object: Union[Submission, PrawComment], session: Session):
+    def get_author(cls, praw_object: Union[Submission, PrawComment], session: Session) -> int:
         try:
-            defaults = {}
-            author = cls.get_db().get_or_create(User, name=praw_object.author.name, defaults=defaults,
-                                                session=session)[0]
+            name = praw_object.author.name
         except AttributeError:
             cls.logger.error('Failed to get author', exc_info=True)
-            author = cls.get_db().get_or_create(User, name='deleted', session=session)[0]
-        return author
+            name = 'deleted'
+        return cls.get_reddit_object_id(User, name, session)
 
     @classmethod
-    def get_subreddit(cls, praw_object: Union[Submission, PrawComment], session: Session):
+    def get_subreddit(cls, praw_object: Union[Submission, PrawComment], session: Session) -> int:
         try:
-            defaults = {}
-            subreddit = cls.get_db().get_or_create(Subreddit, name=praw_object.subreddit.display_name,
-                                                   defaults=defaults, session=session)[0]
+            name = praw_object.subreddit.display_name
         except AttributeError:
             cls.logger.error('Failed to get subreddit', exc_info=True)
-            subreddit = cls.get_db().get_or_create(Subreddit, name='deleted', session=session)[0]
-        return subreddit
+            name = 'deleted'
+        return cls.get_reddit_object_id(Subreddit, name, session)
+
+    @classmethod
+    def get_reddit_object_id(cls, model, name: str, session: Session) -> int:
+        """
+        Returns the id of the reddit object of the supplied model type with the supplied name, creating the reddit
+        object if it does not yet exist.  Ids are cached so that the database is only queried the first time a name is
+        seen.  The cache lock is only held to read and store ids.  A name that is not cached is looked up and created
+        under a lock for that name, so that two extraction threads can not create duplicate reddit objects for it while
+        lookups of other names carry on.  The reddit object name is not unique in the database, so the creation can not
+        rely on an insert that ignores conflicts.
+        :param model: The reddit object model (User or Subreddit) that is to be found or created.
+        :param name: The name of the reddit object.
+        :param session: The session used to query for an existing reddit object.
+        :return: The id of the existing or newly created reddit object.
+        """
+        key = (model, name.lower())
+        with cls.cache_lock:
+            reddit_object_id = cls.reddit_object_id_cache.get(key)
+            if reddit_object_id is not None:
+                return reddit_object_id
+            name_lock = cls.name_locks.setdefault(key, Lock())
+        with name_lock:
+            with cls.cache_lock:
+                # another thread may have found or created the reddit object while this one waited for the name lock
+                reddit_object_id = cls.reddit_object_id_cache.get(key)
+            if reddit_object_id is None:
+                reddit_object_id = session.query(model.id).filter(model.name == name).first()
+                if reddit_object_id is not None:
+                    reddit_object_id = reddit_object_id[0]
+                else:
+                    reddit_object_id = cls.create_reddit_object(model, name)
+                with cls.cache_lock:
+                    cls.reddit_object_id_cache[key] = reddit_object_id
+                    cls.name_locks.pop(key, None)
+        return reddit_object_id
+
+    @classmethod
+    def create_reddit_object(cls, model, name: str) -> int:
+        """
+        Creates a new reddit object in its own session so that the callers session is not committed as a side effect.
+        :return: The id of the newly created reddit object.
+        """
+        with cls.get_db().get_scoped_update_session() as session:
+            reddit_object = model(name=name)
+            session.add(reddit_object)
+            session.flush()
+            return reddit_object.id
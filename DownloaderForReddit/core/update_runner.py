@@ -2,16 +2,24 @@ import logging
 from datetime import datetime
 from queue import Queue
 from threading import Thread, Event
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
 from PyQt5.QtCore import QObject, pyqtSignal
 
 from .submission_handler import SubmissionHandler
 from .downloader import Downloader
 from .runner import verify_run
 from ..database.models import DownloadSession, Post
+from ..database import statistics
 from ..utils import injector, reddit_utils
+from ..utils.rate_governor import rate_governor, Priority
 from ..messaging.message import Message
 
 
+INFO_BATCH_SIZE = 100  # max number of fullnames reddit accepts in one /api/info request
+PostScore = namedtuple('PostScore', 'id reddit_id score title')
+
+
 class UpdateRunner(QObject):
 
     """
@@ -37,13 +45,17 @@ class UpdateRunner(QObject):
         self.downloader = None
         self.download_queue = Queue(maxsize=-1)
         self.download_session_id = None
+        # reddit objects whose statistics include a post whose score was changed
+        self.score_reddit_object_ids = set()
 
     def run(self):
         self.logger.debug('Update runner starting')
-        if self.run_method == 'UPDATE_SCORES':
-            self.update_scores()
-        elif self.run_method == 'UPDATE_COMMENTS':
-            self.update_comments()
+        # updates are background work and should not slow down downloads that are running at the same time
+        with rate_governor.priority(Priority.LOW):
+            if self.run_method == 'UPDATE_SCORES':
+                self.update_scores()
+            elif self.run_method == 'UPDATE_COMMENTS':
+                self.update_comments()
         self.logger.debug('Update runner finished')
 
     def create_download_session(self):
@@ -62,6 +74,7 @@ class UpdateRunner(QObject):
         with self.db.get_scoped_update_session() as session:
             download_session = session.query(DownloadSession).get(self.download_session_id)
             download_session.end_time = datetime.now()
+            statistics.refresh_download_session_statistics(session, self.download_session_id)
 
     def get_post_ids(self):
         """
@@ -69,32 +82,82 @@ class UpdateRunner(QObject):
         """
         if self.post_id_list is None:
             with self.db.get_scoped_session() as session:
-                self.post_list = session.query(Post.id) \
-                    .filter(Post.significant_reddit_object_id.in_(self.reddit_object_id_list)).all()
+                self.post_id_list = [x.id for x in session.query(Post.id)
+                                     .filter(Post.significant_reddit_object_id.in_(self.reddit_object_id_list))]
 
     @verify_run
     def update_scores(self):
-        """Grabs the score for each post in the post_id_list and updates the post in the database with the new score."""
+        """
+        Updates the scores of the posts in the post_id_list with their current scores on reddit.  Scores are requested
+        from reddit in batches of up to 100 posts per /api/info request on a thread pool sized by the settings manager's
+        update_thread_count, with the pace of the requests set by the rate governor.  The posts whose scores changed are
+        updated in the database in a single bulk update per batch from this thread.
+        """
         self.get_post_ids()
-        for post_id in self.post_id_list:
-            self.extract_score(post_id)
+        fetch_scores = rate_governor.prioritize(self.fetch_scores)
+        checked_count = 0
+        changed_count = 0
+        failed_count = 0
+        with ThreadPoolExecutor(max_workers=self.settings_manager.update_thread_count) as executor:
+            futures = [(batch, executor.submit(fetch_scores, batch)) for batch in self.get_post_score_batches()]
+            for batch, future in futures:
+                if not self.continue_run:
+                    future.cancel()
+                    continue
+                try:
+                    scores = future.result()
+                except Exception:
+                    self.logger.error('Failed to get post scores', extra={'post_count': len(batch)}, exc_info=True)
+                    failed_count += len(batch)
+                    continue
+                checked_count += len(scores)
+                failed_count += len(batch) - len(scores)
+                changed_count += self.save_scores(batch, scores)
+        if len(self.score_reddit_object_ids) > 0:
+            with self.db.get_scoped_session() as session:
+                statistics.refresh_statistics(session, self.score_reddit_object_ids)
+        self.logger.info('Post scores updated', extra={'checked_count': checked_count, 'changed_count': changed_count,
+                                                       'failed_count': failed_count})
+        Message.send_info(f'Score update finished\n'
+                          f'    Checked: {checked_count}  |  Changed: {changed_count}  |  Failed: {failed_count}')
         self.finished.emit()
 
-    @verify_run
-    def extract_score(self, post_id):
-        with self.db.get_scoped_update_session() as session:
-            try:
-                post = session.query(Post).get(post_id)
-                submission = self.reddit_instance.submission(id=post.reddit_id)
-                old_score = post.score
-                post.score = submission.score
-                Message.send_info(f'{post.title} score updated\n'
-                                  f'    Old score: {old_score}  |  New Score: {post.score}')
-            except:
-                self.logger.error('Failed to update post', extra={'post_id': post.id, 'post_title': post.title,
-                                                                  'author': post.author.name,
-                                                                  'subreddit': post.subreddit.name}, exc_info=True)
-                Message.send_warning(f'Failed to update score for {post.title}')
+    def get_post_score_batches(self):
+        """Returns the posts in the post_id_list as lists of PostScore tuples of up to INFO_BATCH_SIZE posts."""
+        batches = []
+        with self.db.get_scoped_session() as session:
+            for i in range(0, len(self.post_id_list), INFO_BATCH_SIZE):
+                chunk = self.post_id_list[i:i + INFO_BATCH_SIZE]
+                batches.append([PostScore(*x) for x in session.query(Post.id, Post.reddit_id, Post.score, Post.title)
+                                .filter(Post.id.in_(chunk))])
+        return batches
+
+    def fetch_scores(self, batch):
+        """
+        Requests the current scores of the supplied posts from reddit in a single /api/info request.
+        :return: A dict of the current scores keyed by reddit id.  Posts that reddit did not return are not included.
+        """
+        fullnames = [f't3_{post.reddit_id}' for post in batch]
+        submissions = self.reddit_instance.info(fullnames=fullnames)
+        return {submission.id.lower(): submission.score for submission in submissions}
+
+    def save_scores(self, batch, scores):
+        """
+        Updates the posts in the supplied batch whose scores have changed with a single bulk update and reports the
+        changes to the user.
+        :return: The number of posts whose scores changed.
+        """
+        changes = [(post, scores[post.reddit_id.lower()]) for post in batch
+                   if scores.get(post.reddit_id.lower(), post.score) != post.score]
+        if changes:
+            with self.db.get_scoped_update_session() as session:
+                session.bulk_update_mappings(Post, [{'id': post.id, 'score': score} for post, score in changes])
+                self.score_reddit_object_ids.update(
+                    statistics.get_post_reddit_object_ids(session, [post.id for post, _ in changes]))
+            Message.send_info('\n'.join(f'{post.title} score updated\n'
+                                        f'    Old score: {post.score}  |  New Score: {score}'
+                                        for post, score in changes))
+        return len(changes)
 
     @verify_run
     def update_comments(self):
@@ -127,4 +190,5 @@ class UpdateRunner(QObject):
             submission_handler.extract_comments()
 
     def stop(self):
+        self.continue_run = False
         self.stop_run.set()
@@ -0,0 +1,53 @@
+from time import time
+from threading import Lock
+
+from ..utils import injector
+
+
+class ValidationCache:
+
+    """
+    Keeps track of the reddit objects that have recently been confirmed to exist on reddit so that they do not have to
+    be validated again at the start of every download session.  Entries expire after the number of hours set by the
+    settings manager's validation_cache_hours.  A value of 0 disables the cache.  The cache is only held in memory, so
+    it lasts for the life of the process and every object is validated again after the application is restarted.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.validated = {}
+
+    @staticmethod
+    def get_key(object_type, name):
+        return object_type, name.lower()
+
+    @property
+    def ttl(self):
+        return injector.get_settings_manager().validation_cache_hours * 3600
+
+    def is_valid(self, object_type, name):
+        """Returns True if the reddit object with the supplied type and name was validated within the cache ttl."""
+        key = self.get_key(object_type, name)
+        with self.lock:
+            validated_time = self.validated.get(key)
+            if validated_time is None:
+                return False
+            if time() - validated_time < self.ttl:
+                return True
+            del self.validated[key]
+            return False
+
+    def set_valid(self, object_type, name):
+        with self.lock:
+            self.validated[self.get_key(object_type, name)] = time()
+
+    def remove(self, object_type, name):
+        with self.lock:
+            self.validated.pop(self.get_key(object_type, name), None)
+
+    def clear(self):
+        with self.lock:
+            self.validated.clear()
+
+
+validation_cache = ValidationCache()
@@ -1,30 +1,97 @@
 import os
+import logging
 from contextlib import contextmanager
 import sqlite3
 from sqlalchemy.ext.declarative import declarative_base
 import sqlalchemy
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker
 
+from .database_writer import DatabaseWriter
 from ..core import const
-from ..utils import system_util
+from ..utils import system_util, injector
+
+
+logger = logging.getLogger(f'DownloaderForReddit.{__name__}')
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+TEMP_STORES = ('DEFAULT', 'FILE', 'MEMORY')
+
+
+def get_connection_pragmas(settings_manager):
+    """
+    Returns the sqlite pragmas that are set on each new database connection from the settings manager's sqlite
+    settings.  Settings with values that sqlite does not accept are left at sqlite's default and logged.
+    :return: A list of (pragma, value) tuples in the order they are to be set.
+    """
+    pragmas = []
+    for pragma, value, choices in (
+            ('journal_mode', settings_manager.sqlite_journal_mode, JOURNAL_MODES),
+            ('synchronous', settings_manager.sqlite_synchronous, SYNCHRONOUS_MODES),
+            ('temp_store', settings_manager.sqlite_temp_store, TEMP_STORES),
+    ):
+        if str(value).upper() in choices:
+            pragmas.append((pragma, str(value).upper()))
+        else:
+            logger.warning('Invalid sqlite setting ignored', extra={'pragma': pragma, 'value': value})
+    for pragma, value in (
+            ('cache_size', settings_manager.sqlite_cache_size_kb),
+            ('mmap_size', settings_manager.sqlite_mmap_size),
+            ('busy_timeout', settings_manager.sqlite_busy_timeout),
+    ):
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            logger.warning('Invalid sqlite setting ignored', extra={'pragma': pragma, 'value': value})
+            continue
+        # a negative cache size is read by sqlite as a number of KiB instead of a number of pages
+        pragmas.append((pragma, -abs(value) if pragma == 'cache_size' else value))
+    return pragmas
 
 
 class DatabaseHandler:
 
     base = declarative_base()
 
-    def __init__(self, *, in_memory=False):
-        self.database_path = os.path.join(system_util.get_data_directory(), const.DATABASE_NAME)
+    def __init__(self, *, in_memory=False, pragmas=None, database_path=None):
+        """
+        :param in_memory: If True, an empty in memory database is used instead of the database file.
+        :param database_path: The path of the database file.  Defaults to the database in the application's data
+                              directory.
+        :param pragmas: A list of (pragma, value) tuples that are set on each new connection.  If not supplied, the
+                        pragmas are taken from the settings manager for the database file and none are set for an in
+                        memory database.
+        """
+        self.database_path = database_path or os.path.join(system_util.get_data_directory(), const.DATABASE_NAME)
         self.database_url = f'sqlite:///{self.database_path}'
+        self.in_memory = in_memory
         if not in_memory:
+            settings_manager = injector.get_settings_manager()
             self.engine = sqlalchemy.create_engine(self.database_url, echo=False,
                                                    connect_args={'check_same_thread': False})
+            if pragmas is None:
+                pragmas = get_connection_pragmas(settings_manager)
+            self.writer = DatabaseWriter(self, settings_manager.database_writer_batch_size,
+                                         settings_manager.database_writer_max_delay_ms)
         else:
             self.engine = sqlalchemy.create_engine('sqlite:///:memory:')
+            self.writer = DatabaseWriter(self, inline=True)
+        self.pragmas = pragmas or []
+        if self.pragmas:
+            event.listen(self.engine, 'connect', self.set_connection_pragmas)
         self.base.metadata.create_all(self.engine)
 
         self.Session = sessionmaker(bind=self.engine)
 
+    def set_connection_pragmas(self, dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in self.pragmas:
+                cursor.execute(f'PRAGMA {pragma}={value}')
+        finally:
+            cursor.close()
+
     def get_session(self):
         """Returns a new instance of a database session."""
         return self.Session()
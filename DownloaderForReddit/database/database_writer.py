@@ -0,0 +1,163 @@
+import time
+import atexit
+import logging
+from collections import deque
+from concurrent.futures import Future
+from threading import Thread, Condition
+
+
+logger = logging.getLogger(f'DownloaderForReddit.{__name__}')
+
+
+def update_row(session, model, object_id, values):
+    session.query(model).filter(model.id == object_id).update(values, synchronize_session=False)
+
+
+def insert_row(session, obj):
+    session.add(obj)
+    session.flush()
+    return obj.id
+
+
+class WriteFuture(Future):
+
+    """
+    The future returned for a queued write.  Waiting on the result asks the writer to commit the batch that the write
+    is in without waiting for the batch to fill, so a caller that needs the result is never held up by the batch delay.
+    """
+
+    def __init__(self, writer):
+        super().__init__()
+        self.writer = writer
+
+    def result(self, timeout=None):
+        if not self.done():
+            self.writer.hurry()
+        return super().result(timeout)
+
+
+class DatabaseWriter:
+
+    """
+    Commits database writes from the extraction and download threads on a single thread.  Writes are queued as
+    operations that are called with the writer's session and are committed in groups, either when the batch size is
+    reached, when the oldest queued write has waited the max delay, or as soon as a caller waits on a write's future.
+    If a group fails to commit, its operations are committed again one at a time so that a single bad write does not
+    lose the writes queued with it.
+
+    Futures are resolved with the return value of their operation once it is committed.  Objects that are written are
+    detached from the writer's session with their attributes loaded, so only their column values may be used afterwards.
+    """
+
+    def __init__(self, db, batch_size=500, max_delay_ms=20, inline=False):
+        """
+        :param db: The database handler whose sessions the writes are made with.
+        :param batch_size: The max number of writes that are committed together.
+        :param max_delay_ms: The max number of milliseconds that a write waits for the rest of its batch.
+        :param inline: If True, each write is committed on the calling thread as soon as it is submitted.  This is
+                       used for in memory databases, which can only be used from the thread that made them.
+        """
+        self.db = db
+        self.batch_size = max(int(batch_size), 1)
+        self.max_delay = max(float(max_delay_ms), 0) / 1000
+        self.inline = inline
+        self.pending = deque()
+        self.condition = Condition()
+        self.hurried = False
+        self.stopped = False
+        self.thread = None
+        self.transaction_count = 0
+        self.write_count = 0
+
+    def submit(self, operation, *args, **kwargs):
+        """
+        Queues the supplied operation to be called with the writer's session and committed with the current batch.
+        :param operation: A callable that takes a session followed by the supplied args and kwargs.
+        :return: A future that is resolved with the operation's return value once the operation is committed.
+        """
+        future = WriteFuture(self)
+        item = (future, operation, args, kwargs)
+        with self.condition:
+            if not self.inline and not self.stopped:
+                if self.thread is None:
+                    self.start()
+                self.pending.append(item)
+                if len(self.pending) >= self.batch_size:
+                    self.condition.notify()
+                return future
+        self.write_batch([item])
+        return future
+
+    def update(self, model, object_id, values):
+        """Queues an update of the supplied column values on the row of the supplied model with the supplied id."""
+        return self.submit(update_row, model, object_id, values)
+
+    def insert(self, obj):
+        """Queues the supplied object to be added to the database.  The future is resolved with the new object's id."""
+        return self.submit(insert_row, obj)
+
+    def flush(self):
+        """Commits all of the writes that have been queued so far and waits for them to be committed."""
+        self.submit(lambda session: None).result()
+
+    def hurry(self):
+        with self.condition:
+            self.hurried = True
+            self.condition.notify()
+
+    def start(self):
+        self.thread = Thread(target=self.run, name='DatabaseWriter', daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Commits the writes that are still queued and stops the writer thread.  Later writes are made inline."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while len(self.pending) == 0 and not self.stopped:
+                    self.condition.wait()
+                if len(self.pending) == 0:
+                    return
+                deadline = time.monotonic() + self.max_delay
+                while len(self.pending) < self.batch_size and not self.hurried and not self.stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                self.hurried = False
+                batch = [self.pending.popleft() for _ in range(min(len(self.pending), self.batch_size))]
+            self.write_batch(batch)
+
+    def write_batch(self, batch):
+        error = None
+        session = self.db.get_session()
+        session.expire_on_commit = False
+        try:
+            results = [operation(session, *args, **kwargs) for _, operation, args, kwargs in batch]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            error = e
+        finally:
+            session.close()
+        if error is None:
+            self.transaction_count += 1
+            self.write_count += len(batch)
+            for (future, *_), result in zip(batch, results):
+                future.set_result(result)
+        elif len(batch) == 1:
+            logger.error('Failed to write to database', extra={'operation': batch[0][1].__name__},
+                         exc_info=(type(error), error, error.__traceback__))
+            batch[0][0].set_exception(error)
+        else:
+            logger.warning('Failed to commit batch of database writes, writing individually',
+                           extra={'batch_size': len(batch), 'error': str(error)})
+            for item in batch:
+                self.write_batch([item])
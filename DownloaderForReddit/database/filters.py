@@ -1,12 +1,13 @@
 import traceback
 from abc import ABC
 from sqlalchemy.sql import func
-from sqlalchemy import or_
+from sqlalchemy import or_, and_
 from sqlalchemy import desc as descending
 from sqlalchemy import Integer, String, DateTime, Enum
+from sqlalchemy.orm import aliased
 
 from .models import (RedditObjectList, RedditObject, User, Subreddit, DownloadSession, Post, Content, Comment,
-                     ListAssociation)
+                     ListAssociation, RedditObjectStatistics, DownloadSessionStatistics)
 from .model_enums import NsfwFilter
 
 
@@ -37,6 +38,7 @@ class Filter(ABC):
     choices = {}
 
     session = None
+    keyset = None
 
     @classmethod
     def get_filter_fields(cls):
@@ -77,7 +79,7 @@ class Filter(ABC):
         for tup in filters:
             key, operator, value = tup
             attr = getattr(self.model, key, None)
-            if not attr:
+            if attr is None or isinstance(attr, property):
                 query = self.custom_filter(query, key, operator, value)
                 continue
             if operator == 'in':
@@ -100,10 +102,12 @@ class Filter(ABC):
                 query, order_by = self.custom_filter_map[order].order_method(query)
             except KeyError:
                 print('key error')
-                order_by = self.default_order
+                order_by = getattr(self.model, self.default_order)
+        self.keyset = Keyset(self.model, order_by, desc)
+        # the id breaks ties between rows with the same order value so that the order is stable between pages
         if desc:
-            order_by = descending(order_by)
-        return query.order_by(order_by)
+            return query.order_by(descending(order_by), descending(self.model.id))
+        return query.order_by(order_by, self.model.id)
 
     def custom_filter(self, query, attr, operator, value):
         try:
@@ -167,15 +171,17 @@ class RedditObjectListFilter(Filter):
             .group_by(ListAssociation.reddit_object_list_id).subquery()
 
     def get_post_count_sub(self):
-        return self.session.query(ListAssociation.reddit_object_list_id, Post.significant_reddit_object_id,
-                                  func.count(Post.id).label('post_count')) \
-            .join(Post, Post.significant_reddit_object_id == ListAssociation.reddit_object_id) \
+        return self.session.query(ListAssociation.reddit_object_list_id,
+                                  func.sum(RedditObjectStatistics.post_count).label('post_count')) \
+            .join(RedditObjectStatistics,
+                  RedditObjectStatistics.reddit_object_id == ListAssociation.reddit_object_id) \
             .group_by(ListAssociation.reddit_object_list_id).subquery()
 
     def get_total_score_sub(self):
-        return self.session.query(ListAssociation.reddit_object_list_id, Post.significant_reddit_object_id,
-                                  func.sum(Post.score).label('total_score')) \
-            .join(Post, Post.significant_reddit_object_id == ListAssociation.reddit_object_id) \
+        return self.session.query(ListAssociation.reddit_object_list_id,
+                                  func.sum(RedditObjectStatistics.significant_score).label('total_score')) \
+            .join(RedditObjectStatistics,
+                  RedditObjectStatistics.reddit_object_id == ListAssociation.reddit_object_id) \
             .group_by(ListAssociation.reddit_object_list_id).subquery()
 
     def join_query(self, query, sub):
@@ -239,85 +245,47 @@ class RedditObjectFilter(Filter):
             'list_count': CustomItem(self.filter_list_count, self.order_by_list_count, Integer),
         }
 
-    def get_score_sum_sub(self):
-        return self.session.query(Post.significant_reddit_object_id, func.sum(Post.score).label('total_score')) \
-            .group_by(Post.significant_reddit_object_id).subquery()
-
-    def get_post_count_sub(self):
-        return self.session.query(Post.significant_reddit_object_id, func.count(Post.id).label('post_count')) \
-            .group_by(Post.significant_reddit_object_id).subquery()
-
-    def get_comment_score_sub(self):
-        return self.session.query(Post.significant_reddit_object_id, func.sum(Comment.score).label('total_score')) \
-            .join(Post).group_by(Post.significant_reddit_object_id).subquery()
-
-    def get_comment_count_sub(self):
-        return self.session.query(Post.significant_reddit_object_id, func.count(Comment.id).label('comment_count')) \
-            .join(Post).group_by(Post.significant_reddit_object_id).subquery()
-
-    def get_content_count_sub(self):
-        return self.session.query(Post.significant_reddit_object_id, func.count(Content.id).label('content_count')) \
-            .join(Post).group_by(Post.significant_reddit_object_id).subquery()
-
-    def get_download_count_sub(self):
-        return self.session.query(Post.significant_reddit_object_id,
-                                  func.count(Post.download_session_id.distinct()).label('dl_count')) \
-            .group_by(Post.significant_reddit_object_id).subquery()
-
-    def get_last_post_date_sub(self):
-        return self.session.query(Post.significant_reddit_object_id,
-                                  func.max(Post.date_posted).label('last_post_date')) \
-            .group_by(Post.significant_reddit_object_id).subquery()
-
     def get_list_count_sub(self):
         return self.session.query(ListAssociation.reddit_object_id,
                                   func.count(ListAssociation.reddit_object_list_id.distinct()).label('list_count'))\
                .group_by(ListAssociation.reddit_object_id).subquery()
 
-    def join_queries(self, query, sub):
-        return query.outerjoin(sub, RedditObject.id == sub.c.significant_reddit_object_id)
+    def join_statistics(self, query):
+        """
+        Joins the reddit object statistics table, which holds the post aggregates that the reddit objects are filtered
+        and sorted by.  The table is aliased so that it can be joined once for each filter and the sort.
+        """
+        statistics = aliased(RedditObjectStatistics)
+        return query.outerjoin(statistics, statistics.reddit_object_id == RedditObject.id), statistics
+
+    def filter_statistic(self, query, column, operator, value):
+        query, statistics = self.join_statistics(query)
+        return query.filter(self.op_map[operator](getattr(statistics, column), value))
+
+    def order_by_statistic(self, query, column):
+        query, statistics = self.join_statistics(query)
+        return query, getattr(statistics, column)
 
     def filter_post_score(self, query, operator, value):
-        sub = self.get_score_sum_sub()
-        f = self.op_map[operator](sub.c.total_score, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
+        return self.filter_statistic(query, 'significant_score', operator, value)
 
     def filter_post_count(self, query, operator, value):
-        sub = self.get_post_count_sub()
-        f = self.op_map[operator](sub.c.post_count, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
+        return self.filter_statistic(query, 'post_count', operator, value)
 
     def filter_comment_score(self, query, operator, value):
-        sub = self.get_comment_score_sub()
-        f = self.op_map[operator](sub.c.total_score, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
+        return self.filter_statistic(query, 'significant_comment_score', operator, value)
 
     def filter_comment_count(self, query, operator, value):
-        sub = self.get_comment_count_sub()
-        f = self.op_map[operator](sub.c.comment_count, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
+        return self.filter_statistic(query, 'significant_comment_count', operator, value)
 
     def filter_content_count(self, query, operator, value):
-        sub = self.get_content_count_sub()
-        f = self.op_map[operator](sub.c.content_count, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
+        return self.filter_statistic(query, 'significant_content_count', operator, value)
 
     def filter_download_count(self, query, operator, value):
-        sub = self.get_download_count_sub()
-        f = self.op_map[operator](sub.c.dl_count, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
+        return self.filter_statistic(query, 'download_count', operator, value)
 
     def filter_last_post_date(self, query, operator, value):
-        sub = self.get_last_post_date_sub()
-        f = self.op_map[operator](sub.c.last_post_date, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
+        return self.filter_statistic(query, 'last_post_date', operator, value)
 
     def filter_list_count(self, query, operator, value):
         sub = self.get_list_count_sub()
@@ -326,39 +294,25 @@ class RedditObjectFilter(Filter):
         return query
 
     def order_by_score(self, query):
-        sub = self.get_score_sum_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.total_score
+        return self.order_by_statistic(query, 'significant_score')
 
     def order_by_post_count(self, query):
-        sub = self.get_post_count_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.post_count
+        return self.order_by_statistic(query, 'post_count')
 
     def order_by_comment_score(self, query):
-        sub = self.get_comment_score_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.comment_score
+        return self.order_by_statistic(query, 'significant_comment_score')
 
     def order_by_comment_count(self, query):
-        sub = self.get_comment_count_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.comment_count
+        return self.order_by_statistic(query, 'significant_comment_count')
 
     def order_by_content_count(self, query):
-        sub = self.get_content_count_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.content_count
+        return self.order_by_statistic(query, 'significant_content_count')
 
     def order_by_download_count(self, query):
-        sub = self.get_download_count_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.dl_count
+        return self.order_by_statistic(query, 'download_count')
 
     def order_by_last_post_date(self, query):
-        sub = self.get_last_post_date_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.last_post_date
+        return self.order_by_statistic(query, 'last_post_date')
 
     def order_by_list_count(self, query):
         sub = self.get_list_count_sub()
@@ -388,104 +342,64 @@ class DownloadSessionFilter(Filter):
                                                Integer)
         }
 
-    def get_reddit_object_count_sub(self):
-        return self.session.query(Post.download_session_id,
-                                  func.count(Post.significant_reddit_object_id.distinct()).label('ro_count')) \
-            .group_by(Post.download_session_id).subquery()
-
-    def get_post_count_sub(self):
-        return self.session.query(Post.download_session_id, func.count(Post.id).label('post_count')) \
-            .group_by(Post.download_session_id).subquery()
-
-    def get_comment_count_sub(self):
-        return self.session.query(Comment.download_session_id, func.count(Comment.id).label('comment_count')) \
-            .group_by(Comment.download_session_id).subquery()
+    def join_statistics(self, query):
+        """
+        Joins the download session statistics table, which holds the counts that the download sessions are filtered
+        and sorted by.  The table is aliased so that it can be joined once for each filter and the sort.
+        """
+        statistics = aliased(DownloadSessionStatistics)
+        return query.outerjoin(statistics, statistics.download_session_id == DownloadSession.id), statistics
 
-    def get_content_count_sub(self):
-        return self.session.query(Content.download_session_id, func.count(Content.id).label('content_count')) \
-            .group_by(Content.download_session_id).subquery()
+    def filter_statistic(self, query, column, operator, value):
+        query, statistics = self.join_statistics(query)
+        return query.filter(self.op_map[operator](getattr(statistics, column), value))
 
-    def get_total_activity_sub(self):
-        return self.get_post_count_sub(), self.get_comment_count_sub(), self.get_content_count_sub()
+    def order_by_statistic(self, query, column):
+        query, statistics = self.join_statistics(query)
+        return query, getattr(statistics, column)
 
-    def join_queries(self, query, sub):
-        return query.outerjoin(sub, DownloadSession.id == sub.c.download_session_id)
+    @staticmethod
+    def get_total_activity(statistics):
+        return func.coalesce(statistics.post_count, 0) + func.coalesce(statistics.content_count, 0) + \
+               func.coalesce(statistics.comment_count, 0)
 
     def filter_reddit_object_count(self, query, operator, value):
-        sub = self.get_reddit_object_count_sub()
-        f = self.op_map[operator](sub.c.ro_count, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
+        return self.filter_statistic(query, 'reddit_object_count', operator, value)
 
     def filter_post_count(self, query, operator, value):
-        sub = self.get_post_count_sub()
-        f = self.op_map[operator](sub.c.post_count, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
+        return self.filter_statistic(query, 'post_count', operator, value)
 
     def filter_comment_count(self, query, operator, value):
-        sub = self.get_comment_count_sub()
-        f = self.op_map[operator](sub.c.comment_count, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
+        return self.filter_statistic(query, 'comment_count', operator, value)
 
     def filter_content_count(self, query, operator, value):
-        sub = self.get_content_count_sub()
-        f = self.op_map[operator](sub.c.content_count, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
+        return self.filter_statistic(query, 'content_count', operator, value)
 
     def filter_total_activity_count(self, query, operator, value):
-        post_sub, comment_sub, content_sub = self.get_total_activity_sub()
-        f = self.op_map[operator](
-            (func.coalesce(post_sub.c.post_count, 0) +
-             func.coalesce(content_sub.c.content_count, 0) +
-             func.coalesce(comment_sub.c.comment_count, 0)),
-            value
-        )
-        query = query \
-            .outerjoin(post_sub, post_sub.c.download_session_id == DownloadSession.id) \
-            .outerjoin(content_sub, content_sub.c.download_session_id == DownloadSession.id) \
-            .outerjoin(comment_sub, comment_sub.c.download_session_id == DownloadSession.id) \
-            .filter(f)
-        return query
+        query, statistics = self.join_statistics(query)
+        return query.filter(self.op_map[operator](self.get_total_activity(statistics), value))
 
     def order_by_reddit_object_count(self, query):
-        sub = self.get_reddit_object_count_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.ro_count
+        return self.order_by_statistic(query, 'reddit_object_count')
 
     def order_by_post_count(self, query):
-        sub = self.get_post_count_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.post_count
+        return self.order_by_statistic(query, 'post_count')
 
     def order_by_comment_count(self, query):
-        sub = self.get_comment_count_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.comment_count
+        return self.order_by_statistic(query, 'comment_count')
 
     def order_by_content_count(self, query):
-        sub = self.get_content_count_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.content_count
+        return self.order_by_statistic(query, 'content_count')
 
     def order_by_total_activity_count(self, query):
-        post_sub, comment_sub, content_sub = self.get_total_activity_sub()
-        query = query \
-            .outerjoin(post_sub, post_sub.c.download_session_id == DownloadSession.id) \
-            .outerjoin(content_sub, content_sub.c.download_session_id == DownloadSession.id) \
-            .outerjoin(comment_sub, comment_sub.c.download_session_id == DownloadSession.id)
-        return query, \
-               (func.coalesce(post_sub.c.post_count, 0) +
-                func.coalesce(content_sub.c.content_count, 0) +
-                func.coalesce(comment_sub.c.comment_count, 0)).label('total_activity')
+        query, statistics = self.join_statistics(query)
+        return query, self.get_total_activity(statistics).label('total_activity')
 
 
 class PostFilter(Filter):
     model = Post
     default_order = 'title'
-    include = ['all', 'author_name', 'subreddit_name', 'comment_count', 'content_count']
+    include = ['all', 'author_name', 'subreddit_name']
     exclude = ['author_id', 'subreddit_id', 'significant_reddit_object_id', 'download_session_id']
     filter_include = include
     filter_exclude = exclude
@@ -495,35 +409,10 @@ class PostFilter(Filter):
     def __init__(self):
         super().__init__()
         self.custom_filter_map = {
-            'comment_count': CustomItem(self.filter_comment_count, self.order_by_comment_count, Integer),
-            'content_count': CustomItem(self.filter_content_count, self.order_by_content_count, Integer),
             'author_name': CustomItem(self.filter_author_name, self.order_by_author_name, String),
             'subreddit_name': CustomItem(self.filter_subreddit_name, self.order_by_subreddit_name, String),
         }
 
-    def get_comment_count_sub(self):
-        return self.session.query(Comment.post_id, func.count(Comment.id).label('comment_count')) \
-            .group_by(Comment.post_id).subquery()
-
-    def get_content_count_sub(self):
-        return self.session.query(Content.post_id, func.count(Content.id).label('content_count')) \
-            .group_by(Content.post_id).subquery()
-
-    def join_queries(self, query, sub):
-        return query.outerjoin(sub, Post.id == sub.c.post_id)
-
-    def filter_comment_count(self, query, operator, value):
-        sub = self.get_comment_count_sub()
-        f = self.op_map[operator](sub.c.comment_count, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
-
-    def filter_content_count(self, query, operator, value):
-        sub = self.get_content_count_sub()
-        f = self.op_map[operator](sub.c.content_count, value)
-        query = self.join_queries(query, sub).filter(f)
-        return query
-
     def filter_author_name(self, query, operator, value):
         f = self.op_map[operator](User.name, value)
         return query.join(User, User.id == Post.author_id).filter(f)
@@ -540,16 +429,6 @@ class PostFilter(Filter):
         query = query.join(Subreddit, Subreddit.id == Post.subreddit_id)
         return query, Subreddit.name
 
-    def order_by_comment_count(self, query):
-        sub = self.get_comment_count_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.comment_count
-
-    def order_by_content_count(self, query):
-        sub = self.get_content_count_sub()
-        query = self.join_queries(query, sub)
-        return query, sub.c.content_count
-
 
 class CommentFilter(Filter):
     model = Comment
@@ -710,3 +589,44 @@ class CustomItem:
         self.order_method = order_method
         self.field_type = field_type
         self.choices = choices
+
+
+class Keyset:
+    """
+    The order that a filter applied to a query.  Pages of the query are selected by seeking past the order value and id
+    of the last row of the previous page, which the database can do from an index instead of reading and discarding
+    every row before the page as an offset does.
+    """
+
+    def __init__(self, model, order_column, desc=False):
+        self.model = model
+        self.order_column = order_column
+        self.desc = desc
+
+    def columns(self, query):
+        """Returns a query of the (id, order value) pairs of the supplied query's rows."""
+        return query.with_entities(self.model.id, self.order_column)
+
+    def get_key(self, row):
+        """Returns the key of a row returned by a query from the columns method."""
+        return row[-1], row[0]
+
+    def seek(self, query, key):
+        """
+        Restricts the supplied query to the rows that come after the row with the supplied key.  Sqlite sorts null
+        values before all other values, so nulls come first in ascending order and last in descending order.
+        :param key: An (order value, id) pair returned by get_key, or None for the first page.
+        """
+        if key is None:
+            return query
+        value, last_id = key
+        column = self.order_column
+        if self.desc:
+            after_id = self.model.id < last_id
+            if value is None:
+                return query.filter(column == None, after_id)
+            return query.filter(or_(column < value, column == None, and_(column == value, after_id)))
+        after_id = self.model.id > last_id
+        if value is None:
+            return query.filter(or_(column != None, and_(column == None, after_id)))
+        return query.filter(or_(column > value, and_(column == value, after_id)))
@@ -1,5 +1,7 @@
 import os
 import logging
+from time import time
+from threading import Thread
 from alembic import command
 from alembic.config import Config
 from alembic.script import ScriptDirectory
@@ -7,7 +9,9 @@ from sqlalchemy import desc
 from sqlalchemy.exc import OperationalError, IntegrityError
 
 from .models import Version
+from . import statistics
 from ..utils import injector, system_util
+from ..messaging.message import Message
 from .. import version
 
 
@@ -45,9 +49,35 @@ class Migrator:
                 self.session.commit()
                 self.logger.info(f'Migration not performed: no version information found in database.  Database entry'
                                  f'for version {version.__version__} has been created.')
+            self.build_statistics()
         finally:
             self.session.close()
 
+    def build_statistics(self):
+        """
+        Starts building the statistics tables that the database views sort and filter by if they are empty, which is
+        the case for databases created before the tables existed and after a migration that changes what they hold.
+        The build reads every post, content and comment row, so it is run on a background thread to not hold up the
+        start of the application on a large database.
+        """
+        if statistics.statistics_need_build(self.session):
+            Thread(target=self.run_statistics_build, name='StatisticsBuild', daemon=True).start()
+
+    def run_statistics_build(self):
+        Message.send_info('Building database statistics.  Sorting and filtering users, subreddits, posts and download '
+                          'sessions by their post, comment and content counts will be incomplete until it is finished.')
+        start_time = time()
+        try:
+            with self.db.get_scoped_session() as session:
+                statistics.build_statistics_if_empty(session)
+        except OperationalError:
+            self.logger.error('Failed to build database statistics', exc_info=True)
+            Message.send_error('Failed to build database statistics.  They can be rebuilt from the database '
+                               'statistics dialog.')
+            return
+        self.logger.info('Database statistics built', extra={'duration': round(time() - start_time, 2)})
+        Message.send_info('Database statistics built')
+
     def get_config(self):
         config = Config()
         alembic_path = os.path.abspath('alembic')
@@ -1,7 +1,14 @@
-import math
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 
 from ..utils import injector, system_util
+from ..messaging.message import Message
 from .models import Post, Content, Comment, ListAssociation
+from . import statistics
+
+
+logger = logging.getLogger(f'DownloaderForReddit.{__name__}')
 
 
 def check_session(method):
@@ -21,6 +28,8 @@ class ModelManger:
     Manages the deletion of database objects and their related models and respective files.
     """
 
+    BATCH_SIZE = 500
+
     @classmethod
     @check_session
     def delete_list(cls, ro_list, session=None, cascade=False):
@@ -33,65 +42,186 @@ class ModelManger:
     @classmethod
     @check_session
     def delete_reddit_object(cls, reddit_object, session=None, delete_files=False):
+        """
+        Deletes the reddit object along with the posts it is significant to and their content and comments.
+        :return: The FileDeletion that is deleting the content files if delete_files is True, otherwise None.
+        """
         post_ids = session.query(Post.id).filter(Post.significant_reddit_object_id == reddit_object.id)
-        comment_ids = session.query(Comment.id).filter(Comment.post_id.in_(post_ids))
-        cls.bulk_delete(Comment, session, comment_ids)
-        files = []
-        if delete_files:
-            content = session.query(Content).filter(Content.post_id.in_(post_ids))
-            files = [c.get_full_file_path() for c in content]
-        content_ids = session.query(Content.id).filter(Content.post_id.in_(post_ids))
-        cls.bulk_delete(Content, session, content_ids)
-        cls.bulk_delete(Post, session, post_ids)
+        affected_ids = statistics.get_post_reddit_object_ids(session, post_ids) | {reddit_object.id}
+        download_session_ids = statistics.get_post_download_session_ids(session, post_ids)
+        file_deletion = FileDeletion(reddit_object.name) if delete_files else None
+        cls.delete_posts(session, file_deletion, Post.significant_reddit_object_id == reddit_object.id)
         session.query(ListAssociation).filter(ListAssociation.reddit_object_id == reddit_object.id).delete()
         session.delete(reddit_object)
         session.commit()
-        for file in files:
-            system_util.delete_file(file)
+        statistics.refresh_statistics(session, affected_ids, download_session_ids)
+        return file_deletion
 
     @classmethod
     @check_session
     def delete_post(cls, post, session=None, delete_files=False):
-        comments = session.query(Comment.id).filter(Comment.post_id == post.id)
-        cls.bulk_delete(Comment, session, comments)
-        files = []
-        if delete_files:
-            # First query full content model so that file paths can be retrieved.
-            content = session.query(Content).filter(Content.post_id == post.id)
-            files = [c.get_full_file_path() for c in content]
-        # Query content id's so that the query can be bulk deleted
-        content_ids = session.query(Content.id).filter(Content.post_id == post.id)
-        cls.bulk_delete(Content, session, content_ids)
-        session.delete(post)
-        for file in files:
-            system_util.delete_file(file)
-        session.commit()
+        affected_ids = statistics.get_post_reddit_object_ids(session, [post.id])
+        download_session_ids = statistics.get_post_download_session_ids(session, [post.id])
+        file_deletion = FileDeletion(post.title) if delete_files else None
+        cls.delete_posts(session, file_deletion, Post.id == post.id)
+        statistics.refresh_statistics(session, affected_ids, download_session_ids)
+        return file_deletion
 
     @classmethod
     @check_session
     def delete_content(cls, content, delete_post=False, session=None, delete_file=False):
+        post_ids = [content.post_id]
+        affected_ids = statistics.get_post_reddit_object_ids(session, post_ids) | \
+            {content.user_id, content.subreddit_id}
+        download_session_ids = statistics.get_post_download_session_ids(session, post_ids) | \
+            {content.download_session_id}
+        title, file_path = content.title, content.get_full_file_path()
         if delete_post:
             session.delete(content.post)
-        if delete_file:
-            system_util.delete_file(content.get_full_file_path())
         session.delete(content)
         session.commit()
+        statistics.refresh_statistics(session, affected_ids, download_session_ids, [] if delete_post else post_ids)
+        if delete_file:
+            file_deletion = FileDeletion(title)
+            file_deletion.add([file_path])
+            return file_deletion
+        return None
+
+    @classmethod
+    @check_session
+    def delete_comment(cls, comment, delete_post=False, session=None, delete_files=False):
+        """
+        Deletes the comment along with its replies and the content that was extracted from them.  If delete_post is
+        True, the post that the comment belongs to is deleted instead, which deletes all of the post's comments.
+        """
+        if delete_post:
+            return cls.delete_post(comment.post, session=session, delete_files=delete_files)
+        # the replies and their content belong to the same post, so its reddit objects and sessions cover all of them
+        post_ids = [comment.post_id]
+        affected_ids = statistics.get_post_reddit_object_ids(session, post_ids)
+        download_session_ids = statistics.get_post_download_session_ids(session, post_ids)
+        comment_ids = []
+        level = [comment.id]
+        while level:
+            comment_ids.extend(level)
+            level = [x for x, in session.query(Comment.id).filter(Comment.parent_id.in_(level))]
+        file_deletion = FileDeletion(f'comment {comment.reddit_id}') if delete_files else None
+        for i in range(0, len(comment_ids), cls.BATCH_SIZE):
+            batch = comment_ids[i:i + cls.BATCH_SIZE]
+            content_filter = Content.comment_id.in_(batch)
+            files = cls.get_file_paths(session, content_filter) if file_deletion is not None else []
+            cls.bulk_delete(Content, session, content_filter)
+            cls.bulk_delete(Comment, session, Comment.id.in_(batch))
+            session.commit()
+            if file_deletion is not None:
+                file_deletion.add(files)
+        statistics.refresh_statistics(session, affected_ids, download_session_ids, post_ids)
+        return file_deletion
+
+    @classmethod
+    def delete_posts(cls, session, file_deletion, *criterion):
+        """
+        Deletes the posts that match the supplied criterion, along with their content and comments, in batches of
+        posts with ascending ids.  Each batch is committed before the files of its content are handed to the file
+        deletion, so that no file is deleted for a database row that still exists.
+        :param file_deletion: The FileDeletion that deletes the content files, or None if the files are to be kept.
+        """
+        for post_ids in cls.get_id_batches(session, Post.id, *criterion):
+            content_filter = Content.post_id.in_(post_ids)
+            files = cls.get_file_paths(session, content_filter) if file_deletion is not None else []
+            cls.bulk_delete(Comment, session, Comment.post_id.in_(post_ids))
+            cls.bulk_delete(Content, session, content_filter)
+            cls.bulk_delete(Post, session, Post.id.in_(post_ids))
+            session.commit()
+            if file_deletion is not None:
+                file_deletion.add(files)
 
     @classmethod
-    def bulk_delete(cls, model, session, query):
+    def get_id_batches(cls, session, id_column, *criterion):
         """
-        This method is more convoluted than should be necessary, but sqlalchemy does not have adequate batch operation
-        handling for this purpose.  So the subquery method used below is the only way to bulk delete a query with a
-        limit, and a query with an offset and limit is the only way to delete a query which may contain more than 1,000
-        items.  So here we are.
-        :param model: The database model in the query which will be deleted.
-        :param session: The session that has been used for the supplied query.
-        :param query: The query containing the id's of the objects to be deleted.
+        Yields the ids of the rows that match the supplied criterion in ascending batches.  Each batch is selected from
+        after the last id of the previous batch, so rows that were deleted from earlier batches are never scanned
+        again and batches stay under sqlite's parameter limit.
         """
-        batch_count = math.ceil(query.count() / 999)
-        offset = 0
-        for batch in range(batch_count):
-            sub_query = query.offset(offset).limit(999).subquery()
-            batch_query = session.query(model).filter(model.id.in_(sub_query))
-            batch_query.delete(synchronize_session='fetch')
-            offset += 1000
+        last_id = None
+        while True:
+            query = session.query(id_column).filter(*criterion)
+            if last_id is not None:
+                query = query.filter(id_column > last_id)
+            ids = [x for x, in query.order_by(id_column).limit(cls.BATCH_SIZE)]
+            if not ids:
+                return
+            yield ids
+            last_id = ids[-1]
+
+    @classmethod
+    def get_file_paths(cls, session, *criterion):
+        """Returns the file paths of the content that matches the supplied criterion, streaming the content rows."""
+        content = session.query(Content).filter(*criterion).yield_per(cls.BATCH_SIZE)
+        return [c.get_full_file_path() for c in content]
+
+    @staticmethod
+    def bulk_delete(model, session, *criterion):
+        """
+        Deletes the rows of the supplied model that match the supplied criterion with a single delete statement.  The
+        criterion are expected to select a batch of rows by id so that the statement stays under sqlite's parameter
+        limit.
+        """
+        session.query(model).filter(*criterion).delete(synchronize_session='fetch')
+
+
+class FileDeletion:
+
+    """
+    Deletes the files of deleted content on a background thread pool so that the database rows can be deleted without
+    waiting on the file system.  Files are added in batches as the rows they belong to are deleted, and the progress
+    of the deletion is sent to the message queue as each batch is finished.
+    """
+
+    executor = ThreadPoolExecutor(max_workers=4)
+
+    def __init__(self, name, progress_callback=None):
+        """
+        :param name: The name of the deleted object that the files belonged to, used in progress messages.
+        :param progress_callback: An optional callable that is called with the number of files that have been
+                                  processed and the number of files that have been added after each batch.  It is
+                                  called from a pool thread.
+        """
+        self.name = name
+        self.progress_callback = progress_callback
+        self.lock = Lock()
+        self.file_count = 0
+        self.deleted_count = 0
+        self.failed_count = 0
+        self.futures = []
+
+    @property
+    def processed_count(self):
+        return self.deleted_count + self.failed_count
+
+    def add(self, file_paths):
+        if file_paths:
+            with self.lock:
+                self.file_count += len(file_paths)
+            self.futures.append(self.executor.submit(self.delete_files, file_paths))
+
+    def delete_files(self, file_paths):
+        deleted = 0
+        for path in file_paths:
+            try:
+                system_util.delete_file(path)
+                deleted += 1
+            except OSError:
+                logger.warning('Failed to delete file', extra={'file_path': path}, exc_info=True)
+        with self.lock:
+            self.deleted_count += deleted
+            self.failed_count += len(file_paths) - deleted
+            processed, total = self.processed_count, self.file_count
+        Message.send_info(f'Deleted {processed} of {total} files for {self.name}')
+        if self.progress_callback is not None:
+            self.progress_callback(processed, total)
+
+    def wait(self):
+        """Blocks until all of the files that have been added are processed."""
+        for future in self.futures:
+            future.result()
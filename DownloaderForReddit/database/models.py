@@ -1,6 +1,9 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, SmallInteger, String, Boolean, DateTime, ForeignKey, Text, Enum, event
+from concurrent.futures import Future
+from sqlalchemy import (Column, Integer, SmallInteger, String, Boolean, DateTime, ForeignKey, Text, Enum, Float,
+                        Index, event, inspect)
 from sqlalchemy.orm import relationship, backref
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.orm.session import Session
 from sqlalchemy.sql import func
 
@@ -24,6 +27,30 @@ class BaseModel(Base):
     def save(self):
         self.get_session().commit()
 
+    def write(self, **values):
+        """
+        Sets the supplied values on this object and queues them, along with any other changes to the object's columns
+        that have not been saved, to be committed by the database writer.  The changes are marked as saved in the
+        object's own session so that the session does not write them again.  An object that has not yet been added to
+        the database keeps its changes for the session that it is added with.
+        :return: A future that is resolved once the changes are committed.
+        """
+        for key, value in values.items():
+            setattr(self, key, value)
+        state = inspect(self)
+        if state.key is None:
+            future = Future()
+            future.set_result(None)
+            return future
+        changes = {}
+        for attr in state.mapper.column_attrs:
+            added = state.attrs[attr.key].history.added
+            if added:
+                changes[attr.key] = added[0]
+        for key, value in changes.items():
+            set_committed_value(self, key, value)
+        return injector.get_database_handler().writer.update(type(self), self.id, changes)
+
     def get_display_date(self, date_time):
         try:
             return general_utils.format_datetime(date_time)
@@ -260,6 +287,10 @@ class RedditObject(BaseModel):
     comment_save_structure = Column(String, default='%[post_author_name]/Comments/%[post_title]')
     custom_comment_save_path = Column(String, nullable=True)
     new = Column(Boolean, default=True)
+    # smoothed number of seconds between the object's posts, used to schedule checks during perpetual downloads
+    post_interval = Column(Float, nullable=True)
+    # fullname of the newest submission taken from the object's new listing, which the next download continues from
+    last_seen_fullname = Column(String, nullable=True)
     lists = relationship(RedditObjectList, secondary='reddit_object_list_association', lazy='dynamic')
 
     object_type = Column(String(15))
@@ -348,15 +379,24 @@ class RedditObject(BaseModel):
 
     @property
     def post_count(self):
-        return len(self.posts)
+        return self.count_related('posts')
 
     @property
     def content_count(self):
-        return len(self.content)
+        return self.count_related('content')
 
     @property
     def comment_count(self):
-        return len(self.comments)
+        return self.count_related('comments')
+
+    def count_related(self, relationship_name):
+        """
+        Counts the rows of one of the object's one to many relationships with a COUNT query on the relationship's
+        indexed foreign key column, instead of loading every related row to count the collection.
+        :param relationship_name: The name of the relationship, which is defined by the User and Subreddit subclasses.
+        """
+        (_, foreign_key), = getattr(type(self), relationship_name).property.local_remote_pairs
+        return self.get_session().query(func.count(foreign_key)).filter(foreign_key == self.id).scalar()
 
     @property
     def list_count(self):
@@ -427,6 +467,24 @@ class Subreddit(RedditObject):
     }
 
 
+class NameValidation(BaseModel):
+
+    """
+    The result of checking a user or subreddit name with reddit.  These are kept so that names that are added again,
+    such as when the same list is imported a second time, do not have to be checked with reddit again.
+    """
+
+    __tablename__ = 'name_validation'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    object_type = Column(String(15))
+    name = Column(String(collation='NOCASE'), index=True)
+    actual_name = Column(String, nullable=True)
+    date_created = Column(DateTime, nullable=True)
+    valid = Column(Boolean, default=False)
+    validation_date = Column(DateTime, default=datetime.now)
+
+
 class DownloadSession(BaseModel):
 
     __tablename__ = 'download_session'
@@ -531,6 +589,11 @@ def set_download_session_name(mapper, connection, target):
 class Post(BaseModel):
 
     __tablename__ = 'post'
+    __table_args__ = (
+        # covers the post count and score aggregates grouped by reddit object
+        Index('ix_post_significant_reddit_object_id_score', 'significant_reddit_object_id', 'score'),
+        Index('ix_post_extracted_retry_attempts', 'extracted', 'retry_attempts'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(collation='NOCASE'))
@@ -539,7 +602,7 @@ class Post(BaseModel):
     score = Column(Integer)
     nsfw = Column(Boolean, default=False)
     reddit_id = Column(String(collation='NOCASE'), unique=True)
-    url = Column(String)
+    url = Column(String, index=True)
 
     is_self = Column(Boolean, default=False)
     text = Column(Text, nullable=True)
@@ -551,15 +614,18 @@ class Post(BaseModel):
     error_message = Column(String, nullable=True)
     retry_attempts = Column(Integer, default=0)
 
-    author_id = Column(ForeignKey('user.id'))
+    author_id = Column(ForeignKey('user.id'), index=True)
     author = relationship('User', foreign_keys=author_id, backref='posts')
-    subreddit_id = Column(ForeignKey('subreddit.id'))
+    subreddit_id = Column(ForeignKey('subreddit.id'), index=True)
     subreddit = relationship('Subreddit', foreign_keys=subreddit_id, backref='posts')
     significant_reddit_object_id = Column(ForeignKey('reddit_object.id'))
     significant_reddit_object = relationship('RedditObject', foreign_keys=significant_reddit_object_id,
                                              backref='significant_posts')
-    download_session_id = Column(ForeignKey('download_session.id'))
+    download_session_id = Column(ForeignKey('download_session.id'), index=True)
     download_session = relationship('DownloadSession', backref='posts')  # session where the post was extracted
+    # kept up to date by the statistics module so that posts can be sorted and filtered by them without an aggregate
+    comment_count = Column(Integer, default=0)
+    content_count = Column(Integer, default=0)
 
     def __str__(self):
         return f'Post: {self.title}'
@@ -605,19 +671,11 @@ class Post(BaseModel):
         return self.get_standard_date(self.extraction_date)
 
     def set_extracted(self):
-        self.extracted = True
-        self.extraction_date = datetime.now()
-        self.extraction_error = None
-        self.error_message = None
-        self.get_session().commit()
+        return self.write(extracted=True, extraction_date=datetime.now(), extraction_error=None, error_message=None)
 
     def set_extraction_failed(self, error, message):
-        self.extracted = False
-        self.extraction_date = datetime.now()
-        self.extraction_error = error
-        self.error_message = message
-        self.retry_attempts += 1
-        self.get_session().commit()
+        return self.write(extracted=False, extraction_date=datetime.now(), extraction_error=error,
+                          error_message=message, retry_attempts=self.retry_attempts + 1)
 
 
 class Comment(BaseModel):
@@ -639,15 +697,15 @@ class Comment(BaseModel):
     error_message = Column(String, nullable=True)
     retry_attempts = Column(Integer, default=0)
 
-    author_id = Column(ForeignKey('user.id'))
+    author_id = Column(ForeignKey('user.id'), index=True)
     author = relationship('User', foreign_keys=author_id, backref='comments')
-    subreddit_id = Column(ForeignKey('subreddit.id'))
+    subreddit_id = Column(ForeignKey('subreddit.id'), index=True)
     subreddit = relationship('Subreddit', foreign_keys=subreddit_id, backref='comments')
-    post_id = Column(ForeignKey('post.id'))
+    post_id = Column(ForeignKey('post.id'), index=True)
     post = relationship('Post', backref='comments')
     parent_id = Column(ForeignKey('comment.id'), nullable=True)
     parent = relationship('Comment', remote_side=[id], backref='children')
-    download_session_id = Column(ForeignKey('download_session.id'))
+    download_session_id = Column(ForeignKey('download_session.id'), index=True)
     download_session = relationship('DownloadSession', backref='comments')  # session where the comment was extracted
 
     def __str__(self):
@@ -690,30 +748,25 @@ class Comment(BaseModel):
         return self.post.short_title
 
     def set_extracted(self):
-        self.extracted = True
-        self.extraction_date = datetime.now()
-        self.extraction_error = None
-        self.error_message = None
-        self.get_session().commit()
+        return self.write(extracted=True, extraction_date=datetime.now(), extraction_error=None, error_message=None)
 
     def set_extraction_failed(self, error,  message):
-        self.extracted = False
-        self.extraction_date = datetime.now()
-        self.extraction_error = error
-        self.error_message = message
-        self.retry_attempts += 1
-        self.get_session().commit()
+        return self.write(extracted=False, extraction_date=datetime.now(), extraction_error=error,
+                          error_message=message, retry_attempts=self.retry_attempts + 1)
 
 
 class Content(BaseModel):
 
     __tablename__ = 'content'
+    __table_args__ = (
+        Index('ix_content_downloaded_retry_attempts', 'downloaded', 'retry_attempts'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(collation='NOCASE'))
     download_title = Column(String(collation='NOCASE'), nullable=True)
     extension = Column(String(collation='NOCASE'))
-    url = Column(String(collation='NOCASE'))
+    url = Column(String(collation='NOCASE'), index=True)
     directory_path = Column(String(collation='NOCASE'), nullable=True)
 
     downloaded = Column(Boolean, default=False)
@@ -722,15 +775,15 @@ class Content(BaseModel):
     error_message = Column(String, nullable=True)
     retry_attempts = Column(Integer, default=0)
 
-    user_id = Column(ForeignKey('user.id'))
+    user_id = Column(ForeignKey('user.id'), index=True)
     user = relationship('User', backref='content')
-    subreddit_id = Column(ForeignKey('subreddit.id'))
+    subreddit_id = Column(ForeignKey('subreddit.id'), index=True)
     subreddit = relationship('Subreddit', backref='content')
-    post_id = Column(ForeignKey('post.id'), nullable=True)
+    post_id = Column(ForeignKey('post.id'), nullable=True, index=True)
     post = relationship('Post', backref='content')
     comment_id = Column(ForeignKey('comment.id'), nullable=True)
     comment = relationship('Comment', backref='content')
-    download_session_id = Column(ForeignKey('download_session.id'), nullable=True)
+    download_session_id = Column(ForeignKey('download_session.id'), nullable=True, index=True)
     # The session in which this content was actually downloaded.  May differ from the parent post/comment
     # download_session if the content was unable to be downloaded during the same session, and was downloaded at a
     # later date.
@@ -781,16 +834,57 @@ class Content(BaseModel):
         return system_util.join_path(self.directory_path, f'{download_title}.{self.extension}')
 
     def set_downloaded(self, download_session_id):
-        self.download_session_id = download_session_id
-        self.downloaded = True
-        self.download_date = datetime.now()
-        self.download_error = None
-        self.error_message = None
-        self.get_session().commit()
+        return self.write(download_session_id=download_session_id, downloaded=True, download_date=datetime.now(),
+                          download_error=None, error_message=None)
 
     def set_download_error(self, error, message):
-        self.downloaded = False
-        self.download_error = error
-        self.error_message = message
-        self.retry_attempts = self.retry_attempts + 1
-        self.get_session().commit()
+        return self.write(downloaded=False, download_error=error, error_message=message,
+                          retry_attempts=(self.retry_attempts or 0) + 1)
+
+
+class RedditObjectStatistics(BaseModel):
+
+    """
+    Totals for a single reddit object that are read by the database statistics dialog and the reddit object filters
+    instead of being aggregated from the post, content and comment tables each time they are needed.  The rows are
+    kept up to date by the functions in the statistics module.
+    """
+
+    __tablename__ = 'reddit_object_statistics'
+
+    reddit_object_id = Column(ForeignKey('reddit_object.id'), primary_key=True)
+    reddit_object = relationship('RedditObject')
+    # counts and score of the posts that were extracted for the reddit object
+    post_count = Column(Integer, default=0)
+    self_post_count = Column(Integer, default=0)
+    significant_score = Column(Integer, default=0)
+    # score of the posts made by the user or to the subreddit, None if there are no such posts
+    score = Column(Integer, nullable=True)
+    # content and comments belonging to the user or subreddit
+    image_count = Column(Integer, default=0)
+    video_count = Column(Integer, default=0)
+    gif_count = Column(Integer, default=0)
+    comment_count = Column(Integer, default=0)
+    # content, comments and download sessions of the posts that were extracted for the reddit object
+    significant_content_count = Column(Integer, default=0)
+    significant_comment_count = Column(Integer, default=0)
+    significant_comment_score = Column(Integer, nullable=True)
+    download_count = Column(Integer, default=0)
+    last_post_date = Column(DateTime, nullable=True)
+
+
+class DownloadSessionStatistics(BaseModel):
+
+    """
+    Totals for a single download session that the download session filter sorts and filters by.  The rows are kept
+    up to date by the functions in the statistics module.
+    """
+
+    __tablename__ = 'download_session_statistics'
+
+    download_session_id = Column(ForeignKey('download_session.id'), primary_key=True)
+    download_session = relationship('DownloadSession')
+    reddit_object_count = Column(Integer, default=0)
+    post_count = Column(Integer, default=0)
+    comment_count = Column(Integer, default=0)
+    content_count = Column(Integer, default=0)
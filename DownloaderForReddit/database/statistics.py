@@ -0,0 +1,291 @@
+"""
+Maintains the aggregates that the database statistics dialog and the database filters read: the
+reddit_object_statistics and download_session_statistics tables and the comment and content counts of each post.
+Rather than adjusting the stored totals as rows are added and removed, the aggregates of the reddit objects, download
+sessions and posts that a download session or a deletion touched are recalculated from the indexed foreign key columns
+of the post, content and comment tables.  This keeps the cost of an update proportional to the objects involved, and
+rebuild_statistics recalculates everything if the aggregates are ever out of step with the database.
+"""
+
+from threading import Lock
+from sqlalchemy import case, select
+from sqlalchemy.sql import func
+
+from .models import (RedditObject, RedditObjectStatistics, DownloadSession, DownloadSessionStatistics, Post, Content,
+                     Comment)
+from ..core import const
+
+
+QUERY_CHUNK_SIZE = 500  # keeps the number of parameters in an IN query under sqlite's limit
+POST_COUNT_BATCH_SIZE = 5000  # posts whose counts are recalculated per transaction when the statistics are rebuilt
+
+# held while the statistics are rebuilt so that a second rebuild is not started while one is running
+rebuild_lock = Lock()
+
+
+def new_statistics_row(reddit_object_id):
+    return {
+        'reddit_object_id': reddit_object_id,
+        'post_count': 0,
+        'self_post_count': 0,
+        'significant_score': 0,
+        'score': None,
+        'image_count': 0,
+        'video_count': 0,
+        'gif_count': 0,
+        'comment_count': 0,
+        'significant_content_count': 0,
+        'significant_comment_count': 0,
+        'significant_comment_score': None,
+        'download_count': 0,
+        'last_post_date': None,
+    }
+
+
+def new_download_session_statistics_row(download_session_id):
+    return {
+        'download_session_id': download_session_id,
+        'reddit_object_count': 0,
+        'post_count': 0,
+        'comment_count': 0,
+        'content_count': 0,
+    }
+
+
+def calculate_statistics(session, reddit_object_ids=None):
+    """
+    Aggregates the statistics of the reddit objects with the supplied ids from the post, content and comment tables.
+    :param reddit_object_ids: The ids of the reddit objects to calculate.  If None, every reddit object is calculated.
+    :return: A dict of statistics rows keyed by reddit object id.  Reddit objects without any posts, content or
+             comments are not included.
+    """
+    statistics = {}
+
+    def get_row(reddit_object_id):
+        return statistics.setdefault(reddit_object_id, new_statistics_row(reddit_object_id))
+
+    def query(group_column, *columns):
+        q = session.query(group_column, *columns).filter(group_column != None)
+        if reddit_object_ids is not None:
+            q = q.filter(group_column.in_(reddit_object_ids))
+        return q.group_by(group_column)
+
+    for reddit_object_id, post_count, self_post_count, score, download_count, last_post_date in query(
+            Post.significant_reddit_object_id, func.count(Post.id),
+            func.sum(case([(Post.is_self == True, 1)], else_=0)), func.sum(Post.score),
+            func.count(Post.download_session_id.distinct()), func.max(Post.date_posted)):
+        get_row(reddit_object_id).update(post_count=post_count, self_post_count=self_post_count,
+                                         significant_score=score or 0, download_count=download_count,
+                                         last_post_date=last_post_date)
+    for reddit_object_id, content_count in query(Post.significant_reddit_object_id, func.count(Content.id)) \
+            .join(Content, Content.post_id == Post.id):
+        get_row(reddit_object_id)['significant_content_count'] = content_count
+    for reddit_object_id, comment_count, comment_score in query(
+            Post.significant_reddit_object_id, func.count(Comment.id), func.sum(Comment.score)) \
+            .join(Comment, Comment.post_id == Post.id):
+        get_row(reddit_object_id).update(significant_comment_count=comment_count,
+                                         significant_comment_score=comment_score)
+    # users and subreddits share the reddit object id sequence, so the user and subreddit columns never collide
+    for column in (Post.author_id, Post.subreddit_id):
+        for reddit_object_id, score in query(column, func.sum(Post.score)):
+            get_row(reddit_object_id)['score'] = score
+    extension_counts = [func.sum(case([(Content.extension.in_(extensions), 1)], else_=0))
+                        for extensions in (const.IMAGE_EXT, const.VID_EXT, const.GIF_EXT)]
+    for column in (Content.user_id, Content.subreddit_id):
+        for reddit_object_id, image_count, video_count, gif_count in query(column, *extension_counts):
+            get_row(reddit_object_id).update(image_count=image_count, video_count=video_count, gif_count=gif_count)
+    for column in (Comment.author_id, Comment.subreddit_id):
+        for reddit_object_id, comment_count in query(column, func.count(Comment.id)):
+            get_row(reddit_object_id)['comment_count'] = comment_count
+    return statistics
+
+
+def calculate_download_session_statistics(session, download_session_ids=None):
+    """
+    Aggregates the statistics of the download sessions with the supplied ids from the post, content and comment
+    tables.
+    :param download_session_ids: The ids of the download sessions to calculate.  If None, every download session is
+                                 calculated.
+    :return: A dict of statistics rows keyed by download session id.  Download sessions without any posts, content or
+             comments are not included.
+    """
+    statistics = {}
+    for model, columns in (
+            (Post, {'reddit_object_count': func.count(Post.significant_reddit_object_id.distinct()),
+                    'post_count': func.count(Post.id)}),
+            (Comment, {'comment_count': func.count(Comment.id)}),
+            (Content, {'content_count': func.count(Content.id)}),
+    ):
+        query = session.query(model.download_session_id, *columns.values()).filter(model.download_session_id != None)
+        if download_session_ids is not None:
+            query = query.filter(model.download_session_id.in_(download_session_ids))
+        for download_session_id, *values in query.group_by(model.download_session_id):
+            statistics.setdefault(download_session_id, new_download_session_statistics_row(download_session_id)) \
+                .update(zip(columns.keys(), values))
+    return statistics
+
+
+def update_post_counts(session, *criterion):
+    """Recalculates the comment and content counts of the posts that match the supplied criterion."""
+    session.query(Post).filter(*criterion).update({
+        Post.comment_count: select([func.count(Comment.id)]).where(Comment.post_id == Post.id).as_scalar(),
+        Post.content_count: select([func.count(Content.id)]).where(Content.post_id == Post.id).as_scalar(),
+    }, synchronize_session=False)
+
+
+def refresh_statistics(session, reddit_object_ids=(), download_session_ids=(), post_ids=()):
+    """
+    Recalculates the statistics of the reddit objects, download sessions and posts with the supplied ids and commits
+    them.  The statistics rows of reddit objects and download sessions that no longer exist are removed.
+    """
+    for model, id_column, statistics_model, statistics_id_column, ids, calculate, new_row in (
+            (RedditObject, RedditObject.id, RedditObjectStatistics, RedditObjectStatistics.reddit_object_id,
+             reddit_object_ids, calculate_statistics, new_statistics_row),
+            (DownloadSession, DownloadSession.id, DownloadSessionStatistics,
+             DownloadSessionStatistics.download_session_id, download_session_ids,
+             calculate_download_session_statistics, new_download_session_statistics_row),
+    ):
+        ids = list(set(ids) - {None})
+        for i in range(0, len(ids), QUERY_CHUNK_SIZE):
+            chunk = ids[i:i + QUERY_CHUNK_SIZE]
+            existing = [x for x, in session.query(id_column).filter(id_column.in_(chunk))]
+            statistics = calculate(session, existing)
+            session.query(statistics_model).filter(statistics_id_column.in_(chunk)).delete(synchronize_session=False)
+            session.bulk_insert_mappings(statistics_model, [statistics.get(x, new_row(x)) for x in existing])
+    post_ids = list(set(post_ids))
+    for i in range(0, len(post_ids), QUERY_CHUNK_SIZE):
+        update_post_counts(session, Post.id.in_(post_ids[i:i + QUERY_CHUNK_SIZE]))
+    session.commit()
+
+
+def rebuild_statistics(session):
+    """
+    Replaces every statistics row and post count with ones recalculated from the whole database and commits them.  The
+    post counts are committed in batches of posts so that the database is not locked against other writes for the whole
+    rebuild.  The statistics rows are calculated before any of them are replaced and are committed last, so a rebuild
+    that is interrupted leaves the statistics tables as they were.
+    """
+    with rebuild_lock:
+        max_post_id = session.query(func.max(Post.id)).scalar() or 0
+        for start in range(0, max_post_id + 1, POST_COUNT_BATCH_SIZE):
+            update_post_counts(session, Post.id >= start, Post.id < start + POST_COUNT_BATCH_SIZE)
+            session.commit()
+        reddit_object_statistics = calculate_statistics(session)
+        download_session_statistics = calculate_download_session_statistics(session)
+        reddit_object_ids = [x for x, in session.query(RedditObject.id)]
+        download_session_ids = [x for x, in session.query(DownloadSession.id)]
+        session.query(RedditObjectStatistics).delete(synchronize_session=False)
+        session.bulk_insert_mappings(RedditObjectStatistics, [reddit_object_statistics.get(x, new_statistics_row(x))
+                                                              for x in reddit_object_ids])
+        session.query(DownloadSessionStatistics).delete(synchronize_session=False)
+        session.bulk_insert_mappings(DownloadSessionStatistics,
+                                     [download_session_statistics.get(x, new_download_session_statistics_row(x))
+                                      for x in download_session_ids])
+        session.commit()
+
+
+def statistics_need_build(session):
+    """Returns True if the database has reddit objects but no statistics, eg: it has never had statistics built."""
+    return session.query(RedditObjectStatistics.reddit_object_id).first() is None and \
+        session.query(RedditObject.id).first() is not None
+
+
+def build_statistics_if_empty(session):
+    """Builds the statistics if they need to be built and are not already being built."""
+    if not rebuild_lock.locked() and statistics_need_build(session):
+        rebuild_statistics(session)
+
+
+def filter_download_session(query, model, download_session_id, after_ids=None):
+    """
+    Filters the supplied query to the rows of the supplied model that were added in the download session, and if
+    after_ids is supplied, to the rows added after the id that it holds for the model.
+    """
+    query = query.filter(model.download_session_id == download_session_id)
+    if after_ids is not None:
+        query = query.filter(model.id > after_ids.get(model, 0))
+    return query
+
+
+def get_download_session_last_ids(session, download_session_id):
+    """Returns a dict of the largest post, content and comment ids added in the download session keyed by model."""
+    last_ids = {}
+    for model in (Post, Content, Comment):
+        query = session.query(func.max(model.id)).filter(model.download_session_id == download_session_id)
+        last_ids[model] = query.scalar() or 0
+    return last_ids
+
+
+def get_download_session_reddit_object_ids(session, download_session_id, after_ids=None):
+    """Returns the ids of the reddit objects whose posts, content or comments were added in the download session."""
+    reddit_object_ids = set()
+    for model, columns in (
+            (Post, (Post.significant_reddit_object_id, Post.author_id, Post.subreddit_id)),
+            (Content, (Content.user_id, Content.subreddit_id)),
+            (Comment, (Comment.author_id, Comment.subreddit_id)),
+    ):
+        for row in filter_download_session(session.query(*columns), model, download_session_id, after_ids).distinct():
+            reddit_object_ids.update(row)
+    reddit_object_ids.discard(None)
+    return reddit_object_ids
+
+
+def get_post_reddit_object_ids(session, post_ids):
+    """
+    Returns the ids of the reddit objects whose statistics include the supplied posts or their content and comments.
+    :param post_ids: A list or query of post ids.
+    """
+    reddit_object_ids = set()
+    for post_column, columns in (
+            (Post.id, (Post.significant_reddit_object_id, Post.author_id, Post.subreddit_id)),
+            (Content.post_id, (Content.user_id, Content.subreddit_id)),
+            (Comment.post_id, (Comment.author_id, Comment.subreddit_id)),
+    ):
+        for row in session.query(*columns).filter(post_column.in_(post_ids)).distinct():
+            reddit_object_ids.update(row)
+    reddit_object_ids.discard(None)
+    return reddit_object_ids
+
+
+def get_download_session_post_ids(session, download_session_id, after_ids=None):
+    """Returns the ids of the posts that were extracted, or had content or comments added, in the download session."""
+    post_ids = set()
+    for model, post_column in ((Post, Post.id), (Content, Content.post_id), (Comment, Comment.post_id)):
+        query = filter_download_session(session.query(post_column), model, download_session_id, after_ids)
+        post_ids.update(x for x, in query.distinct())
+    post_ids.discard(None)
+    return post_ids
+
+
+def get_post_download_session_ids(session, post_ids):
+    """
+    Returns the ids of the download sessions whose statistics include the supplied posts or their content and
+    comments.
+    :param post_ids: A list or query of post ids.
+    """
+    download_session_ids = set()
+    for post_column, session_column in (
+            (Post.id, Post.download_session_id),
+            (Content.post_id, Content.download_session_id),
+            (Comment.post_id, Comment.download_session_id),
+    ):
+        download_session_ids.update(
+            x for x, in session.query(session_column).filter(post_column.in_(post_ids)).distinct())
+    download_session_ids.discard(None)
+    return download_session_ids
+
+
+def refresh_download_session_statistics(session, download_session_id, after_ids=None):
+    """
+    Refreshes the statistics of the download session and of the reddit objects and posts that its posts, content and
+    comments belong to.
+    :param after_ids: The dict returned by the previous refresh of the same download session.  If supplied, only the
+                      reddit objects and posts of the rows added since that refresh are refreshed, so that a long
+                      running session can be refreshed as it goes without recalculating everything it has added.
+    :return: A dict of the largest post, content and comment ids that this refresh included, to be passed to the next
+             refresh of the download session.
+    """
+    last_ids = get_download_session_last_ids(session, download_session_id)
+    refresh_statistics(session, get_download_session_reddit_object_ids(session, download_session_id, after_ids),
+                       [download_session_id], get_download_session_post_ids(session, download_session_id, after_ids))
+    return last_ids
@@ -23,12 +23,21 @@ along with Downloader for Reddit.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 
-# Import each extractor class in the Extractors package so that BaseExtractor.__subclasses__() will pick up the
-# extractor class to be used in the Extractor.assign_extractor method.
-from .imgur_extractor import ImgurExtractor
-from .gfycat_extractor import GfycatExtractor
-from .vidble_extractor import VidbleExtractor
-from .reddit_uploads_extractor import RedditUploadsExtractor
-from .reddit_video_extractor import RedditVideoExtractor
-from .generic_video_extractor import GenericVideoExtractor
-from .erome_extractor import EromeExtractor
+# Extractor modules are not imported here.  They are registered in extractor_registry and only imported the first time
+# a url matching one of their keys is extracted.  The extractor classes can still be accessed from this package, in
+# which case the module is imported on first access.
+
+from importlib import import_module
+
+from .extractor_registry import BUILT_IN_EXTRACTORS
+
+
+_lazy_extractors = {entry.class_name: entry.module_path for entry in BUILT_IN_EXTRACTORS}
+
+
+def __getattr__(name):
+    try:
+        module_path = _lazy_extractors[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    return getattr(import_module(module_path, __name__), name)
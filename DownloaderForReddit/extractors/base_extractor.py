@@ -34,15 +34,17 @@ from ..messaging.message import Message
 
 class BaseExtractor:
 
-    url_key = (None, )
-
     def __init__(self, post, **kwargs):
         """
         A base class for extracting downloadable urls from container websites.  This class should be overridden and any
         necessary methods overridden by subclasses to perform link extraction from the target website.  Each subclass
-        must also include the url_key parameter which is used for matching the website url to the extractor to be used.
+        must also be registered with its url keys in the extractor_registry, which is used for matching the website url
+        to the extractor to be used.
 
         :param post: The post object created from the submission extracted from reddit.
+        :param kwargs: May include a content_callback, which is called with each Content item and the future of its
+                       id as soon as it is created so that content can be downloaded while the rest of an album is
+                       still being extracted, and the database writer that the content is added with.
         :type post: Post
         """
         self.logger = logging.getLogger(f'DownloaderForReddit.{__name__}')
@@ -57,7 +59,11 @@ class BaseExtractor:
         self.significant_reddit_object = kwargs.get('significant_reddit_object', post.significant_reddit_object)
         self.creation_date = kwargs.get('date_posted', post.date_posted)
         self.count = kwargs.get('count', None)
+        self.content_callback = kwargs.get('content_callback', None)
+        self.writer = kwargs.get('writer', None)
         self.extracted_content = []
+        # futures that are resolved with the id of each extracted content item once its insert is committed
+        self.content_id_futures = {}
         self.failed_extraction = False
         self.extraction_error = None
         self.failed_extraction_message = None
@@ -66,17 +72,6 @@ class BaseExtractor:
     def __str__(self):
         return __name__
 
-    @classmethod
-    def get_url_key(cls):
-        """
-        Returns the url_key that each subclass must contain.  The url_key is used to indicate keywords that are domain
-        specific.  The url_key must be so that if the extractor finds the key in a supplied url, the extractor object
-        to which the key belongs can be selected to perform the link extraction.
-        :return: A key that that if found in a url means this extractor is selected to be used for link extraction.
-        :rtype: str
-        """
-        return cls.url_key
-
     def extract_content(self):
         """
         Method that dictates which extraction method will be used.  Responsible for deciding how an extractor is
@@ -133,7 +128,10 @@ class BaseExtractor:
     def make_content(self, url, extension, count=None, name_modifier='', **kwargs):
         """
         Takes content elements that are extracted and creates a Content object with the extracted parts and the global
-        extractor items, then sends the new Content object to the extracted content list.
+        extractor items, then sends the new Content object to the extracted content list and the content callback if
+        one was supplied.  The content is queued to be added by the database writer, which commits it with the rest of
+        its batch, so its id is not set until the future in content_id_futures is resolved.  The content is detached
+        from any session.
         :param url: The url of the content item.
         :param extension: The extension of the supplied url and the url used for the downloaded file.
         :param count: The number in an album sequence that the supplied url belongs.  Used to number the file.
@@ -158,19 +156,29 @@ class BaseExtractor:
                 title=title,
                 extension=extension,
                 url=url,
-                user=self.user,
-                subreddit=self.subreddit,
-                post=self.post,
+                user_id=self.user.id,
+                subreddit_id=self.subreddit.id,
+                post_id=self.post.id,
                 directory_path=directory,
                 comment_id=comment_id
             )
-            session = self.post.get_session()
-            session.add(content)
-            session.commit()
+            future = self.get_writer().insert(content)
+            self.content_id_futures[content] = future
             self.extracted_content.append(content)
+            if self.content_callback is not None:
+                self.content_callback(content, future)
             return content
         return None
 
+    def get_writer(self):
+        if self.writer is None:
+            self.writer = injector.get_database_handler().writer
+        return self.writer
+
+    def get_content_id(self, content):
+        """Returns the id of the supplied extracted content item, waiting for its insert to be committed."""
+        return self.content_id_futures[content].result()
+
     def make_title(self, **kwargs) -> str:
         if self.comment is None:
             self.add_extra_title_attributes(self.post, **kwargs)
@@ -28,8 +28,6 @@ from .base_extractor import BaseExtractor
 
 class DirectExtractor(BaseExtractor):
 
-    url_key = None
-
     def __init__(self, post, **kwargs):
         super().__init__(post, **kwargs)
 
@@ -47,8 +47,6 @@ def get_content(tag):
 
 class EromeExtractor(BaseExtractor):
 
-    url_key = ['erome']
-
     def __init__(self, post, **kwargs):
         """
         A subclass of the BaseExtractor class.  This class interacts exclusively with the Erome website via
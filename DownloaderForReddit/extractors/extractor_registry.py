@@ -0,0 +1,144 @@
+"""
+Registry that maps url keys to the extractor classes that handle them.  Extractor modules are only imported the first
+time a url matching one of their keys is extracted, so extractors that are never used (and their dependencies such as
+youtube_dl and bs4) are never loaded.
+
+Third party packages can add extractors without modifying this package either by calling register_extractor, or by
+declaring an entry point in the 'downloader_for_reddit.extractors' group whose name is the url key and whose value is
+the extractor class (eg: 'mysite.com = my_package.my_extractor:MySiteExtractor').
+"""
+
+import logging
+from importlib import import_module
+from threading import Lock
+from time import time
+from collections import namedtuple
+
+from ..core import const
+from ..utils import injector
+
+
+ENTRY_POINT_GROUP = 'downloader_for_reddit.extractors'
+
+logger = logging.getLogger(f'DownloaderForReddit.{__name__}')
+ExtractorEntry = namedtuple('ExtractorEntry', 'url_key module_path class_name')
+
+_entries = []
+_loaded_classes = {}
+_lock = Lock()
+_entry_points_loaded = False
+
+_supported_video_sites = None
+_supported_video_sites_load_time = None
+
+
+def get_supported_video_sites():
+    """
+    Returns the list of supported video site keys loaded from the supported sites file.  The file is re-read if it has
+    been updated through the settings dialog since it was last loaded.
+    :return: A list of supported video site url keys, or None if the file could not be loaded.
+    """
+    global _supported_video_sites, _supported_video_sites_load_time
+    settings_manager = injector.get_settings_manager()
+    if _supported_video_sites_load_time is None or \
+            _supported_video_sites_load_time < settings_manager.supported_videos_updated:
+        try:
+            with open(const.SUPPORTED_SITES_FILE, 'r') as file:
+                _supported_video_sites = [x.strip().strip('*') for x in file.readlines() if x.endswith('*\n')]
+                load_time = time()
+                _supported_video_sites_load_time = load_time
+                settings_manager.supported_videos_updated = load_time
+        except FileNotFoundError:
+            _supported_video_sites = None
+            logger.warning('Failed to load supported video sites')
+    return _supported_video_sites
+
+
+def register_extractor(url_key, module_path, class_name):
+    """
+    Registers an extractor class to be used for urls containing any of the supplied url keys.  The module containing
+    the extractor is not imported until a matching url is found.
+    :param url_key: A list of strings which, if any are found in a url, select this extractor.  May also be a callable
+                    that returns such a list, for extractors whose keys can change while the application is running.
+    :param module_path: The import path of the module that contains the extractor class.  Paths starting with '.' are
+                        relative to this package.
+    :param class_name: The name of the extractor class in the supplied module.
+    """
+    with _lock:
+        _entries.append(ExtractorEntry(url_key=url_key, module_path=module_path, class_name=class_name))
+
+
+def get_extractor(url):
+    """
+    Returns the extractor class registered for the supplied url, importing the extractor's module if this is the first
+    time it has been used.
+    :param url: The url that is to be extracted.
+    :return: The matching extractor class, or None if no registered extractor matches the url.
+    """
+    load_entry_points()
+    url = url.lower()
+    for entry in list(_entries):
+        key = entry.url_key() if callable(entry.url_key) else entry.url_key
+        if key is not None and any(x in url for x in key):
+            return load_extractor_class(entry)
+    return None
+
+
+def load_extractor_class(entry):
+    key = (entry.module_path, entry.class_name)
+    with _lock:
+        extractor_class = _loaded_classes.get(key)
+        if extractor_class is None:
+            if entry.class_name is None:
+                extractor_class = entry.module_path.load()  # entry point
+            else:
+                module = import_module(entry.module_path, package=__package__)
+                extractor_class = getattr(module, entry.class_name)
+            _loaded_classes[key] = extractor_class
+        return extractor_class
+
+
+def load_entry_points():
+    """
+    Registers extractors declared by installed packages through entry points.  Entry points are only looked up once,
+    and are not loaded until a url matching their key is found.
+    """
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    with _lock:
+        if _entry_points_loaded:
+            return
+        _entry_points_loaded = True
+        try:
+            from importlib.metadata import entry_points
+        except ImportError:  # python < 3.8
+            return
+        try:
+            all_entry_points = entry_points()
+            if hasattr(all_entry_points, 'select'):
+                group = all_entry_points.select(group=ENTRY_POINT_GROUP)
+            else:
+                group = all_entry_points.get(ENTRY_POINT_GROUP, [])
+            for entry_point in group:
+                _entries.append(ExtractorEntry(url_key=[entry_point.name.lower()], module_path=entry_point,
+                                               class_name=None))
+        except Exception:
+            logger.error('Failed to load extractor entry points', exc_info=True)
+
+
+# Built in extractors, in the order that they are matched against urls.  This is the only place their url keys are
+# declared, and the package's lazy extractor attributes are built from it.
+BUILT_IN_EXTRACTORS = [
+    ExtractorEntry(['imgur'], '.imgur_extractor', 'ImgurExtractor'),
+    ExtractorEntry(['gfycat', 'redgifs'], '.gfycat_extractor', 'GfycatExtractor'),
+    ExtractorEntry(['vidble'], '.vidble_extractor', 'VidbleExtractor'),
+    ExtractorEntry(['reddituploads', 'i.redd.it', 'reddit.com/gallery'], '.reddit_uploads_extractor',
+                   'RedditUploadsExtractor'),
+    ExtractorEntry(['v.redd.it'], '.reddit_video_extractor', 'RedditVideoExtractor'),
+    ExtractorEntry(get_supported_video_sites, '.generic_video_extractor', 'GenericVideoExtractor'),
+    ExtractorEntry(['erome'], '.erome_extractor', 'EromeExtractor'),
+]
+
+for _entry in BUILT_IN_EXTRACTORS:
+    register_extractor(*_entry)
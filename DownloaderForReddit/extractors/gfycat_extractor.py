@@ -37,8 +37,6 @@ _GFYCAT_ENDPOINT = "https://api.gfycat.com/v1/gfycats/"
 
 class GfycatExtractor(BaseExtractor):
 
-    url_key = ['gfycat', 'redgifs']
-
     def __init__(self, post, **kwargs):
         """
         A subclass of the BaseExtractor class.  This class interacts exclusively with the gfycat website through their
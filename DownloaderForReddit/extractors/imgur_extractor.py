@@ -30,8 +30,6 @@ from ..core import const
 
 class ImgurExtractor(BaseExtractor):
 
-    url_key = ['imgur']
-
     def __init__(self, post, **kwargs):
         """
         A subclass of the BaseExtractor class.  This class interacts exclusively with the imgur website through the
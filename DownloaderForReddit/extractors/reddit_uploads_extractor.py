@@ -33,8 +33,6 @@ from ..utils import reddit_utils
 
 class RedditUploadsExtractor(BaseExtractor):
 
-    url_key = ['reddituploads', 'i.redd.it', 'reddit.com/gallery']
-
     def __init__(self, post, **kwargs):
         super().__init__(post, **kwargs)
         self.submission = self.get_host_submission()
@@ -32,8 +32,6 @@ from ..utils import reddit_utils, video_merger
 
 class RedditVideoExtractor(BaseExtractor):
 
-    url_key = ['v.redd.it']
-
     def __init__(self, post, **kwargs):
         super().__init__(post, **kwargs)
         self.post = post
@@ -84,8 +82,8 @@ class RedditVideoExtractor(BaseExtractor):
                         audio_content = self.get_audio_content()
                         if audio_content is not None and video_content is not None:
                             merge_set = video_merger.MergeSet(
-                                video_id=video_content.id,
-                                audio_id=audio_content.id,
+                                video_id=self.get_content_id(video_content),
+                                audio_id=self.get_content_id(audio_content),
                                 date_modified=self.post.date_posted
                             )
                             video_merger.videos_to_merge.append(merge_set)
@@ -8,8 +8,6 @@ from ..utils import system_util
 
 class SelfPostExtractor(BaseExtractor):
 
-    url_key = None
-
     def __init__(self, post, **kwargs):
         super().__init__(post, **kwargs)
         self.download_session_id = kwargs.get('download_session_id', None)
@@ -32,26 +30,26 @@ class SelfPostExtractor(BaseExtractor):
             title=self.make_title(),
             extension=extension,
             url=url,
-            user=self.user,
-            subreddit=self.subreddit,
-            post=self.post,
+            user_id=self.user.id,
+            subreddit_id=self.subreddit.id,
+            post_id=self.post.id,
             directory_path=self.make_dir_path()
         )
         self.check_file_path(content)
         self.download_text_post(content)
-        session = self.post.get_session()
-        session.add(content)
-        session.commit()
+        self.get_writer().insert(content)
         return content
 
     def download_text_post(self, content):
+        # the content has not been added to the database yet, so the download status is written with its insert
         try:
             with open(content.get_full_file_path(), 'w', encoding='utf-8') as file:
                 text = self.get_text(content.extension)
                 file.write(text)
                 content.set_downloaded(self.download_session_id)
-        except Exception as e:
-            content.set_download_error(Error.TEXT_FAILURE, 'Failed to save text post', extra={'error': e})
+        except Exception:
+            self.logger.error('Failed to save text post', extra={'url': self.url}, exc_info=True)
+            content.set_download_error(Error.TEXT_FAILURE, 'Failed to save text post')
 
     def get_text(self, ext):
         if ext == 'txt':
@@ -31,8 +31,6 @@ from ..core import const
 
 class VidbleExtractor(BaseExtractor):
 
-    url_key = ['vidble']
-
     def __init__(self, post, **kwargs):
         """
         A subclass of the BaseExtractor class.  This class interacts exclusively with the Vidble website via
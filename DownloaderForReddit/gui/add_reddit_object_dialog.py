@@ -6,7 +6,8 @@ from pyqtspinner.spinner import WaitingSpinner
 from threading import Thread
 
 from ..guiresources.add_reddit_object_dialog_auto import Ui_AddRedditObjectDialog
-from ..utils import injector, system_util, reddit_utils
+from ..utils import injector, system_util
+from ..core.reddit_object_creator import RedditObjectCreator
 from ..utils.importers import json_importer, text_importer
 from ..database.models import ListAssociation, RedditObject
 from .existing_names_dialog import ExistingNamesDialog
@@ -102,9 +103,10 @@ class AddRedditObjectDialog(QDialog, Ui_AddRedditObjectDialog):
         self.thread.start()
 
     def validate_objects(self, *imported_objects):
-        name_checker = reddit_utils.NameChecker(self.list_model.list_type)
+        object_creator = RedditObjectCreator(self.list_model.list_type)
+        validations = object_creator.validate_names([ro.name for ro in imported_objects])
         for ro in imported_objects:
-            v_set = name_checker.check_reddit_object_name(ro.name)
+            v_set = validations[ro.name.lower()]
             if v_set.valid:
                 ro.name = v_set.name
                 ro.date_created = v_set.date_created
@@ -64,6 +64,13 @@ class DatabaseDialog(QWidget, Ui_DatabaseDialog):
         self.db = injector.get_database_handler()
         self.session = self.db.get_session()
         self.hold_setup = False
+
+        # the filters keep the keyset of the last query they ordered, which the models use to seek to the next page
+        self.download_session_filter = DownloadSessionFilter()
+        self.reddit_object_filter = RedditObjectFilter()
+        self.post_filter = PostFilter()
+        self.content_filter = ContentFilter()
+        self.comment_filter = CommentFilter()
         self.save_settings = save_settings
         self.setup_kwargs = setup_kwargs
 
@@ -1199,7 +1206,7 @@ class DatabaseDialog(QWidget, Ui_DatabaseDialog):
         :param extend: False if this is the first page of data, false if it is another page.  This indicates whether
                        the shown data should be extended (if True) or overwritten (if False).
         """
-        f = DownloadSessionFilter()
+        f = self.download_session_filter
         filter_tups = self.filter_widget.filter('DOWNLOAD_SESSION')
         query = self.session.query(DownloadSession)
         if self.reddit_object_focus:
@@ -1228,13 +1235,13 @@ class DatabaseDialog(QWidget, Ui_DatabaseDialog):
         final_query = f.filter(self.session, *filter_tups, query=query, order_by=self.download_session_order,
                                desc=self.download_session_desc)
         if not extend:
-            self.download_session_model.set_data(final_query)
+            self.download_session_model.set_data(final_query, self.download_session_filter.keyset)
         else:
-            self.download_session_model.load_next_page(final_query)
+            self.download_session_model.load_next_page(final_query, self.download_session_filter.keyset)
         self.check_load_more_button(self.download_session_model)
 
     def get_reddit_object_data(self):
-        f = RedditObjectFilter()
+        f = self.reddit_object_filter
         filter_tups = self.filter_widget.filter('REDDIT_OBJECT')
         query = self.session.query(RedditObject)
         if self.download_session_focus:
@@ -1262,9 +1269,9 @@ class DatabaseDialog(QWidget, Ui_DatabaseDialog):
         """See set download session data."""
         final_query = self.get_reddit_object_data()
         if not extend:
-            self.reddit_object_model.set_data(final_query)
+            self.reddit_object_model.set_data(final_query, self.reddit_object_filter.keyset)
         else:
-            self.reddit_object_model.load_next_page(final_query)
+            self.reddit_object_model.load_next_page(final_query, self.reddit_object_filter.keyset)
         self.check_load_more_button(self.reddit_object_model)
 
     @check_hold
@@ -1272,13 +1279,13 @@ class DatabaseDialog(QWidget, Ui_DatabaseDialog):
         """See set download session data."""
         final_query = self.get_post_data()
         if not extend:
-            self.post_model.set_data(final_query)
+            self.post_model.set_data(final_query, self.post_filter.keyset)
         else:
-            self.post_model.load_next_page(final_query)
+            self.post_model.load_next_page(final_query, self.post_filter.keyset)
         self.check_load_more_button(self.post_model)
 
     def get_post_data(self):
-        f = PostFilter()
+        f = self.post_filter
         filter_tups = self.filter_widget.filter('POST')
         query = self.session.query(Post)
         if self.download_session_focus or self.reddit_object_focus:
@@ -1305,7 +1312,7 @@ class DatabaseDialog(QWidget, Ui_DatabaseDialog):
         return final_query
 
     def get_content_data(self):
-        f = ContentFilter()
+        f = self.content_filter
         filter_tups = self.filter_widget.filter('CONTENT')
         query = self.session.query(Content)
         if self.download_session_focus:
@@ -1357,13 +1364,13 @@ class DatabaseDialog(QWidget, Ui_DatabaseDialog):
         """See set download session data."""
         final_query = self.get_content_data()
         if not extend:
-            self.content_model.set_data(final_query)
+            self.content_model.set_data(final_query, self.content_filter.keyset)
         else:
-            self.content_model.load_next_page(final_query)
+            self.content_model.load_next_page(final_query, self.content_filter.keyset)
         self.check_load_more_button(self.content_model)
 
     def get_comment_data(self):
-        f = CommentFilter()
+        f = self.comment_filter
         filter_tups = self.filter_widget.filter('COMMENT')
         query = self.session.query(Comment)
         if self.download_session_focus or self.reddit_object_focus:
@@ -1388,9 +1395,9 @@ class DatabaseDialog(QWidget, Ui_DatabaseDialog):
         """See set download session data."""
         final_query = self.get_comment_data()
         if not extend:
-            self.comment_tree_model.set_data(final_query)
+            self.comment_tree_model.set_data(final_query, self.comment_filter.keyset)
         else:
-            self.comment_tree_model.load_next_page(final_query)
+            self.comment_tree_model.load_next_page(final_query, self.comment_filter.keyset)
         self.check_load_more_button(self.comment_tree_model)
 
     def set_first_download_session_index(self):
@@ -1514,14 +1521,16 @@ class DatabaseDialog(QWidget, Ui_DatabaseDialog):
             visible_label = self.comment_visible_count_label
             count_label = self.comment_count_label
         visible_label.setText(str(visible))
-        count_label.setText(str(total))
+        # the total is counted in the background and is None until the count is finished
+        count_label.setText(str(total) if total is not None else '...')
 
     def closeEvent(self, event):
         """
         Overrides the default close event in order to save the window settings.  The settings will only be saved if the
         classes 'save_settings' flag is set.  When this dialog is setup to display specialty information (such as failed
         downloads) the settings should not be saved so that the database view dialog displays correctly the next time
-        the user opens the dialog.
+        the user opens the dialog.  The models are closed so that item counts still running in the background are
+        discarded when they finish.
         """
         self.settings_manager.database_view_geom['width'] = self.width()
         self.settings_manager.database_view_geom['height'] = self.height()
@@ -1554,4 +1563,7 @@ class DatabaseDialog(QWidget, Ui_DatabaseDialog):
             self.settings_manager.database_view_post_desc_order = self.post_desc
             self.settings_manager.database_view_content_desc_order = self.content_desc
             self.settings_manager.database_view_comment_desc_order = self.comment_desc
+        for model in (self.download_session_model, self.reddit_object_model, self.post_model, self.content_model,
+                      self.comment_tree_model):
+            model.close()
         super().closeEvent(event)
@@ -1,23 +1,27 @@
 import os
 import logging
-from PyQt5.QtWidgets import QDialog, QLabel, QVBoxLayout, QFormLayout, QScrollArea, QWidget, QFrame
-from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtWidgets import (QDialog, QLabel, QVBoxLayout, QHBoxLayout, QFormLayout, QScrollArea, QWidget, QFrame,
+                             QPushButton)
+from PyQt5.QtCore import QSize, Qt, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon, QPixmap
 from sqlalchemy.sql import func
 from sqlalchemy import desc, extract
 from datetime import datetime
 import calendar
 from time import time
+from threading import Thread
 from operator import attrgetter
 
 from DownloaderForReddit.database.models import (DownloadSession, RedditObject, User, Subreddit, Post, Content, Comment,
-                                                 RedditObjectList, ListAssociation)
+                                                 RedditObjectList, ListAssociation, RedditObjectStatistics)
+from DownloaderForReddit.database import statistics
 from DownloaderForReddit.utils import injector, system_util, general_utils
-from DownloaderForReddit.core import const
 
 
 class DatabaseStatisticsDialog(QDialog):
 
+    rebuild_finished = pyqtSignal()  # emitted from the rebuild thread so that the statistics are reloaded in the gui
+
     def __init__(self):
         QDialog.__init__(self)
         self.logger = logging.getLogger(f'DownloaderForReddit.{__name__}')
@@ -44,15 +48,72 @@ class DatabaseStatisticsDialog(QDialog):
         self.scroll_area.setWidgetResizable(True)
         self.scroll_area.setWidget(self.stat_widget)
 
+        self.rebuild_button = QPushButton('Rebuild Statistics')
+        self.rebuild_button.setToolTip('Recalculates the user, subreddit and list statistics from the whole database')
+        self.rebuild_button.clicked.connect(lambda: self.start_rebuild(rebuild=True))
+        self.rebuild_finished.connect(self.finish_rebuild)
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(self.rebuild_button)
+
         self.main_layout = QVBoxLayout(self)
         self.main_layout.addWidget(self.scroll_area)
+        self.main_layout.addLayout(button_layout)
         self.setLayout(self.main_layout)
 
+        self.load_statistics()
+
+    def start_rebuild(self, rebuild):
+        """
+        Builds the statistics on a background thread, as reading the whole database would otherwise hang the gui.  The
+        statistics are reloaded once the build is finished.
+        :param rebuild: True to rebuild the statistics from the whole database, False to only wait for a build that is
+                        already running and build them if they are still empty.
+        """
+        self.rebuild_button.setEnabled(False)
+        self.rebuild_button.setText('Building Statistics...')
+        Thread(target=self.run_rebuild, args=(rebuild, ), name='StatisticsRebuild', daemon=True).start()
+
+    def run_rebuild(self, rebuild):
+        try:
+            with self.db.get_scoped_session() as session:
+                if rebuild:
+                    statistics.rebuild_statistics(session)
+                else:
+                    with statistics.rebuild_lock:
+                        pass  # waits for a build that is already running, such as the one started with the application
+                    statistics.build_statistics_if_empty(session)
+        except Exception:
+            self.logger.error('Failed to build database statistics', exc_info=True)
+        try:
+            self.rebuild_finished.emit()
+        except RuntimeError:
+            pass  # the dialog was closed and deleted while the statistics were being built
+
+    def finish_rebuild(self):
+        self.rebuild_button.setText('Rebuild Statistics')
+        self.rebuild_button.setEnabled(True)
+        self.clear_statistics()
+        self.load_statistics()
+
+    def clear_statistics(self):
+        while self.stat_layout.count() > 0:
+            self.stat_layout.takeAt(0).widget().deleteLater()
+
+    def load_statistics(self):
         self.stat_count = 0
         start_time = time()
 
         try:
             with self.db.get_scoped_session() as session:
+                # the per user, subreddit and list statistics are read from the statistics table, which is kept up to
+                # date as each download session runs.  If it is empty or being built, it is built in the background
+                # and the statistics are loaded once it is finished
+                if statistics.rebuild_lock.locked() or statistics.statistics_need_build(session):
+                    self.stat_layout.addWidget(QLabel('Building database statistics.  This may take a while for a '
+                                                      'large database.'))
+                    self.start_rebuild(rebuild=False)
+                    return
                 total_reddit_objects = session.query(RedditObject.id).count()
                 total_significant = session.query(RedditObject.id).filter(RedditObject.significant == True).count()
 
@@ -64,8 +125,9 @@ class DatabaseStatisticsDialog(QDialog):
                         'Non-Significant users/subreddits are ones that have been added by the application'),
                 ]
 
-                post_count = session.query(Post.id).count()
-                total_score = session.query(func.sum(Post.score)).scalar()
+                post_count = session.query(func.sum(RedditObjectStatistics.post_count)).scalar() or 0
+                total_score = session.query(func.sum(RedditObjectStatistics.score)) \
+                    .join(User, User.id == RedditObjectStatistics.reddit_object_id).scalar()
 
                 total_users = session.query(User.id).count()
                 total_significant_users = session.query(User.id).filter(User.significant == True).count()
@@ -73,34 +135,22 @@ class DatabaseStatisticsDialog(QDialog):
                 oldest_user = session.query(User).order_by(User.date_added).first()
                 newest_user = session.query(User).order_by(desc(User.date_added)).first()
 
-                user_count_sub = session.query(Post.significant_reddit_object_id, func.count(Post.id).label('count')) \
-                    .group_by(Post.significant_reddit_object_id).subquery()
-                user_count = session.query(User, 'count') \
-                    .outerjoin(user_count_sub, user_count_sub.c.significant_reddit_object_id == User.id) \
-                    .order_by(desc('count')).first()
-
-                user_score = session.query(User, func.sum(Post.score).label('score'))\
-                    .join(Post, Post.author_id == User.id).group_by(User.id)
-                significant_user_high_score = user_score.filter(User.significant == True).order_by(desc('score')).first()
-                non_sig_user_high_score = user_score.filter(User.significant == False).order_by(desc('score')).first()
-                significant_user_low_score = user_score.filter(User.significant == True).order_by('score').first()
-                non_sig_user_low_score = user_score.filter(User.significant == False).order_by('score').first()
-
-                user_image_query = self.get_user_extension_query(session, 'IMG')
-                user_video_query = self.get_user_extension_query(session, 'VID')
-                user_gif_query = self.get_user_extension_query(session, 'GIF')
-
-                self_post_sub = session.query(Post.significant_reddit_object_id, func.count(Post.id).label('count')) \
-                    .filter(Post.is_self == True).group_by(Post.significant_reddit_object_id).subquery()
-                user_self_post_query = session.query(User, 'count') \
-                    .outerjoin(self_post_sub, self_post_sub.c.significant_reddit_object_id == User.id) \
-                    .order_by(desc('count')).first()
-
-                comment_author_sub = session.query(Comment.author_id, func.count(Comment.id).label('count')) \
-                    .group_by(Comment.author_id).subquery()
-                user_comment_query = session.query(User, 'count') \
-                    .outerjoin(comment_author_sub, comment_author_sub.c.author_id == User.id) \
-                    .order_by(desc('count')).first()
+                user_count = self.get_top(session, User, RedditObjectStatistics.post_count)
+
+                significant_user_high_score = self.get_top(session, User, RedditObjectStatistics.score, 'score',
+                                                           significant=True)
+                non_sig_user_high_score = self.get_top(session, User, RedditObjectStatistics.score, 'score',
+                                                       significant=False)
+                significant_user_low_score = self.get_top(session, User, RedditObjectStatistics.score, 'score',
+                                                          significant=True, lowest=True)
+                non_sig_user_low_score = self.get_top(session, User, RedditObjectStatistics.score, 'score',
+                                                      significant=False, lowest=True)
+
+                user_image_query = self.get_top(session, User, RedditObjectStatistics.image_count)
+                user_video_query = self.get_top(session, User, RedditObjectStatistics.video_count)
+                user_gif_query = self.get_top(session, User, RedditObjectStatistics.gif_count)
+                user_self_post_query = self.get_top(session, User, RedditObjectStatistics.self_post_count)
+                user_comment_query = self.get_top(session, User, RedditObjectStatistics.comment_count)
 
                 self.user_map = [
                     ('Total Users',
@@ -155,33 +205,22 @@ class DatabaseStatisticsDialog(QDialog):
                 oldest_sub = session.query(Subreddit).order_by(Subreddit.date_added).first()
                 newest_sub = session.query(Subreddit).order_by(desc(Subreddit.date_added)).first()
 
-                sub_count_sub = session.query(Post.significant_reddit_object_id, func.count(Post.id).label('count')) \
-                    .group_by(Post.significant_reddit_object_id).subquery()
-                sub_count = session.query(Subreddit, 'count') \
-                    .outerjoin(sub_count_sub, sub_count_sub.c.significant_reddit_object_id == Subreddit.id) \
-                    .order_by(desc('count')).first()
-
-                subreddit_image_query = self.get_sub_extension_query(session, 'IMG')
-                subreddit_video_query = self.get_sub_extension_query(session, 'VID')
-                subreddit_gif_query = self.get_sub_extension_query(session, 'GIF')
-
-                sub_self_post_query = session.query(Subreddit, 'count') \
-                    .outerjoin(self_post_sub, self_post_sub.c.significant_reddit_object_id == Subreddit.id) \
-                    .order_by(desc('count')).first()
-
-                comment_subreddit_sub = session.query(Comment.subreddit_id, func.count(Comment.id).label('count')) \
-                    .group_by(Comment.subreddit_id).subquery()
-                sub_comment_query = session.query(Subreddit, 'count') \
-                    .outerjoin(comment_subreddit_sub, comment_subreddit_sub.c.subreddit_id == Subreddit.id) \
-                    .order_by(desc('count')).first()
-
-                sub_score = session.query(Subreddit, func.sum(Post.score).label('score')) \
-                    .join(Post, Post.subreddit_id == Subreddit.id).group_by(Subreddit.id)
-                significant_sub_high_score = sub_score.filter(Subreddit.significant == True) \
-                    .order_by(desc('score')).first()
-                non_sig_sub_high_score = sub_score.filter(Subreddit.significant == False).order_by(desc('score')).first()
-                significant_sub_low_score = sub_score.filter(Subreddit.significant == True).order_by('score').first()
-                non_sig_sub_low_score = sub_score.filter(Subreddit.significant == False).order_by('score').first()
+                sub_count = self.get_top(session, Subreddit, RedditObjectStatistics.post_count)
+
+                subreddit_image_query = self.get_top(session, Subreddit, RedditObjectStatistics.image_count)
+                subreddit_video_query = self.get_top(session, Subreddit, RedditObjectStatistics.video_count)
+                subreddit_gif_query = self.get_top(session, Subreddit, RedditObjectStatistics.gif_count)
+                sub_self_post_query = self.get_top(session, Subreddit, RedditObjectStatistics.self_post_count)
+                sub_comment_query = self.get_top(session, Subreddit, RedditObjectStatistics.comment_count)
+
+                significant_sub_high_score = self.get_top(session, Subreddit, RedditObjectStatistics.score, 'score',
+                                                          significant=True)
+                non_sig_sub_high_score = self.get_top(session, Subreddit, RedditObjectStatistics.score, 'score',
+                                                      significant=False)
+                significant_sub_low_score = self.get_top(session, Subreddit, RedditObjectStatistics.score, 'score',
+                                                         significant=True, lowest=True)
+                non_sig_sub_low_score = self.get_top(session, Subreddit, RedditObjectStatistics.score, 'score',
+                                                     significant=False, lowest=True)
 
                 self.subreddit_map = [
                     ('Total Subreddits',
@@ -242,25 +281,18 @@ class DatabaseStatisticsDialog(QDialog):
                 list_with_most_items = list_item_count_query.order_by(desc('count')).first()
                 list_with_fewest_items = list_item_count_query.order_by('count').first()
 
-                list_post_count_sub = session.query(ListAssociation.reddit_object_list_id,
-                                                    Post.significant_reddit_object_id,
-                                                    func.count(Post.id).label('count'))\
-                    .join(Post, Post.significant_reddit_object_id == ListAssociation.reddit_object_id)\
-                    .group_by(ListAssociation.reddit_object_list_id).subquery()
-                list_post_base = session.query(RedditObjectList, 'count')\
-                    .outerjoin(list_post_count_sub, RedditObjectList.id == list_post_count_sub.c.reddit_object_list_id)
-                list_with_most_posts = list_post_base.order_by(desc('count')).first()
-                list_with_fewest_posts = list_post_base.order_by('count').first()
-
-                list_score_sub = session.query(ListAssociation.reddit_object_list_id,
-                                               Post.significant_reddit_object_id,
-                                               func.sum(Post.score).label('score')) \
-                    .join(Post, Post.significant_reddit_object_id == ListAssociation.reddit_object_id) \
-                    .group_by(ListAssociation.reddit_object_list_id).subquery()
-                list_score_base = session.query(RedditObjectList, 'score')\
-                    .outerjoin(list_score_sub, RedditObjectList.id == list_score_sub.c.reddit_object_list_id)
-                list_with_highest_score = list_score_base.order_by(desc('score')).first()
-                list_with_lowest_score = list_score_base.order_by('score').first()
+                list_statistics_base = session.query(
+                    RedditObjectList,
+                    func.sum(RedditObjectStatistics.post_count).label('count'),
+                    func.sum(RedditObjectStatistics.significant_score).label('score')) \
+                    .outerjoin(ListAssociation, ListAssociation.reddit_object_list_id == RedditObjectList.id) \
+                    .outerjoin(RedditObjectStatistics,
+                               RedditObjectStatistics.reddit_object_id == ListAssociation.reddit_object_id) \
+                    .group_by(RedditObjectList.id)
+                list_with_most_posts = list_statistics_base.order_by(desc('count')).first()
+                list_with_fewest_posts = list_statistics_base.order_by('count').first()
+                list_with_highest_score = list_statistics_base.order_by(desc('score')).first()
+                list_with_lowest_score = list_statistics_base.order_by('score').first()
 
                 self.list_map = [
                     ('Total Number of Lists', total_lists),
@@ -821,31 +853,20 @@ class DatabaseStatisticsDialog(QDialog):
         date = datetime.strptime(date_string, '%Y-%m-%d').date()
         return general_utils.format_date(date)
 
-    def get_user_content_count_sub(self, session, ext):
-        return session.query(Content.user_id, func.count(Content.id).label('count')) \
-            .filter(Content.extension.in_(self.get_ext(ext))).group_by(Content.user_id).subquery()
-
-    def get_subreddit_content_count_sub(self, session, ext):
-        return session.query(Content.subreddit_id, func.count(Content.id).label('count')) \
-            .filter(Content.extension.in_(self.get_ext(ext))).group_by(Content.subreddit_id).subquery()
-
-    def get_user_extension_query(self, session, ext):
-        sub = self.get_user_content_count_sub(session, ext)
-        return session.query(User, 'count').outerjoin(sub, sub.c.user_id == User.id).order_by(desc('count')).first()
-
-    def get_sub_extension_query(self, session, ext):
-        sub = self.get_subreddit_content_count_sub(session, ext)
-        return session.query(Subreddit, 'count').outerjoin(sub, sub.c.subreddit_id == Subreddit.id) \
-            .order_by(desc('count')).first()
-
-    def get_ext(self, ext_type):
-        if ext_type == 'IMG':
-            t = const.IMAGE_EXT
-        elif ext_type == 'VID':
-            t = const.VID_EXT
-        else:
-            t = const.GIF_EXT
-        return t
+    def get_top(self, session, model, column, label='count', significant=None, lowest=False):
+        """
+        Returns the user or subreddit with the highest (or lowest) value in the supplied statistics table column along
+        with the value, which is available under the supplied label.
+        :param model: The User or Subreddit model.
+        :param column: The RedditObjectStatistics column to order by.
+        :param significant: If supplied, only reddit objects with this significance are considered.
+        :param lowest: If True, the reddit object with the lowest value is returned instead of the highest.
+        """
+        query = session.query(model, column.label(label)) \
+            .join(RedditObjectStatistics, RedditObjectStatistics.reddit_object_id == model.id).filter(column != None)
+        if significant is not None:
+            query = query.filter(model.significant == significant)
+        return query.order_by(label if lowest else desc(label)).first()
 
     def get_total_row_count(self, session):
         count = 0
@@ -34,6 +34,25 @@ class SettingsManager:
         self.invalid_rename_format = self.get('core', 'invalid_rename_format', '%[dir_name](deleted)')
         self.extraction_thread_count = self.get('core', 'extraction_thread_count', 4)
         self.download_thread_count = self.get('core', 'download_thread_count', 4)
+        # comments are extracted on their own threads so that large comment threads do not hold up link extraction
+        self.comment_thread_count = self.get('core', 'comment_thread_count', 2)
+        self.comment_queue_size = self.get('core', 'comment_queue_size', 50)
+        # max number of items waiting in the queues between listing, extraction and download.  Producers block when
+        # a queue is full so that large first time runs do not pile up submissions in memory ahead of extraction
+        self.submission_queue_size = self.get('core', 'submission_queue_size', 500)
+        self.download_queue_size = self.get('core', 'download_queue_size', 1000)
+        self.validation_thread_count = self.get('core', 'validation_thread_count', 4)
+        # number of reddit objects whose submission listings are fetched from reddit at the same time
+        self.listing_thread_count = self.get('core', 'listing_thread_count', 3)
+        # number of batches of post scores requested from reddit at the same time when updating post scores
+        self.update_thread_count = self.get('core', 'update_thread_count', 2)
+        # reddit objects validated within this many hours are not validated again at the start of a download session
+        self.validation_cache_hours = self.get('core', 'validation_cache_hours', 6)
+        # results of checking names with reddit when adding or importing reddit objects are reused for this many hours
+        self.name_validation_cache_hours = self.get('core', 'name_validation_cache_hours', 168)
+        # when a user download is constrained to a subreddit list, search the subreddits for the users' posts instead of
+        # downloading each user's full listing and discarding the posts made to other subreddits
+        self.search_constrained_user_submissions = self.get('core', 'search_constrained_user_submissions', True)
         self.use_multi_part_downloader = self.get('core', 'use_multi_part_downloader', True)
         self.multi_part_threshold = self.get('core', 'multi_part_threshold', 3 * 1024 * 1024)
         self.multi_part_chunk_size = self.get('core', 'multi_part_chunk_size', 1024 * 1024)
@@ -46,6 +65,12 @@ class SettingsManager:
         self.download_reddit_hosted_videos = self.get('download_defaults', 'download_reddit_hosted_videos', True)
 
         self.perpetual_download = self.get('core', 'perpetual_download', False)
+        # bounds, in seconds, of the time between checks of a reddit object for new posts during a perpetual download.
+        # Within these bounds each object is checked more often the more frequently it has new posts
+        self.perpetual_min_poll_interval = self.get('core', 'perpetual_min_poll_interval', 60)
+        self.perpetual_max_poll_interval = self.get('core', 'perpetual_max_poll_interval', 3600)
+        self.perpetual_poll_jitter = self.get('core', 'perpetual_poll_jitter', 0.1)
+        self.perpetual_post_rate_smoothing = self.get('core', 'perpetual_post_rate_smoothing', 0.3)
         self.cascade_list_changes = self.get('core', 'cascade_list_changes', False)
         self.reddit_access_token = self.get('core', 'reddit_access_token', None)
         self.reddit_access = self.get('core', 'reddit_access', None)
@@ -183,6 +208,20 @@ class SettingsManager:
         self.post_query_limit = self.get('database', 'post_query_limit', 50)
         self.content_query_limit = self.get('database', 'content_query_limit', 10)
         self.comment_query_limit = self.get('database', 'comment_query_limit', 60)
+        # sqlite settings applied to each database connection.  WAL lets the extraction and download threads read while
+        # another thread commits, and NORMAL sync in WAL mode only syncs at checkpoints, so a power loss can lose the
+        # last commits but never corrupts the database.  The cache size is in KiB and the mmap size in bytes
+        self.sqlite_journal_mode = self.get('database', 'sqlite_journal_mode', 'WAL')
+        self.sqlite_synchronous = self.get('database', 'sqlite_synchronous', 'NORMAL')
+        self.sqlite_temp_store = self.get('database', 'sqlite_temp_store', 'MEMORY')
+        self.sqlite_cache_size_kb = self.get('database', 'sqlite_cache_size_kb', 64 * 1024)
+        self.sqlite_mmap_size = self.get('database', 'sqlite_mmap_size', 256 * 1024 * 1024)
+        # milliseconds that a connection waits for another thread's write to finish before raising 'database is locked'
+        self.sqlite_busy_timeout = self.get('database', 'sqlite_busy_timeout', 30000)
+        # status changes and new content from the extraction and download threads are committed together by the
+        # database writer, in groups of up to the batch size or after the max delay in milliseconds
+        self.database_writer_batch_size = self.get('database', 'database_writer_batch_size', 500)
+        self.database_writer_max_delay_ms = self.get('database', 'database_writer_max_delay_ms', 20)
         # endregion
 
         # region Notification Defaults
@@ -0,0 +1,184 @@
+"""
+Process wide pacing of requests made to reddit's api.
+
+Reddit reports the state of the rate limit window in the X-Ratelimit-Remaining, X-Ratelimit-Reset and X-Ratelimit-Used
+headers of every response.  Every praw session created through reddit_utils sends its requests through the single
+RateGovernor in this module, so the download runner's listings, comment extraction, score updates and name validation
+all draw from the same budget.  Requests are spread evenly over the time remaining in the window instead of being sent
+in bursts and then waiting out the reset, which keeps the application from receiving 429 responses.
+
+When more than one thread is waiting to send a request, the request with the highest priority is sent first.  Low
+priority (background) requests are also held back once the remaining budget falls below a reserve, so that they never
+use the last requests of a window that a higher priority request may need.
+"""
+
+import time
+import logging
+import heapq
+from enum import IntEnum
+from itertools import count
+from functools import wraps
+from contextlib import contextmanager
+from threading import Condition, local
+
+
+logger = logging.getLogger(f'DownloaderForReddit.{__name__}')
+
+
+class Priority(IntEnum):
+
+    """Request priorities.  Lower values are sent first."""
+
+    HIGH = 0  # listings, validation and anything the user is waiting on
+    NORMAL = 1
+    LOW = 2  # background updates such as score refreshes
+
+
+class RateGovernor:
+
+    # Fraction of the window's total budget that low priority requests are not allowed to use.
+    LOW_PRIORITY_RESERVE = 0.1
+
+    def __init__(self):
+        self.condition = Condition()
+        self.thread_local = local()
+        self.waiting = []
+        self.sequence = count()
+        self.remaining = None
+        self.used = None
+        self.reset_time = None
+        self.next_request_time = 0
+
+    @property
+    def current_priority(self):
+        """The priority that requests made from the calling thread are sent with."""
+        return getattr(self.thread_local, 'priority', Priority.NORMAL)
+
+    @contextmanager
+    def priority(self, priority):
+        """Sends all requests made from the calling thread within the context with the supplied priority."""
+        previous = self.current_priority
+        self.thread_local.priority = priority
+        try:
+            yield
+        finally:
+            self.thread_local.priority = previous
+
+    def prioritize(self, func, priority=None):
+        """
+        Wraps the supplied function so that, when it is called on another thread (eg: by a thread pool), its requests
+        are sent with the supplied priority.  If no priority is supplied, the calling thread's current priority is used.
+        """
+        priority = self.current_priority if priority is None else priority
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.priority(priority):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def acquire(self, priority=None):
+        """
+        Blocks until a request with the supplied priority may be sent without exceeding the rate limit.  If no priority
+        is supplied, the calling thread's current priority is used.
+        """
+        priority = self.current_priority if priority is None else priority
+        ticket = (priority, next(self.sequence))
+        with self.condition:
+            heapq.heappush(self.waiting, ticket)
+            try:
+                while True:
+                    if self.waiting[0] == ticket:
+                        wait_time = self.get_wait_time(priority)
+                        if wait_time <= 0:
+                            break
+                        logger.debug('Waiting for rate limit', extra={'wait_time': round(wait_time, 2),
+                                                                      'priority': priority.name})
+                        self.condition.wait(wait_time)
+                    else:
+                        self.condition.wait()
+            finally:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                self.condition.notify_all()
+            now = time.monotonic()
+            self.next_request_time = now + self.get_interval(now)
+            if self.remaining is not None:
+                # counted now so that requests sent before this one's response arrives are included in the budget
+                self.remaining -= 1
+
+    def get_wait_time(self, priority):
+        now = time.monotonic()
+        if self.reset_time is not None and now >= self.reset_time:
+            self.remaining = None
+            self.reset_time = None
+        if self.remaining is not None:
+            if self.remaining <= 0 or \
+                    (priority >= Priority.LOW and self.remaining <= self.get_budget() * self.LOW_PRIORITY_RESERVE):
+                return self.reset_time - now
+        return self.next_request_time - now
+
+    def get_interval(self, now):
+        """Returns the time that should be left between requests to spread the remaining budget over the window."""
+        if self.remaining is None or self.reset_time is None:
+            return 0
+        return max(self.reset_time - now, 0) / max(self.remaining, 1)
+
+    def get_budget(self):
+        return self.remaining + (self.used or 0)
+
+    def update(self, headers):
+        """Updates the state of the rate limit window from the headers of a response received from reddit."""
+        if 'x-ratelimit-remaining' not in headers:
+            return
+        with self.condition:
+            now = time.monotonic()
+            self.remaining = float(headers['x-ratelimit-remaining'])
+            self.used = int(float(headers.get('x-ratelimit-used', 0)))
+            self.reset_time = now + int(float(headers['x-ratelimit-reset']))
+            self.next_request_time = min(self.next_request_time, now + self.get_interval(now))
+            self.condition.notify_all()
+
+
+class GovernedRateLimiter:
+
+    """
+    Stands in for prawcore's RateLimiter on a praw session so that the session's requests are paced by the supplied
+    governor.  The remaining, used and reset_timestamp attributes are provided for praw's Auth.limits.
+    """
+
+    def __init__(self, governor):
+        self.governor = governor
+
+    @property
+    def remaining(self):
+        return self.governor.remaining
+
+    @property
+    def used(self):
+        return self.governor.used
+
+    @property
+    def reset_timestamp(self):
+        if self.governor.reset_time is None:
+            return None
+        return time.time() + self.governor.reset_time - time.monotonic()
+
+    def call(self, request_function, set_header_callback, *args, **kwargs):
+        self.governor.acquire()
+        kwargs['headers'] = set_header_callback()
+        response = request_function(*args, **kwargs)
+        self.governor.update(response.headers)
+        return response
+
+
+def install(reddit, governor=None):
+    """Replaces the rate limiter of each of the supplied praw instance's sessions with one paced by the governor."""
+    governor = governor or rate_governor
+    for session in (getattr(reddit, '_read_only_core', None), getattr(reddit, '_authorized_core', None)):
+        if session is not None and hasattr(session, '_rate_limiter'):
+            session._rate_limiter = GovernedRateLimiter(governor)
+
+
+rate_governor = RateGovernor()
@@ -26,11 +26,13 @@ import praw
 import prawcore
 import logging
 from datetime import datetime
+from threading import RLock
+from concurrent.futures import ThreadPoolExecutor
 from collections import namedtuple
 from cryptography.fernet import Fernet
 
 from ..version import __version__
-from ..utils import injector
+from ..utils import injector, rate_governor
 
 
 TOKEN_SCOPES = ['identity', 'mysubreddits', 'subscribe', 'account', 'history', 'read']
@@ -41,18 +43,77 @@ REDIRECT_URL = 'http://127.0.0.1:8086/'
 
 
 logger = logging.getLogger('DownloaderForReddit.{}'.format(__name__))
-ValidationSet = namedtuple('ValidationSet', 'name date_created valid')
+# error is True when a name could not be checked for a reason other than the name not existing
+ValidationSet = namedtuple('ValidationSet', 'name date_created valid error', defaults=(False,))
 connection_is_authorized = False
 _token = None
 
+_reddit_instance = None
+_reddit_instance_token = None
+_reddit_instance_lock = RLock()
+
 
 def get_reddit_instance():
-    global connection_is_authorized
-    if _token is not None:
-        connection_is_authorized = True
-        return praw.Reddit(client_id=CLIENT_ID, user_agent=USER_AGENT, client_secret=None, refresh_token=_token)
-    connection_is_authorized = False
-    return praw.Reddit(client_id=CLIENT_ID, user_agent=USER_AGENT, client_secret=None, redirect_uri=REDIRECT_URL)
+    """
+    Returns the praw Reddit instance that is shared by the whole application.  The instance is created the first time
+    it is requested and is reused until the authorization state changes (a user logs in or out), at which point a new
+    instance is made for the new token.  Reusing the instance means the OAuth access token is only refreshed when it
+    expires.  Every request the instance makes is paced by the process wide rate governor.
+
+    Thread safety: the shared instance may be used to make requests from any thread.  Refreshing the access token is
+    guarded by a lock so that concurrent requests reuse a single refresh instead of each requesting a new token.  The
+    lazy praw models returned by the instance (Redditor, Subreddit, Submission, etc.) are not thread safe and should not
+    be shared between threads while they are being fetched.  Callers should not cache the instance for longer than a
+    single run, as it is replaced when the authorization state changes.
+    """
+    global connection_is_authorized, _reddit_instance, _reddit_instance_token
+    with _reddit_instance_lock:
+        if _reddit_instance is None or _reddit_instance_token != _token:
+            _reddit_instance = create_reddit_instance(_token)
+            _reddit_instance_token = _token
+        connection_is_authorized = _token is not None
+        return _reddit_instance
+
+
+def create_reddit_instance(token):
+    if token is not None:
+        reddit = praw.Reddit(client_id=CLIENT_ID, user_agent=USER_AGENT, client_secret=None, refresh_token=token)
+    else:
+        reddit = praw.Reddit(client_id=CLIENT_ID, user_agent=USER_AGENT, client_secret=None,
+                             redirect_uri=REDIRECT_URL)
+    make_token_refresh_thread_safe(reddit)
+    rate_governor.install(reddit)
+    return reddit
+
+
+def make_token_refresh_thread_safe(reddit):
+    """
+    Wraps the header callback of each of the supplied instance's prawcore sessions so that only one thread at a time
+    can check and refresh the session's access token.
+    """
+    lock = RLock()
+    for session in (getattr(reddit, '_read_only_core', None), getattr(reddit, '_authorized_core', None)):
+        callback = getattr(session, '_set_header_callback', None)
+        if callback is None or getattr(callback, 'thread_safe', False):
+            continue
+
+        def locked_callback(callback=callback):
+            with lock:
+                return callback()
+
+        locked_callback.thread_safe = True
+        session._set_header_callback = locked_callback
+
+
+def invalidate_reddit_instance():
+    """
+    Discards the shared reddit instance so that the next call to get_reddit_instance creates a new one with the
+    current authorization state.
+    """
+    global _reddit_instance, _reddit_instance_token
+    with _reddit_instance_lock:
+        _reddit_instance = None
+        _reddit_instance_token = None
 
 
 def save_token(raw_token):
@@ -66,6 +127,7 @@ def save_token(raw_token):
     settings_manager.reddit_access_token = t.decode()
     settings_manager.reddit_access = key.decode()
     _token = raw_token
+    invalidate_reddit_instance()
 
 
 def delete_token():
@@ -76,6 +138,7 @@ def delete_token():
     settings_manager.reddit_access = None
     connection_is_authorized = False
     _token = None
+    invalidate_reddit_instance()
 
 
 def load_token():
@@ -153,10 +216,12 @@ class NameChecker:
         self.object_type = object_type
 
     def check_reddit_object_name(self, name):
-        if self.object_type == 'USER':
-            return self.check_user_name(name)
-        else:
-            return self.check_subreddit_name(name)
+        # the user is waiting on the result, so the check is sent ahead of background requests
+        with rate_governor.rate_governor.priority(rate_governor.Priority.HIGH):
+            if self.object_type == 'USER':
+                return self.check_user_name(name)
+            else:
+                return self.check_subreddit_name(name)
 
     def check_user_name(self, name):
         user = self.r.redditor(name)
@@ -172,7 +237,7 @@ class NameChecker:
             return ValidationSet(name=name, date_created=None, valid=False)
         except:
             self.logger.error('Unable to validate user name', extra={'user_name': name}, exc_info=True)
-            return ValidationSet(name=name, date_created=None, valid=False)
+            return ValidationSet(name=name, date_created=None, valid=False, error=True)
 
     def check_subreddit_name(self, name):
         sub = self.r.subreddit(name)
@@ -185,4 +250,41 @@ class NameChecker:
             return ValidationSet(name=name, date_created=None, valid=False)
         except:
             self.logger.error('Unable to validate subreddit name', extra={'subreddit_name': name}, exc_info=True)
-            return ValidationSet(name=name, date_created=None, valid=False)
+            return ValidationSet(name=name, date_created=None, valid=False, error=True)
+
+    def check_names(self, names):
+        """
+        Checks a batch of names with reddit.  Subreddit names are first looked up through reddit's info endpoint, one
+        hundred names per request.  User names, and any subreddits that the info endpoint did not confirm, are checked
+        individually on a thread pool sized by the settings manager's validation_thread_count, with the pace of the
+        requests set by the rate governor.
+        :param names: The names that are to be checked.
+        :return: A dict of ValidationSets keyed by the lower case version of each supplied name.
+        """
+        names = {name.lower(): name for name in names}
+        results = {}
+        if self.object_type == 'SUBREDDIT':
+            results.update(self.check_subreddit_batch(list(names.values())))
+        pending = [name for key, name in names.items() if key not in results]
+        thread_count = max(1, injector.get_settings_manager().validation_thread_count)
+        with ThreadPoolExecutor(max_workers=thread_count) as executor:
+            for name, validation_set in zip(pending, executor.map(self.check_reddit_object_name, pending)):
+                results[name.lower()] = validation_set
+        return results
+
+    def check_subreddit_batch(self, names):
+        """
+        Looks up the supplied subreddit names through reddit's info endpoint.  Subreddits that are not returned, and
+        private subreddits, are left out of the results so that they can be checked individually.
+        :return: A dict of ValidationSets for the confirmed subreddits keyed by lower case subreddit name.
+        """
+        results = {}
+        with rate_governor.rate_governor.priority(rate_governor.Priority.HIGH):
+            try:
+                for sub in self.r.info(subreddits=names):
+                    if getattr(sub, 'subreddit_type', None) != 'private':
+                        results[sub.display_name.lower()] = ValidationSet(
+                            name=sub.display_name, date_created=datetime.fromtimestamp(sub.created), valid=True)
+            except Exception:
+                self.logger.warning('Failed to validate subreddit batch', exc_info=True)
+        return results
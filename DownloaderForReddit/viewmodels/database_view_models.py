@@ -1,4 +1,6 @@
 import os
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from PyQt5.QtCore import (QAbstractListModel, QAbstractTableModel, QAbstractItemModel, Qt, QSize, QModelIndex, QVariant,
                           pyqtSignal)
 from PyQt5.QtGui import QPixmap, QIcon, QColor
@@ -7,12 +9,19 @@ from ..core import const
 from ..utils import injector
 
 
+# shared by every model so that the background queries of all open database views run on the same few threads, which
+# outlive any one dialog
+background_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='DatabaseViewModel')
+
+
 class CustomItemModel:
 
     update_count = pyqtSignal(tuple)
+    count_finished = pyqtSignal(int, int)
 
     def __init__(self):
         super().__init__()
+        self.logger = logging.getLogger(f'DownloaderForReddit.{__name__}')
         self.settings_manager = injector.get_settings_manager()
         self.db = injector.get_database_handler()
         self.limit = 50
@@ -22,9 +31,15 @@ class CustomItemModel:
         self.loading = False
         self.last_count = 0
 
+        self.query_count = 0
+        self.next_key = None
+        self.prefetch = None
+        self.closed = False
+        self.count_finished.connect(self.set_total_items)
+
     @property
     def has_next_page(self):
-        return len(self.items) < self.total_items
+        return self.next_key is not None
 
     def contains(self, item):
         return item in self.items
@@ -64,9 +79,13 @@ class CustomItemModel:
         except:
             pass
 
-    def set_data(self, query):
-        self.total_items = query.count()
-        data = query.limit(self.limit).all()
+    def set_data(self, query, keyset):
+        """
+        Replaces the items in the model with the first page of the supplied query.
+        :param query: The query to display, ordered by the filter that supplied the keyset.
+        :param keyset: The keyset of the filter that ordered the query.  It is used to seek to the following pages.
+        """
+        data = self.get_first_page(query, keyset)
         self.beginRemoveRows(QModelIndex(), 0, len(self.items))
         self.items.clear()
         self.endRemoveRows()
@@ -74,15 +93,117 @@ class CustomItemModel:
         self.items = data
         self.endInsertRows()
 
-    def load_next_page(self, query):
+    def load_next_page(self, query, keyset):
         if self.has_next_page and not self.loading:
             self.loading = True
-            data = query.offset(len(self.items)).limit(self.limit).all()
+            data = self.get_next_page(query, keyset)
             self.beginInsertRows(QModelIndex(), 0, len(data))
             self.items.extend(data)
             self.endInsertRows()
             self.loading = False
 
+    def get_first_page(self, query, keyset):
+        """
+        Selects the first page of a new query.  The items that the query returns are counted on a background thread,
+        so the total item count is None until the count is finished.
+        """
+        self.query_count += 1
+        self.total_items = None
+        self.prefetch = None
+        self.count_items(query)
+        return self.load_page(query, keyset, self.get_page_rows(query.session, query, keyset, None))
+
+    def get_next_page(self, query, keyset):
+        """
+        Selects the page that follows the last loaded page.  The rows of the page are usually prefetched while the
+        last page was displayed, in which case only the items on the page have to be loaded.
+        """
+        rows = None
+        if self.prefetch is not None:
+            key, future = self.prefetch
+            if key == self.next_key:
+                try:
+                    rows = future.result()
+                except Exception:
+                    self.logger.warning('Failed to prefetch next page', exc_info=True)
+        if rows is None:
+            rows = self.get_page_rows(query.session, query, keyset, self.next_key)
+        return self.load_page(query, keyset, rows)
+
+    def get_page_rows(self, session, query, keyset, key):
+        """
+        Returns the (id, order value) rows of the page that follows the supplied key.  One row more than the page limit
+        is selected to find out if there is another page after this one.
+        """
+        page_query = keyset.seek(keyset.columns(query.with_session(session)), key)
+        return page_query.limit(self.limit + 1).all()
+
+    def load_page(self, query, keyset, rows):
+        """
+        Loads the items of the page that the supplied rows select, in the order of the rows, and starts prefetching the
+        rows of the page after it.
+        """
+        rows, extra_rows = rows[:self.limit], rows[self.limit:]
+        self.next_key = keyset.get_key(rows[-1]) if extra_rows else None
+        ids = [row[0] for row in rows]
+        model = keyset.model
+        items = {item.id: item for item in query.session.query(model).filter(model.id.in_(ids))} if ids else {}
+        if self.next_key is not None:
+            self.prefetch = (self.next_key, self.run_in_background(self.get_page_rows, query, keyset, self.next_key))
+        else:
+            self.prefetch = None
+        return [items[x] for x in ids if x in items]
+
+    def count_items(self, query):
+        query_count = self.query_count
+        future = self.run_in_background(lambda session: query.with_session(session).order_by(None).count())
+        future.add_done_callback(lambda f: self.finish_count(query_count, f))
+
+    def finish_count(self, query_count, future):
+        if future.exception() is not None:
+            self.logger.error('Failed to count items', exc_info=future.exception())
+        elif not self.closed and query_count == self.query_count:
+            try:
+                self.count_finished.emit(query_count, future.result())
+            except RuntimeError:
+                # the model was deleted by Qt between the check above and the emit
+                pass
+
+    def set_total_items(self, query_count, total_items):
+        if query_count == self.query_count:
+            self.total_items = total_items
+            self.update_count.emit((len(self.items), total_items))
+
+    def run_in_background(self, method, *args):
+        """
+        Calls the supplied method with a new session on a background thread and returns a future for its result.  An
+        in memory database can only be used from the thread that created it, so for an in memory database the method
+        is called straight away.
+        """
+        if not self.db.in_memory:
+            return background_executor.submit(self.call_with_session, method, *args)
+        future = Future()
+        try:
+            future.set_result(self.call_with_session(method, *args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def close(self):
+        """
+        Marks the model as closed so that the results of background queries that are still running when the view that
+        displays the model is closed are discarded instead of being sent to the deleted model.
+        """
+        self.closed = True
+        self.query_count += 1
+        if self.prefetch is not None:
+            self.prefetch[1].cancel()
+            self.prefetch = None
+
+    def call_with_session(self, method, *args):
+        with self.db.get_scoped_session() as session:
+            return method(session, *args)
+
     def rowCount(self, parent=None, *args, **kwargs):
         row_count = len(self.items)
         if row_count != self.last_count:
@@ -209,9 +330,9 @@ class ContentListModel(QAbstractListModel, CustomItemModel):
         self.limit = self.settings_manager.content_query_limit
         self.icon_map = {}
 
-    def set_data(self, query):
+    def set_data(self, query, keyset):
         self.icon_map.clear()
-        super().set_data(query)
+        super().set_data(query, keyset)
 
     def data(self, index, role=None):
         if index.isValid():
@@ -319,9 +440,8 @@ class CommentTreeModel(QAbstractItemModel, CustomItemModel):
         except AttributeError:
             return None
 
-    def set_data(self, query):
-        self.total_items = query.count()
-        data = query.limit(self.limit).all()
+    def set_data(self, query, keyset):
+        data = self.get_first_page(query, keyset)
         self.beginRemoveRows(QModelIndex(), 0, len(self.items))
         self.items.clear()
         self.root = TreeItem(None, None)
@@ -332,15 +452,16 @@ class CommentTreeModel(QAbstractItemModel, CustomItemModel):
             self.add_tree_item(comment, self.root)
         self.endInsertRows()
 
-    def load_next_page(self, query):
+    def load_next_page(self, query, keyset):
         if self.has_next_page and not self.loading:
             self.loading = True
-            data = query.offset(len(self.items)).limit(self.limit).all()
+            data = self.get_next_page(query, keyset)
             self.beginInsertRows(QModelIndex(), 0, len(data))
             self.items.extend(data)
             for comment in data:
                 self.add_tree_item(comment, self.root)
             self.endInsertRows()
+            self.loading = False
 
     def add_tree_item(self, comment, parent):
         item = TreeItem(comment, parent)
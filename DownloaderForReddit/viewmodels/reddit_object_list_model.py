@@ -376,8 +376,7 @@ class ObjectValidator(QObject):
 
     def run(self):
         object_creator = RedditObjectCreator(self.list_type)
-        for name in self.name_list:
-            creation_tuple = object_creator.create_reddit_object(name, self.list_defaults)
+        for name, creation_tuple in object_creator.create_reddit_objects(self.name_list, self.list_defaults).items():
             if creation_tuple is not None:
                 reddit_object_id, created = creation_tuple
                 self.new_object_signal.emit(reddit_object_id)
@@ -74,6 +74,7 @@ def get_post(**kwargs):
     session = kwargs.get('session', None)
     if session is not None:
         session.add(post)
+        session.flush()
     return post
 
 
@@ -199,6 +200,10 @@ class MockPrawSubmission:
         self.id = _id
         self.domain = 'reddit'
 
+    @property
+    def fullname(self):
+        return f't3_{self.id}'
+
 
 class MockPrawSubreddit:
 
@@ -0,0 +1,126 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+from threading import Event
+
+from praw.models import MoreComments
+
+from DownloaderForReddit.core.comment_handler import CommentHandler
+from DownloaderForReddit.core.submittable_creator import SubmittableCreator
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.models import Comment
+from DownloaderForReddit.database.model_enums import CommentDownload
+from DownloaderForReddit.utils import injector
+from Tests.mockobjects.mock_objects import get_user, get_post
+
+
+def make_comment(reddit_id, parent, replies=None):
+    comment = MagicMock(id=reddit_id, fullname=f't1_{reddit_id}', parent_id=parent, replies=replies or [],
+                        body=f'body {reddit_id}', body_html=f'<p>body {reddit_id}</p>', score=10, created=1500000000,
+                        is_submitter=False)
+    comment.author.name = 'CommentAuthor'
+    comment.subreddit.display_name = 'TestSubreddit'
+    return comment
+
+
+def make_more(parent, children):
+    return MoreComments(None, _data={'parent_id': parent, 'children': children, 'count': len(children)})
+
+
+@patch('DownloaderForReddit.core.comment_handler.reddit_utils.get_reddit_instance')
+class TestCommentHandler(TestCase):
+
+    def setUp(self):
+        injector.database_handler = DatabaseHandler(in_memory=True)
+        SubmittableCreator.db = None
+        SubmittableCreator.clear_cache()
+        self.db = injector.database_handler
+        self.session = self.db.get_session()
+        self.user = get_user(extract_comments=CommentDownload.DOWNLOAD, comment_depth=3, comment_reply_limit=2)
+        self.post = get_post(user=self.user, session=self.session)
+        self.session.commit()
+        self.submission = MagicMock(fullname='t3_post')
+
+    def tearDown(self):
+        self.session.close()
+
+    def get_parents(self):
+        comments = self.session.query(Comment).all()
+        by_id = {comment.id: comment.reddit_id for comment in comments}
+        return {comment.reddit_id: by_id.get(comment.parent_id) for comment in comments}
+
+    def test_extract_comments_breadth_first(self, get_reddit_instance):
+        level_three = make_comment('c3', 't1_c2', replies=[make_comment('c4', 't1_c3')])
+        level_two = [make_comment('c2', 't1_c1', replies=[level_three]), make_comment('c2b', 't1_c1'),
+                     make_comment('c2c', 't1_c1')]
+        self.submission.comments = [make_comment('c1', 't3_post', replies=level_two), make_comment('d1', 't3_post')]
+
+        handler = CommentHandler(self.submission, self.post, None, Event(), session=self.session)
+        handler.run()
+
+        # depth limit of 3 leaves out c4, reply limit of 2 leaves out c2c
+        self.assertEqual({'c1': None, 'd1': None, 'c2': 'c1', 'c2b': 'c1', 'c3': 'c2'}, self.get_parents())
+        get_reddit_instance.return_value.post.assert_not_called()
+
+    def test_more_children_requested_in_one_batch(self, get_reddit_instance):
+        reddit = get_reddit_instance.return_value
+        nested = make_comment('m2', 't1_m1')
+        reddit.post.return_value = [make_comment('m1', 't3_post'), nested, make_comment('n1', 't3_post')]
+        self.submission.comments = [make_comment('c1', 't3_post'), make_more('t3_post', ['m1', 'n1'])]
+
+        handler = CommentHandler(self.submission, self.post, None, Event(), session=self.session)
+        handler.run()
+
+        self.assertEqual({'c1': None, 'm1': None, 'n1': None, 'm2': 'm1'}, self.get_parents())
+        reddit.post.assert_called_once()
+        data = reddit.post.call_args[1]['data']
+        self.assertEqual('m1,n1', data['children'])
+        self.assertEqual(3, data['depth'])
+        self.assertEqual('t3_post', data['link_id'])
+
+    def test_existing_comments_not_duplicated_but_replies_extracted(self, get_reddit_instance):
+        self.user.download_comments = CommentDownload.DOWNLOAD
+        self.submission.comments = [make_comment('c1', 't3_post')]
+        CommentHandler(self.submission, self.post, None, Event(), session=self.session).run()
+
+        self.submission.comments = [make_comment('c1', 't3_post', replies=[make_comment('c2', 't1_c1')])]
+        handler = CommentHandler(self.submission, self.post, None, Event(), session=self.session)
+        handler.run()
+
+        self.assertEqual({'c1': None, 'c2': 'c1'}, self.get_parents())
+        self.assertEqual(['c2'], [comment.reddit_id for comment in handler.comments_to_download])
+
+
+class TestCommentHandlerDatabaseFile(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock(database_writer_batch_size=10, database_writer_max_delay_ms=10)
+        self.directory = tempfile.TemporaryDirectory()
+        # a short busy timeout makes a held write lock fail the test quickly instead of stalling it
+        injector.database_handler = DatabaseHandler(database_path=os.path.join(self.directory.name, 'test.db'),
+                                                    pragmas=[('journal_mode', 'WAL'), ('busy_timeout', 100)])
+        SubmittableCreator.db = None
+        SubmittableCreator.clear_cache()
+        self.db = injector.database_handler
+        self.session = self.db.get_session()
+        self.user = get_user(extract_comments=CommentDownload.DOWNLOAD, comment_depth=1)
+        self.post = get_post(user=self.user, session=self.session)
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        self.db.engine.dispose()
+        self.directory.cleanup()
+
+    def test_store_level_with_new_authors(self):
+        comments = [make_comment('c1', 't3_post'), make_comment('c2', 't3_post')]
+        for comment, author in zip(comments, ('NewAuthorOne', 'NewAuthorTwo')):
+            comment.author.name = author
+        handler = CommentHandler(MagicMock(fullname='t3_post'), self.post, None, Event(), session=self.session)
+
+        comment_ids = handler.store_level([(comment, None) for comment in comments], self.session)
+
+        self.assertEqual(2, len([x for x in comment_ids.values() if x is not None]))
+        authors = {comment.reddit_id: comment.author.name for comment in self.session.query(Comment)}
+        self.assertEqual({'c1': 'NewAuthorOne', 'c2': 'NewAuthorTwo'}, authors)
@@ -0,0 +1,103 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+from concurrent.futures import Future
+from queue import Queue
+from threading import Event
+
+from DownloaderForReddit.core.content_runner import ContentRunner
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.models import Post
+from DownloaderForReddit.utils import injector
+from DownloaderForReddit.database.model_enums import CommentDownload
+from Tests.mockobjects.mock_objects import get_post, get_user, get_subreddit
+
+
+class InlineExecutor:
+
+    """Runs submitted tasks on the calling thread, as the in memory test database can only be used from one thread."""
+
+    def __init__(self, max_workers=None):
+        self.submitted = []
+
+    def submit(self, func, **kwargs):
+        self.submitted.append(func)
+        future = Future()
+        future.set_result(func(**kwargs))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+@patch('DownloaderForReddit.core.content_runner.ThreadPoolExecutor', InlineExecutor)
+@patch('DownloaderForReddit.core.content_runner.SubmissionHandler')
+@patch('DownloaderForReddit.core.content_runner.SubmittableCreator')
+class TestContentRunner(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock(extraction_thread_count=2, comment_thread_count=1, comment_queue_size=2)
+        injector.database_handler = DatabaseHandler(in_memory=True)
+        self.db = injector.database_handler
+        with self.db.get_scoped_session() as session:
+            user = get_user(extract_comments=CommentDownload.DOWNLOAD)
+            subreddit = get_subreddit()
+            session.add(user)
+            posts = [get_post(reddit_id=f'abc{x}', user=user, subreddit=subreddit, session=session) for x in range(5)]
+            session.commit()
+            self.post_ids = {f'abc{x}': post.id for x, post in enumerate(posts)}
+            self.user_id = user.id
+
+        self.submission_queue = Queue()
+        self.download_queue = Queue()
+
+    def run_runner(self):
+        # made here instead of in setUp so that the runner's executors are made while the executor is patched
+        self.runner = ContentRunner(self.submission_queue, self.download_queue, 1, Event())
+        self.runner.run()
+
+    def create_post(self, submission, significant_id, session, download_session_id):
+        return session.query(Post).get(self.post_ids[submission.id])
+
+    def test_comments_extracted_on_comment_stage(self, creator, submission_handler):
+        creator.create_post.side_effect = self.create_post
+        submissions = [MagicMock(id=reddit_id) for reddit_id in self.post_ids]
+        for submission in submissions:
+            self.submission_queue.put(('SUBMISSION', submission, self.user_id))
+        self.submission_queue.put(None)
+
+        self.run_runner()
+
+        handler = submission_handler.return_value
+        self.assertEqual(5, handler.extract_submission.call_count)
+        self.assertEqual(5, handler.extract_comments.call_count)
+        self.assertEqual(5, len(self.runner.comment_executor.submitted))
+        # the comment stage's handlers are made with the submission handed over from the extraction stage
+        handler_submissions = [x[0][0] for x in submission_handler.call_args_list]
+        for submission in submissions:
+            self.assertEqual(2, handler_submissions.count(submission))
+        self.assertIsNone(self.download_queue.get_nowait())
+
+    @patch('DownloaderForReddit.utils.reddit_utils.get_reddit_instance')
+    def test_finished_post_comments_fetch_submission(self, get_reddit_instance, creator, submission_handler):
+        self.submission_queue.put(('POST', self.post_ids['abc0'], self.user_id))
+        self.submission_queue.put(None)
+
+        self.run_runner()
+
+        get_reddit_instance.return_value.submission.assert_called_once_with('abc0')
+        submission_handler.return_value.extract_comments.assert_called_once()
+        self.assertEqual(get_reddit_instance.return_value.submission.return_value,
+                         submission_handler.call_args_list[-1][0][0])
+
+    def test_comments_not_queued_when_not_run(self, creator, submission_handler):
+        with self.db.get_scoped_session() as session:
+            session.query(Post).get(self.post_ids['abc0']).significant_reddit_object.extract_comments = CommentDownload.DO_NOT_DOWNLOAD
+            session.commit()
+        creator.create_post.side_effect = self.create_post
+        self.submission_queue.put(('SUBMISSION', MagicMock(id='abc0'), self.user_id))
+        self.submission_queue.put(None)
+
+        self.run_runner()
+
+        submission_handler.return_value.extract_submission.assert_called_once()
+        submission_handler.return_value.extract_comments.assert_not_called()
@@ -1,10 +1,19 @@
 from unittest import TestCase
 from unittest.mock import patch, MagicMock
 import logging
+from threading import Event
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
-from DownloaderForReddit.core.download_runner import DownloadRunner
+import prawcore
+from praw.models import Redditor
+
+from DownloaderForReddit.core import const
+from DownloaderForReddit.core.download_runner import (DownloadRunner, SEARCH_RESULT_LIMIT, SEARCH_SUBREDDIT_CHUNK_SIZE,
+                                                      STATISTICS_REFRESH_INTERVAL, QUEUE_DEPTH_REPORT_INTERVAL)
+from DownloaderForReddit.core.validation_cache import validation_cache
 from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.model_enums import PostSortMethod
 from DownloaderForReddit.utils import injector
 from Tests.mockobjects.mock_objects import MockPrawSubmission, get_user, get_subreddit
 
@@ -30,6 +39,9 @@ class TestDownloadRunner(TestCase):
     def setUpClass(cls):
         cls.now = datetime.now()
         cls.settings_manager = MagicMock()
+        cls.settings_manager.listing_thread_count = 1
+        cls.settings_manager.validation_thread_count = 2
+        cls.settings_manager.perpetual_download = False
         injector.settings_manager = cls.settings_manager
         injector.database_handler = DatabaseHandler(in_memory=True)
 
@@ -38,6 +50,7 @@ class TestDownloadRunner(TestCase):
     @patch(f'{DL}.get_reddit_object_submissions')
     def test_setup_for_user_download(self, get_ro_submissions, get_user_submissions, get_sub_submissions, reddit_utils):
         download_runner = DownloadRunner(user_id_list=[2, 3, 4])
+        download_runner.reddit_instance = MagicMock()
         download_runner.run_download()
         get_ro_submissions.assert_not_called()
         get_user_submissions.assert_called()
@@ -49,6 +62,7 @@ class TestDownloadRunner(TestCase):
     def test_setup_for_subreddit_download(self, get_ro_submissions, get_user_submissions, get_sub_submissions,
                                           reddit_utils):
         download_runner = DownloadRunner(subreddit_id_list=[2, 3, 4])
+        download_runner.reddit_instance = MagicMock()
         download_runner.run_download()
         get_ro_submissions.assert_not_called()
         get_user_submissions.assert_not_called()
@@ -59,6 +73,7 @@ class TestDownloadRunner(TestCase):
     @patch(f'{DL}.get_reddit_object_submissions')
     def test_setup_for_ro_download(self, get_ro_submissions, get_user_submissions, get_sub_submissions, reddit_utils):
         download_runner = DownloadRunner(reddit_object_id_list=[2, 3, 4])
+        download_runner.reddit_instance = MagicMock()
         download_runner.run_download()
         get_ro_submissions.assert_called()
         get_user_submissions.assert_not_called()
@@ -71,6 +86,7 @@ class TestDownloadRunner(TestCase):
     def test_setup_for_restricted_download(self, get_ro_submissions, get_user_submissions, get_sub_submissions,
                                            validate_subreddit_list, reddit_utils):
         download_runner = DownloadRunner(user_id_list=[2, 3, 4], subreddit_id_list=[4, 6, 2])
+        download_runner.reddit_instance = MagicMock()
         download_runner.run_download()
         get_ro_submissions.assert_not_called()
         get_user_submissions.assert_called()
@@ -90,7 +106,7 @@ class TestDownloadRunner(TestCase):
         self.assertEqual(20, len(mock_submissions))
 
         download_runner = DownloadRunner()
-        submissions = download_runner.get_submissions(None, user)
+        submissions = list(download_runner.get_submissions(None, user))
 
         self.assertEqual(8, len(submissions))
         for sub in submissions:
@@ -109,7 +125,7 @@ class TestDownloadRunner(TestCase):
         self.assertEqual(20, len(mock_submissions))
 
         download_runner = DownloadRunner()
-        submissions = download_runner.get_submissions(None, user)
+        submissions = list(download_runner.get_submissions(None, user))
 
         self.assertEqual(10, len(submissions))
         stickied = 0
@@ -129,7 +145,7 @@ class TestDownloadRunner(TestCase):
         self.assertEqual(20, len(mock_submissions))
 
         download_runner = DownloadRunner()
-        submissions = download_runner.get_submissions(None, user)
+        submissions = list(download_runner.get_submissions(None, user))
 
         self.assertEqual(10, len(submissions))
         for sub in submissions:
@@ -157,8 +173,8 @@ class TestDownloadRunner(TestCase):
 
         download_runner = DownloadRunner()
         download_runner.filter_subreddits = True
-        download_runner.validated_subreddits.append(allowed_subreddit.display_name)
-        submissions = download_runner.get_submissions(None, user)
+        download_runner.validated_subreddits.add(allowed_subreddit.display_name.lower())
+        submissions = list(download_runner.get_submissions(None, user))
 
         self.assertEqual(8, len(submissions))
         for sub in submissions:
@@ -188,8 +204,8 @@ class TestDownloadRunner(TestCase):
 
         download_runner = DownloadRunner()
         download_runner.filter_subreddits = True
-        download_runner.validated_subreddits.append(allowed_subreddit.display_name)
-        submissions = download_runner.get_submissions(None, user)
+        download_runner.validated_subreddits.add(allowed_subreddit.display_name.lower())
+        submissions = list(download_runner.get_submissions(None, user))
 
         self.assertEqual(10, len(submissions))
         stickied = 0
@@ -219,8 +235,8 @@ class TestDownloadRunner(TestCase):
 
         download_runner = DownloadRunner()
         download_runner.filter_subreddits = True
-        download_runner.validated_subreddits.append(allowed_subreddit.display_name)
-        submissions = download_runner.get_submissions(None, user)
+        download_runner.validated_subreddits.add(allowed_subreddit.display_name.lower())
+        submissions = list(download_runner.get_submissions(None, user))
 
         self.assertEqual(10, len(submissions))
         for sub in submissions:
@@ -261,7 +277,7 @@ class TestDownloadRunner(TestCase):
         self.assertEqual(20, len(mock_submissions))
 
         download_runner = DownloadRunner()
-        submissions = download_runner.get_submissions(None, user)
+        submissions = list(download_runner.get_submissions(None, user))
 
         self.assertEqual(8, len(submissions))
         for sub in submissions:
@@ -280,7 +296,7 @@ class TestDownloadRunner(TestCase):
         self.assertEqual(20, len(mock_submissions))
 
         download_runner = DownloadRunner()
-        submissions = download_runner.get_submissions(None, user)
+        submissions = list(download_runner.get_submissions(None, user))
 
         self.assertEqual(10, len(submissions))
         pinned = 0
@@ -312,8 +328,8 @@ class TestDownloadRunner(TestCase):
 
         download_runner = DownloadRunner()
         download_runner.filter_subreddits = True
-        download_runner.validated_subreddits.append(allowed_subreddit.display_name)
-        submissions = download_runner.get_submissions(None, user)
+        download_runner.validated_subreddits.add(allowed_subreddit.display_name.lower())
+        submissions = list(download_runner.get_submissions(None, user))
 
         self.assertEqual(8, len(submissions))
         for sub in submissions:
@@ -343,8 +359,8 @@ class TestDownloadRunner(TestCase):
 
         download_runner = DownloadRunner()
         download_runner.filter_subreddits = True
-        download_runner.validated_subreddits.append(allowed_subreddit.display_name)
-        submissions = download_runner.get_submissions(None, user)
+        download_runner.validated_subreddits.add(allowed_subreddit.display_name.lower())
+        submissions = list(download_runner.get_submissions(None, user))
 
         self.assertEqual(10, len(submissions))
         pinned = 0
@@ -354,3 +370,464 @@ class TestDownloadRunner(TestCase):
             if sub.pinned:
                 pinned += 1
         self.assertEqual(2, pinned)
+
+    def test_put_submission_blocks_until_stopped_when_queue_full(self, reddit_utils):
+        self.settings_manager.submission_queue_size = 1
+        download_runner = DownloadRunner()
+        self.assertTrue(download_runner.put_submission('first'))
+        download_runner.stop_run.set()
+        self.assertFalse(download_runner.put_submission('second'))
+        self.assertEqual(1, download_runner.queue_depths['submission_queue'])
+
+    @patch('DownloaderForReddit.core.download_runner.Message')
+    def test_report_queue_depths_if_due(self, message, reddit_utils):
+        download_runner = DownloadRunner()
+        download_runner.extractor = MagicMock()
+        download_runner.extractor.tasks.count = 3
+        download_runner.put_submission('item')
+
+        download_runner.report_queue_depths_if_due()
+        message.send_debug.assert_not_called()
+
+        download_runner.last_queue_depth_report -= QUEUE_DEPTH_REPORT_INTERVAL
+        download_runner.report_queue_depths_if_due()
+        download_runner.report_queue_depths_if_due()
+
+        message.send_debug.assert_called_once_with(
+            'Queued: 1 submissions, 0 downloads.  In progress: 3 extractions, 0 downloads')
+
+    @patch(f'{DL}.get_submissions')
+    def test_handle_submissions_queues_while_listing(self, get_submissions, reddit_utils):
+        self.settings_manager.submission_queue_size = 100
+        download_runner = DownloadRunner()
+        user = MagicMock(id=5)
+        queued_before_yield = []
+
+        def listing():
+            for x in range(3):
+                queued_before_yield.append(download_runner.submission_queue.qsize())
+                yield MockPrawSubmission(created=self.now - timedelta(days=3 - x))
+
+        get_submissions.return_value = listing()
+        download_runner.handle_submissions(user, None)
+
+        self.assertEqual([0, 1, 2], queued_before_yield)
+        self.assertEqual(3, download_runner.submission_queue.qsize())
+        user.set_date_limit.assert_called_once_with(MockPrawSubmission(created=self.now - timedelta(days=1)).created)
+
+    @patch(f'{DL}.get_submissions')
+    def test_handle_submissions_stopped_does_not_set_date_limit(self, get_submissions, reddit_utils):
+        self.settings_manager.submission_queue_size = 100
+        download_runner = DownloadRunner()
+        user = MagicMock(id=5)
+
+        def listing():
+            yield MockPrawSubmission(created=self.now)
+            download_runner.continue_run = False
+
+        get_submissions.return_value = listing()
+        download_runner.handle_submissions(user, None)
+
+        self.assertEqual(1, download_runner.submission_queue.qsize())
+        user.set_date_limit.assert_not_called()
+
+    @patch(f'{DL}.get_submissions')
+    def test_handle_submissions_schedules_perpetual_check(self, get_submissions, reddit_utils):
+        self.settings_manager.submission_queue_size = 100
+        download_runner = DownloadRunner()
+        download_runner.perpetual_download = True
+        download_runner.perpetual_scheduler = MagicMock()
+        download_runner.perpetual_scheduler.schedule.return_value = 60
+        latest = self.now - timedelta(days=2)
+        user = MagicMock(id=5, absolute_date_limit=latest)
+        submission = MockPrawSubmission(created=self.now - timedelta(days=1))
+        get_submissions.return_value = iter([submission])
+
+        download_runner.handle_submissions(user, 'praw_object')
+
+        download_runner.perpetual_scheduler.schedule.assert_called_once_with(
+            (5, 'praw_object'), user, [submission.created], latest.timestamp())
+        user.get_session().commit.assert_called()
+
+    @patch(f'{DL}.search_user_submissions')
+    @patch(f'{DL}.get_listing_submissions')
+    def test_get_raw_submissions_searches_constrained_users(self, get_listing, search, reddit_utils):
+        self.settings_manager.search_constrained_user_submissions = True
+        download_runner = DownloadRunner()
+        download_runner.filter_subreddits = True
+        download_runner.validated_subreddits.add('test_sub')
+        user = get_user()
+        redditor = MagicMock(spec=Redditor)
+        redditor.__class__ = Redditor
+
+        download_runner.get_raw_submissions(redditor, user)
+        search.assert_called_once_with(redditor, user)
+        get_listing.assert_not_called()
+
+        # groups searched by other sorts can not be merged into one ordered listing
+        for sort_method in (PostSortMethod.RISING, PostSortMethod.TOP_ALL):
+            user.post_sort_method = sort_method
+            download_runner.get_raw_submissions(redditor, user)
+        self.assertEqual(2, get_listing.call_count)
+        search.assert_called_once()
+
+    def get_search_runner(self, *groups):
+        download_runner = DownloadRunner()
+        download_runner.validated_subreddits = {f'sub_{x:03}' for x in range(SEARCH_SUBREDDIT_CHUNK_SIZE * len(groups))}
+        download_runner.reddit_instance = MagicMock()
+        download_runner.reddit_instance.subreddit.return_value.search.side_effect = [iter(x) for x in groups]
+        return download_runner
+
+    def get_search_user(self, post_limit=1000, date_limit=None):
+        user = MagicMock(post_limit=post_limit, date_limit=None,
+                         absolute_date_limit=date_limit or self.now - timedelta(days=10))
+        user.name = 'test_user'
+        return user
+
+    def get_search_redditor(self, days_old=0, subreddit='sub_000'):
+        """Returns a redditor whose newest submission is the supplied number of days old, posted to the subreddit."""
+        redditor = MagicMock()
+        newest = MockPrawSubmission(created=self.now - timedelta(days=days_old),
+                                    subreddit=MagicMock(display_name=subreddit))
+        redditor.submissions.new.return_value = iter([newest])
+        return redditor
+
+    def test_search_user_submissions_merges_subreddit_groups(self, reddit_utils):
+        first_group = [MockPrawSubmission(created=self.now - timedelta(days=x)) for x in (1, 4, 5)]
+        second_group = [MockPrawSubmission(created=self.now - timedelta(days=x)) for x in (2, 3)]
+        download_runner = self.get_search_runner(first_group, second_group)
+        user = self.get_search_user()
+
+        submissions = list(download_runner.search_user_submissions(self.get_search_redditor(days_old=1), user))
+
+        self.assertEqual(sorted(first_group + second_group, key=lambda x: -x.created), submissions)
+        self.assertEqual(2, download_runner.reddit_instance.subreddit.call_count)
+        self.assertEqual(50, len(download_runner.reddit_instance.subreddit.call_args_list[0][0][0].split('+')))
+        download_runner.reddit_instance.subreddit.return_value.search.assert_called_with(
+            'author:test_user', sort='new', time_filter='all', syntax='lucene', limit=SEARCH_RESULT_LIMIT)
+        self.assertEqual(3, download_runner.listing_pages_fetched)
+        self.assertEqual((2, 1, 1), (download_runner.search_requests, download_runner.search_listing_requests,
+                                     download_runner.search_listing_requests_needed))
+
+    @patch(f'{DL}.get_listing_submissions')
+    def test_search_user_submissions_falls_back_to_listing(self, get_listing, reddit_utils):
+        download_runner = self.get_search_runner([])
+        download_runner.reddit_instance.subreddit.return_value.search.side_effect = \
+            prawcore.exceptions.ServerError(MagicMock())
+        listing = [MockPrawSubmission(created=self.now)]
+        get_listing.return_value = listing
+        user = self.get_search_user(post_limit=25)
+        redditor = self.get_search_redditor()
+
+        submissions = list(download_runner.search_user_submissions(redditor, user))
+
+        self.assertEqual(listing, submissions)
+        get_listing.assert_called_once_with(redditor, user)
+        self.assertEqual(2, download_runner.search_listing_requests)
+        self.assertEqual(1, download_runner.search_listing_requests_needed)
+
+    @patch(f'{DL}.get_submissions_since')
+    def test_search_fallback_continues_from_listing_cursor(self, get_submissions_since, reddit_utils):
+        download_runner = self.get_search_runner([])
+        download_runner.reddit_instance.subreddit.return_value.search.side_effect = \
+            prawcore.exceptions.ServerError(MagicMock())
+        get_submissions_since.return_value = iter(['listing'])
+        user = self.get_search_user()
+        user.post_sort_method = PostSortMethod.NEW
+        user.last_seen_fullname = 't3_cursor'
+        redditor = self.get_search_redditor()
+
+        self.assertEqual(['listing'], list(download_runner.search_user_submissions(redditor, user)))
+        get_submissions_since.assert_called_once_with(redditor, user, 't3_cursor')
+
+    @patch(f'{DL}.get_listing_submissions')
+    def test_truncated_search_falls_back_to_listing(self, get_listing, reddit_utils):
+        full_group = [MockPrawSubmission(created=self.now - timedelta(hours=x)) for x in range(SEARCH_RESULT_LIMIT)]
+        download_runner = self.get_search_runner([MockPrawSubmission(created=self.now)], full_group)
+        get_listing.return_value = ['listing']
+        user = self.get_search_user(post_limit=SEARCH_RESULT_LIMIT + 1)
+
+        self.assertEqual(['listing'], list(download_runner.search_user_submissions(self.get_search_redditor(), user)))
+        get_listing.assert_called_once()
+
+    @patch(f'{DL}.get_listing_submissions')
+    def test_search_holding_post_limit_is_not_truncated(self, get_listing, reddit_utils):
+        full_group = [MockPrawSubmission(created=self.now - timedelta(hours=x)) for x in range(3)]
+        download_runner = self.get_search_runner([MockPrawSubmission(created=self.now)], full_group)
+        user = self.get_search_user(post_limit=3)
+
+        submissions = list(download_runner.search_user_submissions(self.get_search_redditor(), user))
+
+        self.assertEqual(3, len(submissions))
+        get_listing.assert_not_called()
+
+    @patch(f'{DL}.search_subreddits')
+    def test_search_skipped_when_listing_has_nothing_new(self, search_subreddits, reddit_utils):
+        download_runner = self.get_search_runner([])
+
+        submissions = list(download_runner.search_user_submissions(self.get_search_redditor(days_old=20),
+                                                                   self.get_search_user()))
+
+        self.assertEqual([], submissions)
+        search_subreddits.assert_not_called()
+        self.assertEqual((0, 1, 1), (download_runner.search_requests, download_runner.search_listing_requests,
+                                     download_runner.search_listing_requests_needed))
+
+    @patch(f'{DL}.get_listing_submissions')
+    def test_unindexed_submission_falls_back_to_listing(self, get_listing, reddit_utils):
+        get_listing.return_value = ['listing']
+        for group in ([], [MockPrawSubmission(created=self.now - timedelta(days=2))]):
+            with self.subTest(group=group):
+                download_runner = self.get_search_runner(group)
+                redditor = self.get_search_redditor(days_old=1)
+                self.assertEqual(['listing'],
+                                 list(download_runner.search_user_submissions(redditor, self.get_search_user())))
+
+        # the newest submission is not expected in the search if it was posted to another subreddit
+        group = [MockPrawSubmission(created=self.now - timedelta(days=2))]
+        download_runner = self.get_search_runner(group)
+        redditor = self.get_search_redditor(days_old=1, subreddit='other_sub')
+        self.assertEqual(group, list(download_runner.search_user_submissions(redditor, self.get_search_user())))
+
+    @patch('DownloaderForReddit.core.download_runner.Message')
+    def test_finish_message_reports_requests_saved_by_search(self, message, reddit_utils):
+        for stats, expected in (((1, 0, 4), 'Reddit Requests Saved By Search: 3'),
+                                ((2, 1, 1), 'Extra Reddit Requests Made By Search: 2')):
+            with self.subTest(stats=stats):
+                download_runner = DownloadRunner()
+                download_runner.add_search_stats(*stats)
+                download_runner.finish_messages(MagicMock(duration_display='1 minute'))
+                self.assertIn(expected, message.send_info.call_args[0][0])
+
+        download_runner = DownloadRunner()
+        download_runner.finish_messages(MagicMock(duration_display='1 minute'))
+        self.assertNotIn('Search', message.send_info.call_args[0][0])
+
+    def test_first_download_searches_without_listing_check(self, reddit_utils):
+        # a user that has never been downloaded has no date limit that recent posts could be missing from
+        download_runner = self.get_search_runner([])
+        first_download = self.get_search_user(date_limit=datetime.fromtimestamp(const.FIRST_POST_EPOCH))
+        redditor = MagicMock()
+        self.assertEqual([], list(download_runner.search_user_submissions(redditor, first_download)))
+        redditor.submissions.new.assert_not_called()
+
+    @patch('DownloaderForReddit.core.download_runner.statistics')
+    def test_statistics_refreshed_after_interval(self, statistics, reddit_utils):
+        download_runner = DownloadRunner()
+        download_runner.download_session_id = 7
+        statistics.refresh_download_session_statistics.side_effect = [{'first': 1}, {'second': 2}]
+
+        download_runner.refresh_statistics_if_due()
+        statistics.refresh_download_session_statistics.assert_not_called()
+
+        download_runner.last_statistics_refresh -= STATISTICS_REFRESH_INTERVAL
+        download_runner.refresh_statistics_if_due()
+        download_runner.refresh_statistics_if_due()
+        download_runner.last_statistics_refresh -= STATISTICS_REFRESH_INTERVAL
+        download_runner.refresh_statistics_if_due()
+
+        # each refresh continues from the rows that the previous one included
+        self.assertEqual([(7, None), (7, {'first': 1})],
+                         [call[0][1:] for call in statistics.refresh_download_session_statistics.call_args_list])
+        self.assertEqual({'second': 2}, download_runner.statistics_refresh_ids)
+
+    @patch(f'{DL}.get_user_submissions')
+    def test_run_listings_on_thread_pool(self, get_user_submissions, reddit_utils):
+        self.settings_manager.listing_thread_count = 3
+        try:
+            download_runner = DownloadRunner(user_id_list=[2, 3, 4, 5])
+            download_runner.run_listings(download_runner.get_user_submissions, download_runner.user_id_list)
+        finally:
+            self.settings_manager.listing_thread_count = 1
+        self.assertEqual([2, 3, 4, 5], sorted(x[0][0] for x in get_user_submissions.call_args_list))
+
+    @patch(f'{DL}.check_praw_object')
+    def test_validate_reddit_objects(self, check_praw_object, reddit_utils):
+        self.settings_manager.validation_cache_hours = 6
+        validation_cache.clear()
+        with injector.get_database_handler().get_scoped_session() as session:
+            valid_user = get_user(name='valid_user')
+            invalid_user = get_user(name='invalid_user')
+            cached_user = get_user(name='cached_user')
+            session.add_all([valid_user, invalid_user, cached_user])
+            session.commit()
+            ids = [valid_user.id, invalid_user.id, cached_user.id]
+            validation_cache.set_valid('USER', 'cached_user')
+            error = prawcore.exceptions.NotFound(MagicMock())
+            check_praw_object.side_effect = lambda praw_object: error if praw_object.name == 'invalid_user' else None
+            download_runner = DownloadRunner()
+            download_runner.reddit_instance = MagicMock()
+            download_runner.reddit_instance.redditor.side_effect = self.make_mock_redditor
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                download_runner.validate_reddit_objects(ids, executor)
+
+            self.assertEqual({valid_user.id: None, invalid_user.id: error},
+                             {key: value.result() for key, value in download_runner.validation_results.items()})
+            self.assertTrue(download_runner.validate_object(None, valid_user))
+            self.assertTrue(download_runner.validate_object(None, cached_user))
+            check_praw_object.reset_mock()
+            self.assertFalse(download_runner.validate_object(None, invalid_user))
+            check_praw_object.assert_not_called()
+            self.assertFalse(invalid_user.active)
+        validation_cache.clear()
+
+    @patch(f'{DL}.check_praw_object')
+    def test_listing_does_not_wait_for_other_validations(self, check_praw_object, reddit_utils):
+        validation_cache.clear()
+        with injector.get_database_handler().get_scoped_session() as session:
+            users = [get_user(name=f'user_{x}') for x in range(3)]
+            session.add_all(users)
+            session.commit()
+            release = Event()
+
+            def check(praw_object):
+                if praw_object.name == 'user_2':
+                    release.wait(5)
+
+            check_praw_object.side_effect = check
+            download_runner = DownloadRunner()
+            download_runner.reddit_instance = MagicMock()
+            download_runner.reddit_instance.redditor.side_effect = self.make_mock_redditor
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                download_runner.validate_reddit_objects([x.id for x in users], executor)
+                # the first objects are validated while the last one is still being checked
+                self.assertTrue(download_runner.validate_object(None, users[0]))
+                self.assertTrue(download_runner.validate_object(None, users[1]))
+                self.assertFalse(download_runner.validation_results[users[2].id].done())
+                release.set()
+            self.assertTrue(download_runner.validate_object(None, users[2]))
+        validation_cache.clear()
+
+    @patch(f'{DL}.check_praw_object')
+    def test_validate_subreddits_checks_unconfirmed_individually(self, check_praw_object, reddit_utils):
+        validation_cache.clear()
+        with injector.get_database_handler().get_scoped_session() as session:
+            subreddits = [get_subreddit(name=f'sub_{x}') for x in range(3)]
+            session.add_all(subreddits)
+            session.commit()
+            error = prawcore.exceptions.NotFound(MagicMock())
+            check_praw_object.return_value = error
+            download_runner = DownloadRunner()
+            download_runner.reddit_instance = MagicMock()
+            confirmed = [MagicMock(display_name='Sub_0', subreddit_type='public'),
+                         MagicMock(display_name='sub_1', subreddit_type='private')]
+            download_runner.reddit_instance.info.return_value = iter(confirmed)
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                download_runner.validate_reddit_objects([x.id for x in subreddits], executor)
+                results = {key: value.result(5) for key, value in download_runner.validation_results.items()}
+
+            self.assertEqual({subreddits[0].id: None, subreddits[1].id: error, subreddits[2].id: error}, results)
+            self.assertEqual(2, check_praw_object.call_count)
+        validation_cache.clear()
+
+    def test_cancel_validation(self, reddit_utils):
+        download_runner = DownloadRunner()
+        future = MagicMock()
+        download_runner.validation_results = {1: future}
+        download_runner.cancel_validation()
+        future.cancel.assert_called_once()
+        self.assertEqual({}, download_runner.validation_results)
+
+    @patch('DownloaderForReddit.core.download_runner.Message')
+    def test_failed_connections_counted_across_threads(self, message, reddit_utils):
+        download_runner = DownloadRunner()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for _ in range(20):
+                executor.submit(download_runner.handle_failed_connection)
+        self.assertEqual(20, download_runner.failed_connection_attempts)
+        self.assertFalse(download_runner.continue_run)
+        self.assertEqual(3, message.send_error.call_count)
+        message.send_critical.assert_called_once()
+
+    def make_mock_redditor(self, name):
+        redditor = MagicMock()
+        redditor.name = name
+        return redditor
+
+    def make_cursor_user(self, **kwargs):
+        user = MagicMock(id=5, post_sort_method=PostSortMethod.NEW, date_limit=None, post_limit=1000,
+                         last_seen_fullname='t3_cursor', absolute_date_limit=self.now - timedelta(days=5), **kwargs)
+        user.name = 'cursor_user'
+        return user
+
+    def make_mock_cursor_redditor(self):
+        redditor = MagicMock(spec=Redditor)
+        redditor.name = 'cursor_user'
+        return redditor
+
+    def test_get_submissions_since_pages_forward_from_cursor(self, reddit_utils):
+        download_runner = DownloadRunner()
+        download_runner.reddit_instance = MagicMock()
+        older_page = [MockPrawSubmission(created=self.now - timedelta(hours=200 - x), _id=f'old{x}')
+                      for x in reversed(range(100))]
+        newer_page = [MockPrawSubmission(created=self.now - timedelta(hours=10 - x), _id=f'new{x}')
+                      for x in reversed(range(10))]
+        download_runner.reddit_instance.get.side_effect = [older_page, newer_page]
+        user = self.make_cursor_user()
+        submissions = list(download_runner.get_raw_submissions(self.make_mock_cursor_redditor(), user))
+
+        self.assertEqual(newer_page + older_page, submissions)
+        befores = [x[1]['params']['before'] for x in download_runner.reddit_instance.get.call_args_list]
+        self.assertEqual(['t3_cursor', 't3_old99'], befores)
+        self.assertEqual('user/cursor_user/submitted', download_runner.reddit_instance.get.call_args[0][0])
+        self.assertEqual(2, download_runner.listing_pages_fetched)
+
+    @patch(f'{DL}.get_listing_submissions')
+    def test_get_submissions_since_reads_listing_when_cursor_removed(self, get_listing, reddit_utils):
+        download_runner = DownloadRunner()
+        download_runner.reddit_instance = MagicMock()
+        download_runner.reddit_instance.get.return_value = []
+        download_runner.reddit_instance.info.return_value = iter([MagicMock(author=None)])
+        new = MockPrawSubmission(created=self.now - timedelta(days=1))
+        old = MockPrawSubmission(created=self.now - timedelta(days=10))
+        get_listing.return_value = iter([new, old, MockPrawSubmission(created=self.now)])
+        user = self.make_cursor_user(post_interval=None)
+
+        submissions = list(download_runner.get_raw_submissions(self.make_mock_cursor_redditor(), user))
+
+        self.assertEqual([new], submissions)
+        download_runner.reddit_instance.info.assert_called_once_with(fullnames=['t3_cursor'])
+        self.assertIsNone(user.last_seen_fullname)
+
+    def test_get_submissions_since_skips_cursor_check_while_active(self, reddit_utils):
+        download_runner = DownloadRunner()
+        download_runner.reddit_instance = MagicMock()
+        download_runner.reddit_instance.get.return_value = []
+        user = self.make_cursor_user(post_interval=timedelta(days=7).total_seconds())
+
+        self.assertEqual([], list(download_runner.get_raw_submissions(self.make_mock_cursor_redditor(), user)))
+        download_runner.reddit_instance.info.assert_not_called()
+        self.assertEqual('t3_cursor', user.last_seen_fullname)
+
+    @patch(f'{DL}.get_raw_submissions')
+    def test_get_submissions_from_cursor_does_not_stop_at_old_submission(self, get_raw_submissions, reddit_utils):
+        download_runner = DownloadRunner()
+        user = self.make_cursor_user(post_score_limit_operator=None)
+        download_runner.submission_filter = MagicMock()
+        download_runner.submission_filter.date_filter.side_effect = lambda submission, _: submission.created > 0
+        mock_submissions = [MockPrawSubmission(created=10.0, _id='a'), MockPrawSubmission(created=-1.0, _id='b'),
+                            MockPrawSubmission(created=5.0, _id='c')]
+        get_raw_submissions.return_value = iter(mock_submissions)
+
+        submissions = list(download_runner.get_submissions(None, user))
+
+        self.assertEqual(['a', 'c'], [x.id for x in submissions])
+
+    @patch(f'{DL}.get_submissions')
+    def test_handle_submissions_moves_listing_cursor(self, get_submissions, reddit_utils):
+        self.settings_manager.submission_queue_size = 100
+        download_runner = DownloadRunner()
+        user = self.make_cursor_user()
+        get_submissions.return_value = iter([
+            MockPrawSubmission(created=self.now.timestamp(), pinned=True, _id='pinned'),
+            MockPrawSubmission(created=(self.now - timedelta(hours=1)).timestamp(), _id='newest'),
+            MockPrawSubmission(created=(self.now - timedelta(hours=2)).timestamp(), _id='older'),
+        ])
+
+        download_runner.handle_submissions(user, None)
+
+        self.assertEqual('t3_newest', user.last_seen_fullname)
+        self.assertEqual(3, download_runner.listing_items_gained)
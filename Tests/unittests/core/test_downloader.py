@@ -0,0 +1,61 @@
+import os
+import time
+import tempfile
+from queue import Queue
+from threading import Event, Thread
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from DownloaderForReddit.core.downloader import Downloader
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.models import Content
+from DownloaderForReddit.utils import injector
+from Tests.mockobjects.mock_objects import get_post
+
+
+class TestDownloaderDatabaseFile(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock(database_writer_batch_size=500, database_writer_max_delay_ms=100,
+                                              download_thread_count=4, use_multi_part_downloader=False,
+                                              match_file_modified_to_post_date=False)
+        self.directory = tempfile.TemporaryDirectory()
+        injector.database_handler = DatabaseHandler(database_path=os.path.join(self.directory.name, 'test.db'),
+                                                    pragmas=[('journal_mode', 'WAL')])
+        self.db = injector.database_handler
+        with self.db.get_scoped_session() as session:
+            post = get_post(session=session)
+            session.commit()
+            self.post_id, self.user_id, self.subreddit_id = post.id, post.author_id, post.subreddit_id
+
+    def tearDown(self):
+        self.db.writer.stop()
+        self.db.engine.dispose()
+        self.directory.cleanup()
+
+    def make_content(self, x):
+        return Content(title=f'content_{x}', extension='jpg', url=f'https://i.redd.it/{x}.jpg',
+                       directory_path=self.directory.name, user_id=self.user_id, subreddit_id=self.subreddit_id,
+                       post_id=self.post_id)
+
+    @patch('DownloaderForReddit.core.downloader.requests')
+    def test_downloads_do_not_commit_each_content_insert(self, requests):
+        requests.get.return_value = MagicMock(status_code=200, headers={'Content-Length': '4'},
+                                              iter_content=lambda size: [b'data'])
+        download_queue = Queue()
+        downloader = Downloader(download_queue, None, Event())
+        thread = Thread(target=downloader.run)
+        thread.start()
+        content_count = 20
+        for x in range(content_count):
+            # the downloader is idle, so each insert is taken off the queue as soon as it is queued
+            download_queue.put(self.db.writer.insert(self.make_content(x)))
+            time.sleep(0.002)
+        download_queue.put(None)
+        thread.join(timeout=10)
+        self.db.writer.flush()
+
+        with self.db.get_scoped_session() as session:
+            self.assertEqual(content_count, session.query(Content).filter(Content.downloaded == True).count())
+        self.assertEqual(content_count, downloader.download_count)
+        self.assertLess(self.db.writer.transaction_count, content_count / 4)
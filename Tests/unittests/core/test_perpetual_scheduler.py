@@ -0,0 +1,69 @@
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from DownloaderForReddit.core.perpetual_scheduler import PerpetualScheduler
+from DownloaderForReddit.core import const
+from DownloaderForReddit.utils import injector
+
+
+class TestPerpetualScheduler(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock(
+            perpetual_min_poll_interval=60,
+            perpetual_max_poll_interval=3600,
+            perpetual_poll_jitter=0,
+            perpetual_post_rate_smoothing=0.5
+        )
+        self.scheduler = PerpetualScheduler()
+        self.start = const.FIRST_POST_EPOCH + 10000000
+
+    def test_post_interval_from_post_gaps(self):
+        post_times = [self.start + 100, self.start + 300, self.start]
+        self.assertEqual(150, self.scheduler.calculate_post_interval(None, post_times))
+
+    def test_post_interval_includes_gap_from_previous_latest(self):
+        interval = self.scheduler.calculate_post_interval(1000, [self.start + 200], previous_latest=self.start)
+        self.assertEqual(600, interval)
+
+    def test_post_interval_ignores_never_downloaded_date_limit(self):
+        interval = self.scheduler.calculate_post_interval(None, [self.start, self.start + 100],
+                                                          previous_latest=const.FIRST_POST_EPOCH)
+        self.assertEqual(100, interval)
+
+    def test_quiet_object_interval_lengthens(self):
+        interval = self.scheduler.calculate_post_interval(100, [], previous_latest=self.start, now=self.start + 1000)
+        self.assertEqual(550, interval)
+
+    def test_quiet_time_shorter_than_interval_does_not_change_interval(self):
+        interval = self.scheduler.calculate_post_interval(1000, [], previous_latest=self.start, now=self.start + 10)
+        self.assertEqual(1000, interval)
+
+    def test_poll_delay_bounds(self):
+        self.assertEqual(60, self.scheduler.get_poll_delay(None))
+        self.assertEqual(60, self.scheduler.get_poll_delay(30))
+        self.assertEqual(500, self.scheduler.get_poll_delay(1000))
+        self.assertEqual(3600, self.scheduler.get_poll_delay(100000))
+
+    def test_poll_delay_jitter(self):
+        injector.settings_manager.perpetual_poll_jitter = 0.1
+        for x in range(20):
+            self.assertTrue(450 <= self.scheduler.get_poll_delay(1000) <= 550)
+
+    def test_schedule_stores_post_interval(self):
+        reddit_object = MagicMock(post_interval=None)
+        delay = self.scheduler.schedule('pair', reddit_object, [self.start, self.start + 4000])
+        self.assertEqual(4000, reddit_object.post_interval)
+        self.assertEqual(2000, delay)
+        self.assertEqual(1, len(self.scheduler))
+
+    def test_get_next_returns_earliest_due(self):
+        self.scheduler.push('later', 0.02)
+        self.scheduler.push('sooner', 0)
+        self.scheduler.push('not_due', 100)
+        self.assertEqual('sooner', self.scheduler.get_next(timeout=0.5))
+        self.assertEqual('later', self.scheduler.get_next(timeout=0.5))
+        start = time.monotonic()
+        self.assertIsNone(self.scheduler.get_next(timeout=0.05))
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
@@ -0,0 +1,79 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+from datetime import datetime, timedelta
+
+from DownloaderForReddit.core.reddit_object_creator import RedditObjectCreator
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.models import User, NameValidation
+from DownloaderForReddit.utils import injector
+from DownloaderForReddit.utils.reddit_utils import ValidationSet
+from Tests.mockobjects.mock_objects import get_user
+
+
+class TestRedditObjectCreator(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock(name_validation_cache_hours=24)
+        injector.database_handler = DatabaseHandler(in_memory=True)
+        self.db = injector.database_handler
+        with self.db.get_scoped_session() as session:
+            user = get_user(name='ExistingUser')
+            session.add(user)
+            session.commit()
+            self.existing_id = user.id
+        self.creator = RedditObjectCreator('USER')
+        self.name_checker = MagicMock()
+        self.name_checker.check_names.side_effect = self.check_names
+        self.creator.name_checker = self.name_checker
+
+    @staticmethod
+    def check_names(names):
+        results = {}
+        for name in names:
+            if name.lower().startswith('invalid'):
+                results[name.lower()] = ValidationSet(name=name, date_created=None, valid=False)
+            elif name.lower().startswith('error'):
+                results[name.lower()] = ValidationSet(name=name, date_created=None, valid=False, error=True)
+            else:
+                results[name.lower()] = ValidationSet(name=name.capitalize(), date_created=datetime(2015, 1, 1),
+                                                      valid=True)
+        return results
+
+    def test_create_reddit_objects(self):
+        names = ['existinguser', 'new_user', 'NEW_USER', 'invalid_user']
+        results = self.creator.create_reddit_objects(names, {'post_limit': 50})
+
+        self.assertEqual(['existinguser', 'new_user', 'invalid_user'], list(results.keys()))
+        self.assertEqual((self.existing_id, False), results['existinguser'])
+        self.assertIsNone(results['invalid_user'])
+        new_id, created = results['new_user']
+        self.assertTrue(created)
+        self.name_checker.check_names.assert_called_once_with(['new_user', 'invalid_user'])
+        with self.db.get_scoped_session() as session:
+            user = session.query(User).get(new_id)
+            self.assertEqual('New_user', user.name)
+            self.assertEqual(50, user.post_limit)
+            self.assertTrue(user.significant)
+
+    def test_validations_are_cached(self):
+        self.creator.validate_names(['new_user', 'invalid_user', 'error_user'])
+        self.name_checker.check_names.reset_mock()
+
+        results = self.creator.validate_names(['NEW_USER', 'invalid_user', 'error_user'])
+
+        self.name_checker.check_names.assert_called_once_with(['error_user'])
+        self.assertTrue(results['new_user'].valid)
+        self.assertEqual('New_user', results['new_user'].name)
+        self.assertFalse(results['invalid_user'].valid)
+
+    def test_expired_validations_are_checked_again(self):
+        self.creator.validate_names(['new_user'])
+        with self.db.get_scoped_update_session() as session:
+            session.query(NameValidation).update({'validation_date': datetime.now() - timedelta(hours=25)})
+        self.name_checker.check_names.reset_mock()
+
+        self.creator.validate_names(['new_user'])
+
+        self.name_checker.check_names.assert_called_once_with(['new_user'])
+        with self.db.get_scoped_session() as session:
+            self.assertEqual(1, session.query(NameValidation).count())
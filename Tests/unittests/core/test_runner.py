@@ -0,0 +1,47 @@
+from unittest import TestCase
+from queue import Queue
+from threading import Event
+
+from DownloaderForReddit.core.runner import TaskTracker, put_while_running
+
+
+class TestTaskTracker(TestCase):
+
+    def test_finished_only_when_holding_with_no_tasks(self):
+        tracker = TaskTracker()
+        self.assertFalse(tracker.finished.is_set())
+        tracker.add()
+        tracker.set_hold(True)
+        self.assertFalse(tracker.finished.is_set())
+        tracker.remove()
+        self.assertTrue(tracker.finished.is_set())
+        self.assertEqual(0, tracker.count)
+
+    def test_release_hold_clears_finished(self):
+        tracker = TaskTracker()
+        tracker.set_hold(True)
+        self.assertTrue(tracker.finished.is_set())
+        tracker.set_hold(False)
+        self.assertFalse(tracker.finished.is_set())
+
+    def test_added_task_clears_finished(self):
+        tracker = TaskTracker()
+        tracker.set_hold(True)
+        tracker.add()
+        self.assertFalse(tracker.finished.is_set())
+
+
+class TestPutWhileRunning(TestCase):
+
+    def test_put_into_queue_with_space(self):
+        queue = Queue(maxsize=1)
+        self.assertTrue(put_while_running(queue, 'item', Event()))
+        self.assertEqual('item', queue.get_nowait())
+
+    def test_put_into_full_queue_returns_when_stopped(self):
+        queue = Queue(maxsize=1)
+        queue.put('first')
+        stop_run = Event()
+        stop_run.set()
+        self.assertFalse(put_while_running(queue, 'second', stop_run, timeout=0.01))
+        self.assertEqual(1, queue.qsize())
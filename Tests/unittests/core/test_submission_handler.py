@@ -102,7 +102,9 @@ class TestSubmissionHandler(TestCase):
         self.handler.extract_link(url, extra_arg='extra')
 
         assign.assert_called_with(url)
-        extractor_class.assert_called_with(self.post, url=url, submission=self.submission, extra_arg='extra')
+        extractor_class.assert_called_with(self.post, url=url, submission=self.submission,
+                                           content_callback=self.handler.queue_content, writer=self.handler.writer,
+                                           extra_arg='extra')
         finish.assert_called_with(extractor, text_link_extraction=False)
 
     @patch(f'{PATH}.handle_unsupported_domain')
@@ -152,16 +154,38 @@ class TestSubmissionHandler(TestCase):
     def test_finish_extractor_successful(self):
         extractor = MagicMock()
         extractor.failed_extraction = False
+        extractor.content_callback = None
         content = MagicMock()
-        content.id = 482
+        future = MagicMock()
         extractor.extracted_content = [content]
+        extractor.content_id_futures = {content: future}
 
         self.handler.finish_extractor(extractor)
 
         extractor.extract_content.assert_called()
         self.post.set_extracted.assert_called()
         self.post.set_extraction_failed.assert_not_called()
-        self.mock_queue.put.assert_called_with(482)
+        self.mock_queue.put.assert_called_with(future, timeout=1)
+
+    def test_finish_extractor_does_not_requeue_streamed_content(self):
+        extractor = MagicMock()
+        extractor.failed_extraction = False
+        extractor.content_callback = self.handler.queue_content
+        content = MagicMock()
+        content.id = 482
+        extractor.extracted_content = [content]
+
+        self.handler.finish_extractor(extractor)
+
+        self.post.set_extracted.assert_called()
+        self.mock_queue.put.assert_not_called()
+
+    def test_queue_content(self):
+        future = MagicMock()
+
+        self.handler.queue_content(MagicMock(), future)
+
+        self.mock_queue.put.assert_called_with(future, timeout=1)
 
     def test_finish_extractor_unsuccessful(self):
         extractor = MagicMock()
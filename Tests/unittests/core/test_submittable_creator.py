@@ -0,0 +1,124 @@
+import os
+import tempfile
+from threading import Event, Thread
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from DownloaderForReddit.core.submittable_creator import SubmittableCreator
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.models import User, Subreddit
+from DownloaderForReddit.utils import injector
+
+
+class TestSubmittableCreator(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock()
+        self.db = DatabaseHandler(in_memory=True)
+        injector.database_handler = self.db
+        SubmittableCreator.db = self.db
+        SubmittableCreator.clear_cache()
+
+    def tearDown(self):
+        SubmittableCreator.db = None
+        SubmittableCreator.clear_cache()
+
+    def get_praw_object(self, author_name, subreddit_name):
+        praw_object = MagicMock()
+        praw_object.author.name = author_name
+        praw_object.subreddit.display_name = subreddit_name
+        return praw_object
+
+    def test_get_author_creates_user_once(self):
+        with self.db.get_scoped_session() as session:
+            praw_object = self.get_praw_object('TestUser', 'TestSub')
+            first_id = SubmittableCreator.get_author(praw_object, session)
+            second_id = SubmittableCreator.get_author(praw_object, session)
+            self.assertEqual(first_id, second_id)
+            self.assertEqual(1, session.query(User).filter(User.name == 'TestUser').count())
+
+    def test_get_author_uses_existing_user(self):
+        with self.db.get_scoped_session() as session:
+            user = User(name='ExistingUser')
+            session.add(user)
+            session.commit()
+            author_id = SubmittableCreator.get_author(self.get_praw_object('existinguser', 'TestSub'), session)
+            self.assertEqual(user.id, author_id)
+
+    def test_get_author_does_not_query_cached_name(self):
+        with self.db.get_scoped_session() as session:
+            author_id = SubmittableCreator.get_author(self.get_praw_object('TestUser', 'TestSub'), session)
+        mock_session = MagicMock()
+        self.assertEqual(author_id, SubmittableCreator.get_author(self.get_praw_object('testuser', 'TestSub'),
+                                                                  mock_session))
+        mock_session.query.assert_not_called()
+
+    def test_user_and_subreddit_cached_separately(self):
+        with self.db.get_scoped_session() as session:
+            praw_object = self.get_praw_object('SameName', 'SameName')
+            author_id = SubmittableCreator.get_author(praw_object, session)
+            subreddit_id = SubmittableCreator.get_subreddit(praw_object, session)
+            self.assertNotEqual(author_id, subreddit_id)
+            self.assertEqual(1, session.query(Subreddit).filter(Subreddit.name == 'SameName').count())
+
+    def test_missing_author_uses_deleted_user(self):
+        with self.db.get_scoped_session() as session:
+            praw_object = self.get_praw_object(None, 'TestSub')
+            praw_object.author = None
+            author_id = SubmittableCreator.get_author(praw_object, session)
+            self.assertEqual('deleted', session.query(User).get(author_id).name)
+
+
+class TestSubmittableCreatorDatabaseFile(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock(database_writer_batch_size=10, database_writer_max_delay_ms=10)
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = DatabaseHandler(database_path=os.path.join(self.directory.name, 'test.db'),
+                                  pragmas=[('journal_mode', 'WAL')])
+        injector.database_handler = self.db
+        SubmittableCreator.db = self.db
+        SubmittableCreator.clear_cache()
+
+    def tearDown(self):
+        SubmittableCreator.db = None
+        SubmittableCreator.clear_cache()
+        self.db.engine.dispose()
+        self.directory.cleanup()
+
+    def get_id(self, model, name):
+        with self.db.get_scoped_session() as session:
+            return SubmittableCreator.get_reddit_object_id(model, name, session)
+
+    def test_concurrent_lookups_create_one_reddit_object(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            ids = list(executor.map(lambda x: self.get_id(User, 'NewUser' if x % 2 else 'newuser'), range(16)))
+        self.assertEqual(1, len(set(ids)))
+        with self.db.get_scoped_session() as session:
+            self.assertEqual(1, session.query(User).filter(User.name == 'NewUser').count())
+
+    def test_lookup_does_not_wait_for_other_names(self):
+        create_reddit_object = SubmittableCreator.create_reddit_object
+        creating = Event()
+        release = Event()
+
+        def slow_create(model, name):
+            if name == 'SlowUser':
+                creating.set()
+                release.wait(5)
+            return create_reddit_object(model, name)
+
+        with patch.object(SubmittableCreator, 'create_reddit_object', side_effect=slow_create):
+            slow_thread = Thread(target=self.get_id, args=(User, 'SlowUser'))
+            slow_thread.start()
+            try:
+                self.assertTrue(creating.wait(5))
+                # the slow creation holds only its own name's lock
+                other_thread = Thread(target=self.get_id, args=(User, 'OtherUser'))
+                other_thread.start()
+                other_thread.join(2)
+                self.assertFalse(other_thread.is_alive())
+            finally:
+                release.set()
+                slow_thread.join(5)
@@ -0,0 +1,69 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from DownloaderForReddit.core.update_runner import UpdateRunner
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.models import Post
+from DownloaderForReddit.utils import injector
+from Tests.mockobjects.mock_objects import get_post, get_user, get_subreddit
+
+
+@patch('DownloaderForReddit.core.update_runner.Message')
+@patch('DownloaderForReddit.utils.reddit_utils.get_reddit_instance')
+class TestUpdateRunner(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock(update_thread_count=2)
+        injector.database_handler = DatabaseHandler(in_memory=True)
+        self.db = injector.database_handler
+        with self.db.get_scoped_session() as session:
+            self.user = get_user()
+            subreddit = get_subreddit()
+            posts = [get_post(reddit_id=f'abc{x}', score=x, user=self.user, subreddit=subreddit, session=session)
+                     for x in range(250)]
+            session.commit()
+            self.post_ids = [post.id for post in posts]
+            self.user_id = self.user.id
+
+    def make_info(self, changed):
+        def info(fullnames):
+            submissions = []
+            for fullname in fullnames:
+                reddit_id = fullname[3:]
+                score = int(reddit_id[3:])
+                submissions.append(MagicMock(id=reddit_id, score=score + 1 if score in changed else score))
+            return iter(submissions)
+        return info
+
+    def test_update_scores_in_batches(self, get_reddit_instance, message):
+        reddit = get_reddit_instance.return_value
+        reddit.info.side_effect = self.make_info(changed={5, 150, 249})
+
+        runner = UpdateRunner('UPDATE_SCORES', post_id_list=self.post_ids)
+        runner.update_scores()
+
+        self.assertEqual(3, reddit.info.call_count)
+        self.assertEqual([100, 100, 50], sorted((len(x[1]['fullnames']) for x in reddit.info.call_args_list),
+                                                reverse=True))
+        with self.db.get_scoped_session() as session:
+            scores = dict(session.query(Post.reddit_id, Post.score))
+        self.assertEqual(6, scores['abc5'])
+        self.assertEqual(151, scores['abc150'])
+        self.assertEqual(250, scores['abc249'])
+        self.assertEqual(4, scores['abc4'])
+        # one message for each batch with changes plus the summary
+        self.assertEqual(4, message.send_info.call_count)
+        self.assertIn('Changed: 3', message.send_info.call_args[0][0])
+
+    def test_missing_posts_counted_as_failed(self, get_reddit_instance, message):
+        get_reddit_instance.return_value.info.side_effect = lambda fullnames: iter([])
+
+        runner = UpdateRunner('UPDATE_SCORES', post_id_list=self.post_ids[:10])
+        runner.update_scores()
+
+        self.assertIn('Failed: 10', message.send_info.call_args[0][0])
+
+    def test_get_post_ids_from_reddit_objects(self, get_reddit_instance, message):
+        runner = UpdateRunner('UPDATE_SCORES', reddit_object_id_list=[self.user_id])
+        runner.get_post_ids()
+        self.assertEqual(sorted(self.post_ids), sorted(runner.post_id_list))
@@ -0,0 +1,41 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from DownloaderForReddit.database.database_handler import DatabaseHandler, get_connection_pragmas
+
+
+class TestDatabaseHandler(TestCase):
+
+    def setUp(self):
+        self.settings_manager = MagicMock(sqlite_journal_mode='wal', sqlite_synchronous='NORMAL',
+                                          sqlite_temp_store='MEMORY', sqlite_cache_size_kb=2048,
+                                          sqlite_mmap_size=1048576, sqlite_busy_timeout=15000)
+
+    def test_get_connection_pragmas(self):
+        pragmas = get_connection_pragmas(self.settings_manager)
+        self.assertEqual([('journal_mode', 'WAL'), ('synchronous', 'NORMAL'), ('temp_store', 'MEMORY'),
+                          ('cache_size', -2048), ('mmap_size', 1048576), ('busy_timeout', 15000)], pragmas)
+
+    def test_get_connection_pragmas_skips_invalid_values(self):
+        self.settings_manager.sqlite_journal_mode = 'WAL; DROP TABLE post'
+        self.settings_manager.sqlite_mmap_size = 'large'
+        pragmas = dict(get_connection_pragmas(self.settings_manager))
+        self.assertNotIn('journal_mode', pragmas)
+        self.assertNotIn('mmap_size', pragmas)
+        self.assertEqual('NORMAL', pragmas['synchronous'])
+
+    def test_pragmas_set_on_each_connection(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = DatabaseHandler(database_path=os.path.join(directory, 'test.db'),
+                                 pragmas=get_connection_pragmas(self.settings_manager))
+            try:
+                with db.engine.connect() as connection:
+                    self.assertEqual('wal', connection.execute('PRAGMA journal_mode').scalar())
+                    self.assertEqual(1, connection.execute('PRAGMA synchronous').scalar())
+                    self.assertEqual(2, connection.execute('PRAGMA temp_store').scalar())
+                    self.assertEqual(-2048, connection.execute('PRAGMA cache_size').scalar())
+                    self.assertEqual(15000, connection.execute('PRAGMA busy_timeout').scalar())
+            finally:
+                db.engine.dispose()
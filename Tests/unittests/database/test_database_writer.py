@@ -0,0 +1,78 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.models import Post
+from DownloaderForReddit.utils import injector
+from Tests.mockobjects.mock_objects import get_post
+
+
+class TestDatabaseWriter(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock(database_writer_batch_size=3, database_writer_max_delay_ms=60000)
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = DatabaseHandler(database_path=os.path.join(self.directory.name, 'test.db'), pragmas=[])
+        injector.database_handler = self.db
+        self.writer = self.db.writer
+        with self.db.get_scoped_session() as session:
+            posts = [get_post(reddit_id=f'abc{x}', session=session) for x in range(4)]
+            session.commit()
+            self.post_ids = [post.id for post in posts]
+
+    def tearDown(self):
+        self.writer.stop()
+        self.db.engine.dispose()
+        self.directory.cleanup()
+
+    def get_scores(self):
+        with self.db.get_scoped_session() as session:
+            return [session.query(Post).get(post_id).score for post_id in self.post_ids]
+
+    def test_writes_committed_together_when_batch_is_full(self):
+        futures = [self.writer.update(Post, post_id, {'score': 10}) for post_id in self.post_ids[:3]]
+        for future in futures:
+            # result is not called, which would commit the batch early
+            future.exception(timeout=5)
+        self.assertEqual([10, 10, 10, 2500], self.get_scores())
+        self.assertEqual(1, self.writer.transaction_count)
+        self.assertEqual(3, self.writer.write_count)
+
+    def test_waiting_on_result_commits_without_filling_batch(self):
+        future = self.writer.update(Post, self.post_ids[0], {'score': 10})
+        future.result(timeout=5)
+        self.assertEqual([10, 2500, 2500, 2500], self.get_scores())
+
+    def test_flush_commits_queued_writes(self):
+        self.writer.update(Post, self.post_ids[0], {'score': 10})
+        self.writer.update(Post, self.post_ids[1], {'score': 20})
+        self.writer.flush()
+        self.assertEqual([10, 20, 2500, 2500], self.get_scores())
+        self.assertEqual(1, self.writer.transaction_count)
+
+    def test_failed_batch_is_written_individually(self):
+        def fail(session):
+            raise ValueError('bad write')
+
+        first = self.writer.update(Post, self.post_ids[0], {'score': 10})
+        failed = self.writer.submit(fail)
+        last = self.writer.update(Post, self.post_ids[2], {'score': 30})
+        last.result(timeout=5)
+        first.result(timeout=5)
+        self.assertIsInstance(failed.exception(timeout=5), ValueError)
+        self.assertEqual([10, 2500, 30, 2500], self.get_scores())
+
+    def test_model_write_leaves_session_clean(self):
+        with self.db.get_scoped_session() as session:
+            post = session.query(Post).get(self.post_ids[0])
+            post.score = 50
+            post.set_extraction_failed(None, 'failed').result(timeout=5)
+            self.assertFalse(session.is_modified(post))
+            self.assertEqual(1, post.retry_attempts)
+        with self.db.get_scoped_session() as session:
+            post = session.query(Post).get(self.post_ids[0])
+            self.assertEqual(50, post.score)
+            self.assertEqual(1, post.retry_attempts)
+            self.assertEqual('failed', post.error_message)
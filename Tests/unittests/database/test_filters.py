@@ -0,0 +1,70 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.filters import PostFilter, RedditObjectFilter, DownloadSessionFilter
+from DownloaderForReddit.database.models import Comment, DownloadSession
+from DownloaderForReddit.database import statistics
+from DownloaderForReddit.utils import injector
+from Tests.mockobjects.mock_objects import get_user, get_subreddit, get_post
+
+
+class TestKeyset(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock()
+        self.db = DatabaseHandler(in_memory=True)
+        self.session = self.db.get_session()
+        self.users = [get_user(name=f'user_{x}') for x in range(4)]
+        subreddit = get_subreddit()
+        download_sessions = [DownloadSession() for _ in range(3)]
+        self.session.add_all(self.users + [subreddit] + download_sessions)
+        for x in range(11):
+            # repeated and null scores check that rows with the same order value are neither skipped nor repeated
+            score = None if x % 4 == 0 else x % 3
+            post = get_post(reddit_id=f'abc{x}', user=self.users[x % 4], subreddit=subreddit, score=score,
+                            significant=self.users[x % 4], session=self.session)
+            post.download_session = download_sessions[x % 3]
+            for y in range(x % 3):
+                self.session.add(Comment(reddit_id=f'c{x}{y}', author=self.users[0], subreddit=subreddit, post=post))
+        self.session.commit()
+        statistics.rebuild_statistics(self.session)
+
+    def tearDown(self):
+        self.session.close()
+
+    def get_pages(self, f, order_by, desc, page_size=2):
+        query = f.filter(self.session, order_by=order_by, desc=desc)
+        keyset = f.keyset
+        ids = []
+        key = None
+        while True:
+            rows = keyset.seek(keyset.columns(query), key).limit(page_size).all()
+            if not rows:
+                return ids
+            ids.extend(row[0] for row in rows)
+            key = keyset.get_key(rows[-1])
+
+    def check_pages(self, f, order_by):
+        for desc in (False, True):
+            with self.subTest(order_by=order_by, desc=desc):
+                expected = [x.id for x in f.filter(self.session, order_by=order_by, desc=desc).all()]
+                self.assertEqual(expected, self.get_pages(f, order_by, desc))
+
+    def test_pages_match_column_order(self):
+        for order_by in ('id', 'score', 'title'):
+            self.check_pages(PostFilter(), order_by)
+
+    def test_pages_match_custom_order(self):
+        self.check_pages(PostFilter(), 'comment_count')
+        self.check_pages(RedditObjectFilter(), 'post_score')
+        self.check_pages(RedditObjectFilter(), 'comment_count')
+        self.check_pages(DownloadSessionFilter(), 'total_activity_count')
+
+    def test_filter_by_maintained_counts(self):
+        post_ids = [x.id for x in PostFilter().filter(self.session, ('comment_count', 'gte', 2))]
+        self.assertEqual(3, len(post_ids))
+        user_ids = [x.id for x in RedditObjectFilter().filter(self.session, ('post_count', 'eq', 3), order_by='id')]
+        self.assertEqual([x.id for x in self.users[:3]], user_ids)
+        download_session_ids = [x.id for x in DownloadSessionFilter().filter(self.session, ('post_count', 'eq', 3))]
+        self.assertEqual(1, len(download_session_ids))
@@ -0,0 +1,102 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.model_manager import ModelManger, FileDeletion
+from DownloaderForReddit.database.models import Post, Content, Comment, RedditObject
+from DownloaderForReddit.utils import injector
+from Tests.mockobjects.mock_objects import get_user, get_subreddit, get_post
+
+
+@patch.object(ModelManger, 'BATCH_SIZE', 3)
+class TestModelManager(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock()
+        self.db = DatabaseHandler(in_memory=True)
+        self.session = self.db.get_session()
+        self.directory = tempfile.TemporaryDirectory()
+        self.user = get_user()
+        self.other_user = get_user(name='other_user')
+        self.subreddit = get_subreddit()
+        self.session.add_all([self.user, self.other_user, self.subreddit])
+        self.files = []
+        for x in range(8):
+            user = self.user if x < 7 else self.other_user
+            post = get_post(reddit_id=f'abc{x}', user=user, subreddit=self.subreddit, significant=user,
+                            session=self.session)
+            content = Content(title=f'content_{x}', download_title=f'content_{x}', extension='txt',
+                              directory_path=self.directory.name, user=user, subreddit=self.subreddit, post=post)
+            self.session.add(content)
+            self.files.append(content.get_full_file_path())
+            with open(self.files[-1], 'w') as file:
+                file.write('content')
+            self.session.add(Comment(reddit_id=f'c{x}', author=user, subreddit=self.subreddit, post=post))
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        self.directory.cleanup()
+
+    def test_get_id_batches(self):
+        batches = list(ModelManger.get_id_batches(self.session, Post.id, Post.author_id == self.user.id))
+        self.assertEqual([3, 3, 1], [len(x) for x in batches])
+        ids = [x for batch in batches for x in batch]
+        self.assertEqual(sorted(ids), ids)
+        self.assertEqual(7, len(set(ids)))
+
+    def test_delete_reddit_object_deletes_every_batch(self):
+        user_id = self.user.id
+        with patch('DownloaderForReddit.database.model_manager.Message'):
+            file_deletion = ModelManger.delete_reddit_object(self.user, session=self.session, delete_files=True)
+            file_deletion.wait()
+
+        self.assertIsNone(self.session.query(RedditObject).get(user_id))
+        self.assertEqual(1, self.session.query(Post).count())
+        self.assertEqual(1, self.session.query(Content).count())
+        self.assertEqual(1, self.session.query(Comment).count())
+        self.assertEqual(7, file_deletion.deleted_count)
+        self.assertEqual([False] * 7 + [True], [os.path.exists(x) for x in self.files])
+
+    def test_delete_reddit_object_keeps_files(self):
+        self.assertIsNone(ModelManger.delete_reddit_object(self.user, session=self.session))
+        self.assertTrue(all(os.path.exists(x) for x in self.files))
+
+    def test_delete_comment_deletes_replies(self):
+        post = self.session.query(Post).filter(Post.reddit_id == 'abc0').one()
+        comment = post.comments[0]
+        reply = Comment(reddit_id='reply', author=self.user, subreddit=self.subreddit, post=post, parent=comment)
+        self.session.add(reply)
+        self.session.add(Comment(reddit_id='reply_2', author=self.user, subreddit=self.subreddit, post=post,
+                                 parent=reply))
+        self.session.commit()
+
+        ModelManger.delete_comment(comment, session=self.session)
+
+        self.assertEqual(0, self.session.query(Comment).filter(Comment.post_id == post.id).count())
+        self.assertEqual(7, self.session.query(Comment).count())
+        self.assertIsNotNone(self.session.query(Post).get(post.id))
+
+
+class TestFileDeletion(TestCase):
+
+    @patch('DownloaderForReddit.database.model_manager.Message')
+    def test_progress_is_reported_for_each_batch(self, message):
+        progress = []
+        with tempfile.TemporaryDirectory() as directory:
+            files = []
+            for x in range(3):
+                files.append(os.path.join(directory, f'{x}.txt'))
+                with open(files[-1], 'w') as file:
+                    file.write('content')
+            file_deletion = FileDeletion('test', progress_callback=lambda *args: progress.append(args))
+            file_deletion.add(files[:2])
+            file_deletion.wait()
+            file_deletion.add(files[2:])
+            file_deletion.wait()
+
+            self.assertFalse(any(os.path.exists(x) for x in files))
+        self.assertEqual([(2, 2), (3, 3)], progress)
+        message.send_info.assert_called_with('Deleted 3 of 3 files for test')
@@ -0,0 +1,45 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from sqlalchemy import inspect
+
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.models import Comment, Content
+from DownloaderForReddit.utils import injector
+from Tests.mockobjects.mock_objects import get_user, get_subreddit, get_post
+
+
+class TestRedditObject(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock()
+        self.db = DatabaseHandler(in_memory=True)
+        self.session = self.db.get_session()
+        self.user = get_user()
+        self.subreddit = get_subreddit()
+        other_user = get_user(name='other_user')
+        self.session.add_all([self.user, self.subreddit, other_user])
+        for x in range(3):
+            post = get_post(reddit_id=f'abc{x}', user=self.user, subreddit=self.subreddit, session=self.session)
+            self.session.add(Content(title=f'content {x}', user=self.user, subreddit=self.subreddit, post=post))
+        post = get_post(reddit_id='def', user=other_user, subreddit=self.subreddit, session=self.session)
+        self.session.add(Comment(reddit_id='c1', author=self.user, subreddit=self.subreddit, post=post))
+        self.session.commit()
+        self.session.expire_all()
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_counts_are_queried_without_loading_collections(self):
+        self.assertEqual(3, self.user.post_count)
+        self.assertEqual(3, self.user.content_count)
+        self.assertEqual(1, self.user.comment_count)
+        self.assertEqual(4, self.subreddit.post_count)
+        self.assertEqual(3, self.subreddit.content_count)
+        self.assertEqual(1, self.subreddit.comment_count)
+        for reddit_object in (self.user, self.subreddit):
+            unloaded = inspect(reddit_object).unloaded
+            self.assertTrue({'posts', 'content', 'comments'}.issubset(unloaded))
+
+    def test_get_stats(self):
+        self.assertEqual({'lists': 0, 'posts': 3, 'content': 3, 'comments': 1}, self.user.get_stats())
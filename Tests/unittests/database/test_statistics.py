@@ -0,0 +1,160 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.model_manager import ModelManger
+from DownloaderForReddit.database.models import (Comment, Content, DownloadSession, Post, RedditObjectStatistics,
+                                                 DownloadSessionStatistics)
+from DownloaderForReddit.database import statistics
+from DownloaderForReddit.utils import injector
+from Tests.mockobjects.mock_objects import get_user, get_subreddit, get_post
+
+
+class TestStatistics(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock()
+        self.db = DatabaseHandler(in_memory=True)
+        injector.database_handler = self.db
+        self.session = self.db.get_session()
+        self.download_session = DownloadSession()
+        self.user = get_user()
+        self.subreddit = get_subreddit()
+        self.session.add_all([self.download_session, self.user, self.subreddit])
+        self.session.flush()
+        self.posts = []
+        for x in range(3):
+            post = get_post(reddit_id=f'abc{x}', user=self.user, subreddit=self.subreddit, session=self.session,
+                            significant=self.user, score=10 * (x + 1), is_self=x == 0)
+            post.download_session_id = self.download_session.id
+            self.session.add(Content(title=f'content {x}', extension='jpg', user=self.user, subreddit=self.subreddit,
+                                     post=post, download_session_id=self.download_session.id))
+            self.posts.append(post)
+        self.session.add(Comment(reddit_id='c1', author=self.user, subreddit=self.subreddit, post=self.posts[0],
+                                 download_session_id=self.download_session.id, score=5))
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+
+    def get_row(self, reddit_object):
+        return self.session.query(RedditObjectStatistics).get(reddit_object.id)
+
+    def test_refresh_download_session_statistics(self):
+        statistics.refresh_download_session_statistics(self.session, self.download_session.id)
+
+        user_row = self.get_row(self.user)
+        self.assertEqual(3, user_row.post_count)
+        self.assertEqual(1, user_row.self_post_count)
+        self.assertEqual(60, user_row.significant_score)
+        self.assertEqual(60, user_row.score)
+        self.assertEqual(3, user_row.image_count)
+        self.assertEqual(0, user_row.video_count)
+        self.assertEqual(1, user_row.comment_count)
+        self.assertEqual(3, user_row.significant_content_count)
+        self.assertEqual(1, user_row.significant_comment_count)
+        self.assertEqual(5, user_row.significant_comment_score)
+        self.assertEqual(1, user_row.download_count)
+        self.assertEqual(max(x.date_posted for x in self.posts), user_row.last_post_date)
+
+        session_row = self.session.query(DownloadSessionStatistics).get(self.download_session.id)
+        self.assertEqual(1, session_row.reddit_object_count)
+        self.assertEqual(3, session_row.post_count)
+        self.assertEqual(3, session_row.content_count)
+        self.assertEqual(1, session_row.comment_count)
+        self.assertEqual([(1, 1), (0, 1), (0, 1)], [(x.comment_count, x.content_count) for x in self.posts])
+
+        sub_row = self.get_row(self.subreddit)
+        self.assertEqual(0, sub_row.post_count)
+        self.assertEqual(60, sub_row.score)
+        self.assertEqual(3, sub_row.image_count)
+
+    def test_refresh_download_session_statistics_after_last_refresh(self):
+        after_ids = statistics.refresh_download_session_statistics(self.session, self.download_session.id)
+        other_user = get_user(name='other_user')
+        self.session.add(other_user)
+        post = get_post(reddit_id='new', user=other_user, subreddit=self.subreddit, session=self.session,
+                        significant=other_user, score=5)
+        post.download_session_id = self.download_session.id
+        self.session.commit()
+
+        with patch.object(statistics, 'refresh_statistics', wraps=statistics.refresh_statistics) as refresh:
+            after_ids = statistics.refresh_download_session_statistics(self.session, self.download_session.id,
+                                                                       after_ids)
+        self.session.expire_all()
+
+        # only the reddit objects and posts of the new post are recalculated
+        reddit_object_ids, download_session_ids, post_ids = refresh.call_args[0][1:]
+        self.assertEqual({other_user.id, self.subreddit.id}, reddit_object_ids)
+        self.assertEqual({post.id}, post_ids)
+        self.assertEqual(1, self.get_row(other_user).post_count)
+        self.assertEqual(65, self.get_row(self.subreddit).score)
+        self.assertEqual(4, self.session.query(DownloadSessionStatistics).get(self.download_session.id).post_count)
+        self.assertEqual(post.id, after_ids[Post])
+
+    def test_rebuild_statistics_repairs_rows(self):
+        statistics.refresh_statistics(self.session, [self.user.id])
+        self.session.query(RedditObjectStatistics).update({'post_count': 100})
+        self.session.commit()
+
+        statistics.rebuild_statistics(self.session)
+        self.session.expire_all()
+
+        self.assertEqual(3, self.get_row(self.user).post_count)
+        self.assertEqual(3, self.get_row(self.subreddit).image_count)
+
+    def test_build_statistics_if_empty(self):
+        with statistics.rebuild_lock:
+            statistics.build_statistics_if_empty(self.session)
+        # a build that is already running is not started again
+        self.assertEqual(0, self.session.query(RedditObjectStatistics).count())
+
+        statistics.build_statistics_if_empty(self.session)
+        self.assertEqual(2, self.session.query(RedditObjectStatistics).count())
+        self.assertFalse(statistics.statistics_need_build(self.session))
+
+    @patch.object(statistics, 'POST_COUNT_BATCH_SIZE', 2)
+    def test_rebuild_statistics_updates_post_counts_in_batches(self):
+        self.session.query(Post).update({'comment_count': 9, 'content_count': 9})
+        self.session.commit()
+
+        statistics.rebuild_statistics(self.session)
+        self.session.expire_all()
+
+        self.assertEqual([(1, 1), (0, 1), (0, 1)], [(x.comment_count, x.content_count) for x in self.posts])
+
+    def test_delete_post_refreshes_statistics(self):
+        statistics.rebuild_statistics(self.session)
+
+        ModelManger.delete_post(self.posts[0], session=self.session)
+        self.session.expire_all()
+
+        user_row = self.get_row(self.user)
+        self.assertEqual(2, user_row.post_count)
+        self.assertEqual(0, user_row.self_post_count)
+        self.assertEqual(50, user_row.score)
+        self.assertEqual(2, user_row.image_count)
+        self.assertEqual(0, user_row.comment_count)
+        self.assertEqual(0, user_row.significant_comment_count)
+        session_row = self.session.query(DownloadSessionStatistics).get(self.download_session.id)
+        self.assertEqual(2, session_row.post_count)
+        self.assertEqual(0, session_row.comment_count)
+
+    def test_delete_comment_refreshes_post_counts(self):
+        statistics.rebuild_statistics(self.session)
+
+        ModelManger.delete_comment(self.posts[0].comments[0], session=self.session)
+        self.session.expire_all()
+
+        self.assertEqual(0, self.posts[0].comment_count)
+        self.assertEqual(0, self.get_row(self.user).significant_comment_count)
+
+    def test_delete_reddit_object_removes_row(self):
+        statistics.rebuild_statistics(self.session)
+
+        ModelManger.delete_reddit_object(self.user, session=self.session)
+
+        self.assertIsNone(self.session.query(RedditObjectStatistics).get(self.user.id))
+        sub_row = self.get_row(self.subreddit)
+        self.assertEqual(0, sub_row.image_count)
+        self.assertIsNone(sub_row.score)
@@ -14,6 +14,7 @@ class ExtractorTest(TestCase):
 
     def setUp(self):
         self.db = DatabaseHandler(in_memory=True)
+        injector.database_handler = self.db
         self.session = self.db.get_session()
 
     def tearDown(self):
@@ -33,7 +34,9 @@ class ExtractorTest(TestCase):
     def check(self, content, url, post, **kwargs):
         self.assertEqual(url, content.url)
         self.assertEqual(kwargs.get('title', post.title), content.title)
-        self.assertEqual(post, content.post)
-        self.assertEqual(post.author, content.user)
-        self.assertEqual(post.subreddit, content.subreddit)
+        # content is added by the database writer and is detached from the session, so it is checked by its ids
+        self.assertIsNotNone(post.id)
+        self.assertEqual(post.id, content.post_id)
+        self.assertEqual(post.author.id, content.user_id)
+        self.assertEqual(post.subreddit.id, content.subreddit_id)
         self.assertIsNotNone(content.id)
@@ -117,3 +117,25 @@ class TestDownloadRunner(TestCase):
         get.assert_called_with(url, timeout=10)
         self.assertIsNone(response_text)
         handle_failed.assert_called()
+
+    @patch('DownloaderForReddit.extractors.base_extractor.Content')
+    @patch(f'{PATH}.make_dir_path')
+    @patch(f'{PATH}.make_title')
+    @patch(f'{PATH}.filter_content')
+    def test_make_content_calls_content_callback(self, filter_content, make_title, make_dir_path, content_class):
+        filter_content.return_value = True
+        make_title.return_value = 'Test Title'
+        make_dir_path.return_value = 'test/path'
+        callback = MagicMock()
+        writer = MagicMock()
+
+        base_extractor = BaseExtractor(MagicMock(), content_callback=callback, writer=writer)
+        content = base_extractor.make_content('https://fakesite.com/image.jpg', 'jpg')
+
+        writer.insert.assert_called_once_with(content)
+        future = writer.insert.return_value
+        # the insert is committed with the writer's batch, so extraction does not wait for it
+        future.result.assert_not_called()
+        callback.assert_called_once_with(content, future)
+        self.assertEqual([content], base_extractor.extracted_content)
+        self.assertEqual(future.result.return_value, base_extractor.get_content_id(content))
@@ -0,0 +1,43 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from DownloaderForReddit.extractors import extractor_registry
+from DownloaderForReddit.utils import injector
+
+
+class TestExtractorRegistry(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock(supported_videos_updated=0)
+
+    def test_get_built_in_extractor(self):
+        extractor = extractor_registry.get_extractor('https://i.redd.it/ymsf8xwe5851.jpg')
+        self.assertEqual('RedditUploadsExtractor', extractor.__name__)
+
+    def test_get_extractor_no_match(self):
+        self.assertIsNone(extractor_registry.get_extractor('https://invalid_site.com/image/3jfd9nlksd.jpg'))
+
+    @patch('DownloaderForReddit.extractors.extractor_registry.get_supported_video_sites')
+    def test_callable_url_key_is_evaluated_per_lookup(self, get_supported_sites):
+        get_supported_sites.return_value = ['videosite.com']
+        entry = extractor_registry.ExtractorEntry(url_key=get_supported_sites, module_path='.generic_video_extractor',
+                                                  class_name='GenericVideoExtractor')
+        with patch.object(extractor_registry, '_entries', [entry]):
+            extractor = extractor_registry.get_extractor('https://videosite.com/watch?v=123')
+        self.assertEqual('GenericVideoExtractor', extractor.__name__)
+        get_supported_sites.assert_called()
+
+    def test_register_third_party_extractor(self):
+        with patch.object(extractor_registry, '_entries', []):
+            extractor_registry.register_extractor(['customsite'], 'DownloaderForReddit.extractors.direct_extractor',
+                                                  'DirectExtractor')
+            extractor = extractor_registry.get_extractor('https://www.CustomSite.com/item/5')
+        self.assertEqual('DirectExtractor', extractor.__name__)
+
+    def test_built_in_extractors_match_package_attributes(self):
+        import DownloaderForReddit.extractors as extractors
+        for entry in extractor_registry.BUILT_IN_EXTRACTORS:
+            with self.subTest(class_name=entry.class_name):
+                extractor = extractor_registry.load_extractor_class(entry)
+                self.assertEqual(entry.class_name, extractor.__name__)
+                self.assertIs(extractor, getattr(extractors, entry.class_name))
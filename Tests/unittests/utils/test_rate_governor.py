@@ -0,0 +1,103 @@
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+from threading import Thread
+
+from DownloaderForReddit.utils.rate_governor import RateGovernor, GovernedRateLimiter, Priority, install
+
+
+def make_headers(remaining, reset, used):
+    return {'x-ratelimit-remaining': str(remaining), 'x-ratelimit-reset': str(reset), 'x-ratelimit-used': str(used)}
+
+
+class TestRateGovernor(TestCase):
+
+    def setUp(self):
+        self.governor = RateGovernor()
+
+    def test_update_reads_headers(self):
+        self.governor.update(make_headers(500, 300, 100))
+        self.assertEqual(500, self.governor.remaining)
+        self.assertEqual(100, self.governor.used)
+        self.assertAlmostEqual(time.monotonic() + 300, self.governor.reset_time, delta=1)
+
+    def test_update_ignores_responses_without_rate_limit_headers(self):
+        self.governor.update({})
+        self.assertIsNone(self.governor.remaining)
+
+    def test_first_request_is_not_delayed(self):
+        self.assertLessEqual(self.governor.get_wait_time(Priority.NORMAL), 0)
+
+    def test_requests_are_spread_over_window(self):
+        self.governor.update(make_headers(100, 200, 500))
+        self.governor.acquire()
+        self.assertEqual(99, self.governor.remaining)
+        self.assertAlmostEqual(2, self.governor.get_wait_time(Priority.NORMAL), delta=0.1)
+
+    def test_low_priority_held_back_by_reserve(self):
+        self.governor.update(make_headers(50, 100, 550))
+        self.assertGreater(self.governor.get_wait_time(Priority.LOW), 90)
+        self.assertLess(self.governor.get_wait_time(Priority.HIGH), 1)
+
+    def test_exhausted_budget_waits_for_reset(self):
+        self.governor.update(make_headers(0, 30, 600))
+        self.assertAlmostEqual(30, self.governor.get_wait_time(Priority.HIGH), delta=1)
+
+    def test_window_reset_clears_budget(self):
+        self.governor.update(make_headers(0, 0, 600))
+        self.assertLessEqual(self.governor.get_wait_time(Priority.HIGH), 0)
+        self.assertIsNone(self.governor.remaining)
+
+    def test_higher_priority_sent_first(self):
+        self.governor.next_request_time = time.monotonic() + 0.2
+        order = []
+
+        def request(priority):
+            self.governor.acquire(priority)
+            order.append(priority)
+
+        low = Thread(target=request, args=(Priority.LOW,))
+        low.start()
+        time.sleep(0.05)
+        high = Thread(target=request, args=(Priority.HIGH,))
+        high.start()
+        low.join(2)
+        high.join(2)
+        self.assertEqual([Priority.HIGH, Priority.LOW], order)
+
+    def test_priority_context(self):
+        self.assertEqual(Priority.NORMAL, self.governor.current_priority)
+        with self.governor.priority(Priority.LOW):
+            self.assertEqual(Priority.LOW, self.governor.current_priority)
+        self.assertEqual(Priority.NORMAL, self.governor.current_priority)
+
+    def test_prioritize_applies_priority_on_other_thread(self):
+        priorities = []
+        with self.governor.priority(Priority.HIGH):
+            func = self.governor.prioritize(lambda: priorities.append(self.governor.current_priority))
+        thread = Thread(target=func)
+        thread.start()
+        thread.join()
+        self.assertEqual([Priority.HIGH], priorities)
+
+
+class TestGovernedRateLimiter(TestCase):
+
+    def test_call(self):
+        governor = MagicMock()
+        response = MagicMock(headers=make_headers(10, 10, 10))
+        request = MagicMock(return_value=response)
+        limiter = GovernedRateLimiter(governor)
+
+        result = limiter.call(request, lambda: {'Authorization': 'bearer'}, 'GET', url='test')
+
+        self.assertEqual(response, result)
+        governor.acquire.assert_called_once()
+        request.assert_called_once_with('GET', url='test', headers={'Authorization': 'bearer'})
+        governor.update.assert_called_once_with(response.headers)
+
+    def test_install(self):
+        governor = RateGovernor()
+        reddit = MagicMock(_authorized_core=None)
+        install(reddit, governor)
+        self.assertIs(governor, reddit._read_only_core._rate_limiter.governor)
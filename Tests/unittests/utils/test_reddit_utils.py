@@ -0,0 +1,79 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from DownloaderForReddit.utils import reddit_utils
+
+
+@patch('DownloaderForReddit.utils.reddit_utils.praw.Reddit')
+class TestRedditInstance(TestCase):
+
+    def setUp(self):
+        reddit_utils._token = None
+        reddit_utils.invalidate_reddit_instance()
+
+    def tearDown(self):
+        reddit_utils._token = None
+        reddit_utils.invalidate_reddit_instance()
+
+    def test_instance_is_shared(self, reddit):
+        first = reddit_utils.get_reddit_instance()
+        second = reddit_utils.get_reddit_instance()
+        self.assertIs(first, second)
+        reddit.assert_called_once()
+
+    def test_new_instance_made_when_token_changes(self, reddit):
+        reddit.side_effect = lambda **kwargs: MagicMock()
+        read_only = reddit_utils.get_reddit_instance()
+        self.assertFalse(reddit_utils.connection_is_authorized)
+        reddit_utils._token = 'test_token'
+        authorized = reddit_utils.get_reddit_instance()
+        self.assertIsNot(read_only, authorized)
+        self.assertTrue(reddit_utils.connection_is_authorized)
+        self.assertEqual('test_token', reddit.call_args[1]['refresh_token'])
+
+    @patch('DownloaderForReddit.utils.reddit_utils.injector')
+    def test_delete_token_invalidates_instance(self, injector, reddit):
+        reddit.side_effect = lambda **kwargs: MagicMock()
+        reddit_utils._token = 'test_token'
+        authorized = reddit_utils.get_reddit_instance()
+        reddit_utils.delete_token()
+        read_only = reddit_utils.get_reddit_instance()
+        self.assertIsNot(authorized, read_only)
+        self.assertNotIn('refresh_token', reddit.call_args[1])
+
+    def test_token_refresh_callback_is_wrapped(self, reddit):
+        calls = []
+
+        def callback():
+            calls.append(1)
+            return {'Authorization': 'bearer'}
+
+        session = MagicMock(_set_header_callback=callback)
+        reddit.return_value = MagicMock(_read_only_core=session, _authorized_core=None)
+        reddit_utils.get_reddit_instance()
+        self.assertIsNot(callback, session._set_header_callback)
+        self.assertEqual({'Authorization': 'bearer'}, session._set_header_callback())
+        self.assertEqual(1, len(calls))
+
+
+class TestNameChecker(TestCase):
+
+    @patch('DownloaderForReddit.utils.reddit_utils.injector')
+    @patch('DownloaderForReddit.utils.reddit_utils.get_reddit_instance')
+    def test_check_names_batches_subreddits(self, get_reddit_instance, injector):
+        injector.get_settings_manager.return_value.validation_thread_count = 2
+        found = MagicMock(display_name='FoundSub', created=1400000000, subreddit_type='public')
+        private = MagicMock(display_name='PrivateSub', created=1400000000, subreddit_type='private')
+        get_reddit_instance.return_value.info.return_value = iter([found, private])
+        name_checker = reddit_utils.NameChecker('SUBREDDIT')
+        name_checker.check_reddit_object_name = MagicMock(
+            side_effect=lambda name: reddit_utils.ValidationSet(name=name, date_created=None, valid=False))
+
+        results = name_checker.check_names(['foundsub', 'privatesub', 'missingsub'])
+
+        self.assertTrue(results['foundsub'].valid)
+        self.assertEqual('FoundSub', results['foundsub'].name)
+        self.assertFalse(results['privatesub'].valid)
+        self.assertFalse(results['missingsub'].valid)
+        self.assertEqual(['missingsub', 'privatesub'],
+                         sorted(x[0][0] for x in name_checker.check_reddit_object_name.call_args_list))
@@ -0,0 +1,114 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+from concurrent.futures import Future
+
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.filters import PostFilter
+from DownloaderForReddit.viewmodels.database_view_models import PostTableModel
+from DownloaderForReddit.utils import injector
+from Tests.mockobjects.mock_objects import get_user, get_subreddit, get_post
+
+
+class TestCustomItemModel(TestCase):
+
+    def setUp(self):
+        injector.settings_manager = MagicMock()
+        injector.settings_manager.post_query_limit = 3
+        self.db = DatabaseHandler(in_memory=True)
+        injector.database_handler = self.db
+        self.session = self.db.get_session()
+        user = get_user()
+        subreddit = get_subreddit()
+        self.session.add_all([user, subreddit])
+        for x in range(6):
+            get_post(reddit_id=f'abc{x}', title=f'post_{x}', score=x, user=user, subreddit=subreddit,
+                     session=self.session)
+        self.session.commit()
+        self.post_filter = PostFilter()
+        self.model = PostTableModel()
+
+    def tearDown(self):
+        self.session.close()
+
+    def get_query(self, desc=False):
+        return self.post_filter.filter(self.session, order_by='score', desc=desc)
+
+    def get_titles(self, items):
+        return [x.title for x in items]
+
+    def test_first_page(self):
+        query = self.get_query()
+        items = self.model.get_first_page(query, self.post_filter.keyset)
+        self.assertEqual(['post_0', 'post_1', 'post_2'], self.get_titles(items))
+        self.assertTrue(self.model.has_next_page)
+        self.assertEqual((2, items[-1].id), self.model.next_key)
+        self.assertEqual(6, self.model.total_items)
+
+    def test_last_page_ends_at_exact_page_boundary(self):
+        query = self.get_query()
+        self.model.get_first_page(query, self.post_filter.keyset)
+        items = self.model.get_next_page(query, self.post_filter.keyset)
+        self.assertEqual(['post_3', 'post_4', 'post_5'], self.get_titles(items))
+        self.assertFalse(self.model.has_next_page)
+        self.assertIsNone(self.model.next_key)
+        self.assertIsNone(self.model.prefetch)
+
+    def test_single_page_matching_limit_has_no_next_page(self):
+        query = self.get_query().filter(PostFilter.model.score < 3)
+        items = self.model.get_first_page(query, self.post_filter.keyset)
+        self.assertEqual(3, len(items))
+        self.assertFalse(self.model.has_next_page)
+
+    def test_next_page_descending(self):
+        query = self.get_query(desc=True)
+        first = self.model.get_first_page(query, self.post_filter.keyset)
+        second = self.model.get_next_page(query, self.post_filter.keyset)
+        self.assertEqual(['post_5', 'post_4', 'post_3', 'post_2', 'post_1', 'post_0'],
+                         self.get_titles(first + second))
+
+    def test_next_page_uses_prefetched_rows(self):
+        query = self.get_query()
+        self.model.get_first_page(query, self.post_filter.keyset)
+        key, future = self.model.prefetch
+        self.assertEqual(self.model.next_key, key)
+        with patch.object(self.model, 'get_page_rows') as get_page_rows:
+            items = self.model.get_next_page(query, self.post_filter.keyset)
+        get_page_rows.assert_not_called()
+        self.assertEqual(['post_3', 'post_4', 'post_5'], self.get_titles(items))
+
+    def test_next_page_ignores_prefetch_for_another_key(self):
+        query = self.get_query()
+        self.model.get_first_page(query, self.post_filter.keyset)
+        future = Future()
+        future.set_result([])
+        self.model.prefetch = ((None, 0), future)
+        items = self.model.get_next_page(query, self.post_filter.keyset)
+        self.assertEqual(['post_3', 'post_4', 'post_5'], self.get_titles(items))
+
+    def test_next_page_selects_rows_when_prefetch_failed(self):
+        query = self.get_query()
+        self.model.get_first_page(query, self.post_filter.keyset)
+        future = Future()
+        future.set_exception(ValueError())
+        self.model.prefetch = (self.model.next_key, future)
+        items = self.model.get_next_page(query, self.post_filter.keyset)
+        self.assertEqual(['post_3', 'post_4', 'post_5'], self.get_titles(items))
+
+    def test_stale_count_is_ignored(self):
+        self.model.get_first_page(self.get_query(), self.post_filter.keyset)
+        stale_count = self.model.query_count
+        self.model.get_first_page(self.get_query().filter(PostFilter.model.score < 2), self.post_filter.keyset)
+        self.model.set_total_items(stale_count, 6)
+        self.assertEqual(2, self.model.total_items)
+
+    def test_count_finishing_after_close_is_not_emitted(self):
+        self.model.get_first_page(self.get_query(), self.post_filter.keyset)
+        query_count = self.model.query_count
+        future = Future()
+        future.set_result(6)
+        count_finished = MagicMock()
+        self.model.count_finished.connect(count_finished)
+        self.model.close()
+        self.model.finish_count(query_count, future)
+        count_finished.assert_not_called()
+        self.assertIsNone(self.model.prefetch)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+"""
+Times the database work done during a download session and by the database dialogs against a scratch database, once
+with sqlite's default connection settings and once with the connection settings from the application's settings.
+
+The session workload mirrors the extraction and download threads: each thread adds posts and their content one row at
+a time and commits after each change, as SubmittableCreator and the Downloader did before the database writer.  The
+writer workload makes the same changes the way the threads do now: posts are still committed as they are created, but
+new content and the status changes are sent to the database writer and committed in groups.  The dialog workload runs
+the aggregate queries that the database statistics dialog runs when it is opened.
+
+usage: python Tools/database_benchmark.py [--posts 20000] [--threads 8] [--users 200]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime
+from threading import Thread
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, desc
+
+from DownloaderForReddit.database.database_handler import DatabaseHandler, get_connection_pragmas
+from DownloaderForReddit.database.models import User, Subreddit, Post, Content, Comment
+from DownloaderForReddit.utils import injector
+
+
+def add_posts(db, user_ids, subreddit_id, count, seed):
+    rand = random.Random(seed)
+    session = db.get_session()
+    try:
+        for x in range(count):
+            user_id = rand.choice(user_ids)
+            post = Post(title=f'post {seed}-{x}', date_posted=datetime.now(), score=rand.randint(0, 50000),
+                        reddit_id=f'{seed}x{x}', url=f'https://example.com/{seed}/{x}', is_self=x % 10 == 0,
+                        author_id=user_id, subreddit_id=subreddit_id, significant_reddit_object_id=user_id)
+            session.add(post)
+            session.commit()
+            content = Content(title=post.title, extension=rand.choice(('jpg', 'mp4', 'gif')), url=post.url,
+                              user_id=user_id, subreddit_id=subreddit_id, post_id=post.id)
+            session.add(content)
+            session.commit()
+            post.extracted = True
+            session.commit()
+            content.downloaded = True
+            content.download_date = datetime.now()
+            session.commit()
+    finally:
+        session.close()
+
+
+def add_posts_with_writer(db, user_ids, subreddit_id, count, seed):
+    rand = random.Random(seed)
+    session = db.get_session()
+    try:
+        for x in range(count):
+            user_id = rand.choice(user_ids)
+            post = Post(title=f'post {seed}-{x}', date_posted=datetime.now(), score=rand.randint(0, 50000),
+                        reddit_id=f'{seed}x{x}', url=f'https://example.com/{seed}/{x}', is_self=x % 10 == 0,
+                        author_id=user_id, subreddit_id=subreddit_id, significant_reddit_object_id=user_id)
+            session.add(post)
+            session.commit()
+            content = Content(title=post.title, extension=rand.choice(('jpg', 'mp4', 'gif')), url=post.url,
+                              user_id=user_id, subreddit_id=subreddit_id, post_id=post.id)
+            db.writer.insert(content).result()
+            post.set_extracted()
+            content.set_downloaded(None)
+    finally:
+        session.close()
+
+
+def run_session_workload(db, posts, threads, users, target=add_posts):
+    with db.get_scoped_session() as session:
+        user_objects = [User(name=f'user_{x}', significant=True) for x in range(users)]
+        subreddit = Subreddit(name='benchmark')
+        session.add_all(user_objects + [subreddit])
+        session.commit()
+        user_ids = [user.id for user in user_objects]
+        subreddit_id = subreddit.id
+    per_thread = posts // threads
+    workers = [Thread(target=target, args=(db, user_ids, subreddit_id, per_thread, seed)) for seed in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    db.writer.flush()
+    return time.perf_counter() - start
+
+
+def run_dialog_workload(db):
+    start = time.perf_counter()
+    with db.get_scoped_session() as session:
+        session.query(Post.id).count()
+        session.query(func.sum(Post.score)).scalar()
+        session.query(User.id).filter(User.significant == True).count()
+        count_sub = session.query(Post.significant_reddit_object_id, func.count(Post.id).label('count')) \
+            .group_by(Post.significant_reddit_object_id).subquery()
+        session.query(User, 'count').join(count_sub, User.id == count_sub.c.significant_reddit_object_id) \
+            .order_by(desc('count')).first()
+        session.query(User, func.sum(Post.score).label('score')) \
+            .join(Post, Post.significant_reddit_object_id == User.id).group_by(User.id).order_by(desc('score')).first()
+        for extension in ('jpg', 'mp4', 'gif'):
+            extension_sub = session.query(Content.user_id, func.count(Content.id).label('count')) \
+                .filter(Content.extension == extension).group_by(Content.user_id).subquery()
+            session.query(User, 'count').join(extension_sub, User.id == extension_sub.c.user_id) \
+                .order_by(desc('count')).first()
+        session.query(Content.id).filter(Content.downloaded == False).count()
+        session.query(Post.id).filter(Post.extracted == False).count()
+        session.query(Comment.id).count()
+    return time.perf_counter() - start
+
+
+def benchmark(name, pragmas, args, target=add_posts):
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseHandler(database_path=os.path.join(directory, 'benchmark.db'), pragmas=pragmas)
+        injector.database_handler = db
+        session_time = run_session_workload(db, args.posts, args.threads, args.users, target)
+        dialog_time = min(run_dialog_workload(db) for _ in range(3))
+        db.writer.stop()
+        db.engine.dispose()
+    print(f'{name:<12} session: {session_time:8.2f}s ({args.posts / session_time:8.0f} posts/s)   '
+          f'dialog queries: {dialog_time * 1000:8.1f}ms   writer transactions: {db.writer.transaction_count}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the database connection settings')
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--users', type=int, default=200)
+    args = parser.parse_args()
+
+    pragmas = get_connection_pragmas(injector.get_settings_manager())
+    print(', '.join(f'{pragma}={value}' for pragma, value in pragmas))
+    benchmark('default', [], args)
+    benchmark('configured', pragmas, args)
+    benchmark('writer', pragmas, args, add_posts_with_writer)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+"""
+Times the lookups made on the extraction path and the database statistics dialog's queries against a synthetic
+database, first without the lookup indexes on the post, content and comment tables and then with them.
+
+usage: python Tools/index_benchmark.py [--posts 1000000] [--comments 200000] [--users 2000] [--lookups 200]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database_benchmark import run_dialog_workload
+from DownloaderForReddit.core.errors import NON_DOWNLOADABLE
+from DownloaderForReddit.database.database_handler import DatabaseHandler
+from DownloaderForReddit.database.models import Post, Content, Comment
+
+
+INDEXED_TABLES = (Post.__table__, Content.__table__, Comment.__table__)
+
+
+def populate(db, posts, comments, users):
+    rand = random.Random(0)
+    now = datetime.now().isoformat(' ')
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.executemany("INSERT INTO reddit_object (id, name, object_type, significant) VALUES (?, ?, 'USER', 1)",
+                           ((x, f'user_{x}') for x in range(1, users + 1)))
+        cursor.execute("INSERT INTO reddit_object (id, name, object_type, significant) "
+                       "VALUES (?, 'sub', 'SUBREDDIT', 1)", (users + 1,))
+        cursor.executemany('INSERT INTO user (id) VALUES (?)', ((x,) for x in range(1, users + 1)))
+        cursor.execute('INSERT INTO subreddit (id) VALUES (?)', (users + 1,))
+        cursor.executemany(
+            'INSERT INTO post (id, title, date_posted, score, reddit_id, url, is_self, extracted, retry_attempts, '
+            'author_id, subreddit_id, significant_reddit_object_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?, ?)',
+            ((x, f'post {x}', now, rand.randint(0, 50000), f'p{x}', f'https://example.com/{x}', x % 10 == 0,
+              x % 1000 != 0, rand.randint(1, users), users + 1, rand.randint(1, users)) for x in range(1, posts + 1)))
+        cursor.executemany(
+            'INSERT INTO content (id, title, extension, url, downloaded, retry_attempts, user_id, subreddit_id, '
+            'post_id) VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)',
+            ((x, f'post {x}', rand.choice(('jpg', 'mp4', 'gif')), f'https://i.example.com/{x}.jpg', x % 1000 != 0,
+              rand.randint(1, users), users + 1, x) for x in range(1, posts + 1)))
+        cursor.executemany(
+            'INSERT INTO comment (id, body, score, date_posted, reddit_id, author_id, subreddit_id, post_id) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            ((x, 'comment', rand.randint(0, 500), now, f'c{x}', rand.randint(1, users), users + 1,
+              rand.randint(1, posts)) for x in range(1, comments + 1)))
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def run_extraction_lookups(db, posts, comments, lookups):
+    rand = random.Random(1)
+    start = time.perf_counter()
+    with db.get_scoped_session() as session:
+        for _ in range(lookups):
+            x = rand.randint(1, posts)
+            session.query(Post.id).filter(Post.url == f'https://example.com/{x}').scalar()
+            session.query(Content.id).filter(Content.url == f'https://i.example.com/{x}.jpg').scalar()
+            session.query(Content.id).filter(Content.post_id == x).all()
+            session.query(Comment).filter(Comment.reddit_id == f'c{rand.randint(1, comments)}').scalar()
+        session.query(Post.id).filter(Post.extracted == False).filter(Post.retry_attempts <= 3) \
+            .filter(Post.extraction_error.notin_(NON_DOWNLOADABLE)).count()
+        session.query(Content.id).filter(Content.downloaded == False).filter(Content.retry_attempts <= 3) \
+            .filter(Content.download_error.notin_(NON_DOWNLOADABLE)).count()
+    return time.perf_counter() - start
+
+
+def time_workloads(db, args):
+    extraction_time = run_extraction_lookups(db, args.posts, args.comments, args.lookups)
+    dialog_time = min(run_dialog_workload(db) for _ in range(3))
+    return extraction_time, dialog_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the lookup indexes')
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--comments', type=int, default=200000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseHandler(database_path=os.path.join(directory, 'benchmark.db'), pragmas=[])
+        indexes = [index for table in INDEXED_TABLES for index in table.indexes]
+        for index in indexes:
+            index.drop(db.engine)
+        print(f'Populating {args.posts} posts and content, {args.comments} comments...')
+        populate(db, args.posts, args.comments, args.users)
+        before = time_workloads(db, args)
+        for index in indexes:
+            index.create(db.engine)
+        with db.engine.connect() as connection:
+            connection.execute('ANALYZE')
+        after = time_workloads(db, args)
+        db.engine.dispose()
+
+    print(f'{"":<10} {"extraction lookups":>20} {"dialog queries":>16}')
+    for name, (extraction_time, dialog_time) in (('before', before), ('after', after)):
+        print(f'{name:<10} {extraction_time:19.2f}s {dialog_time:15.2f}s')
+
+
+if __name__ == '__main__':
+    main()
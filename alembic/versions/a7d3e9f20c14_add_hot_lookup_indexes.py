@@ -0,0 +1,46 @@
+"""add hot lookup indexes
+
+Revision ID: a7d3e9f20c14
+Revises: f4a2c6d81b37
+Create Date: 2026-10-19 16:27:52.904113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9f20c14'
+down_revision = 'f4a2c6d81b37'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_post_url', 'post', ['url']),
+    ('ix_post_significant_reddit_object_id_score', 'post', ['significant_reddit_object_id', 'score']),
+    ('ix_post_extracted_retry_attempts', 'post', ['extracted', 'retry_attempts']),
+    ('ix_comment_post_id', 'comment', ['post_id']),
+    ('ix_content_url', 'content', ['url']),
+    ('ix_content_post_id', 'content', ['post_id']),
+    ('ix_content_downloaded_retry_attempts', 'content', ['downloaded', 'retry_attempts']),
+]
+
+
+def get_existing_indexes(table_name):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table_name)}
+
+
+def upgrade():
+    for name, table_name, columns in INDEXES:
+        # tables created from the models when the database was opened already have their indexes
+        if name not in get_existing_indexes(table_name):
+            op.create_index(name, table_name, columns, unique=False)
+    # lets sqlite's query planner see how selective the new indexes are
+    op.execute('ANALYZE')
+
+
+def downgrade():
+    for name, table_name, _ in reversed(INDEXES):
+        if name in get_existing_indexes(table_name):
+            op.drop_index(name, table_name=table_name)
@@ -0,0 +1,44 @@
+"""add reddit object count indexes
+
+Revision ID: b5c18e7d2f43
+Revises: a7d3e9f20c14
+Create Date: 2026-10-19 18:02:11.480337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5c18e7d2f43'
+down_revision = 'a7d3e9f20c14'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_post_author_id', 'post', ['author_id']),
+    ('ix_post_subreddit_id', 'post', ['subreddit_id']),
+    ('ix_comment_author_id', 'comment', ['author_id']),
+    ('ix_comment_subreddit_id', 'comment', ['subreddit_id']),
+    ('ix_content_user_id', 'content', ['user_id']),
+    ('ix_content_subreddit_id', 'content', ['subreddit_id']),
+]
+
+
+def get_existing_indexes(table_name):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table_name)}
+
+
+def upgrade():
+    for name, table_name, columns in INDEXES:
+        # tables created from the models when the database was opened already have their indexes
+        if name not in get_existing_indexes(table_name):
+            op.create_index(name, table_name, columns, unique=False)
+    op.execute('ANALYZE')
+
+
+def downgrade():
+    for name, table_name, _ in reversed(INDEXES):
+        if name in get_existing_indexes(table_name):
+            op.drop_index(name, table_name=table_name)
@@ -0,0 +1,25 @@
+"""add reddit object post interval
+
+Revision ID: c51f0a7e2d3b
+Revises: ab46745cf45e
+Create Date: 2026-10-19 10:12:31.418207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c51f0a7e2d3b'
+down_revision = 'ab46745cf45e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('reddit_object', sa.Column('post_interval', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('reddit_object') as batch:
+        batch.drop_column('post_interval')
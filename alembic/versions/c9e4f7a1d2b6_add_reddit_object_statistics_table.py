@@ -0,0 +1,58 @@
+"""add reddit object statistics table
+
+Revision ID: c9e4f7a1d2b6
+Revises: b5c18e7d2f43
+Create Date: 2026-10-19 19:12:40.361025
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e4f7a1d2b6'
+down_revision = 'b5c18e7d2f43'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_post_download_session_id', 'post', ['download_session_id']),
+    ('ix_comment_download_session_id', 'comment', ['download_session_id']),
+    ('ix_content_download_session_id', 'content', ['download_session_id']),
+]
+
+
+def get_existing_indexes(table_name):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table_name)}
+
+
+def upgrade():
+    for name, table_name, columns in INDEXES:
+        if name not in get_existing_indexes(table_name):
+            op.create_index(name, table_name, columns, unique=False)
+    # the table may already have been created from the models when the database was opened.  It is filled the first
+    # time the statistics dialog is opened
+    if 'reddit_object_statistics' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'reddit_object_statistics',
+        sa.Column('reddit_object_id', sa.Integer(), nullable=False),
+        sa.Column('post_count', sa.Integer(), nullable=True),
+        sa.Column('self_post_count', sa.Integer(), nullable=True),
+        sa.Column('significant_score', sa.Integer(), nullable=True),
+        sa.Column('score', sa.Integer(), nullable=True),
+        sa.Column('image_count', sa.Integer(), nullable=True),
+        sa.Column('video_count', sa.Integer(), nullable=True),
+        sa.Column('gif_count', sa.Integer(), nullable=True),
+        sa.Column('comment_count', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['reddit_object_id'], ['reddit_object.id'], ),
+        sa.PrimaryKeyConstraint('reddit_object_id')
+    )
+
+
+def downgrade():
+    op.drop_table('reddit_object_statistics')
+    for name, table_name, _ in reversed(INDEXES):
+        if name in get_existing_indexes(table_name):
+            op.drop_index(name, table_name=table_name)
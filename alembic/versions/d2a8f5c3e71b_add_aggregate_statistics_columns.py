@@ -0,0 +1,63 @@
+"""add aggregate statistics columns
+
+Revision ID: d2a8f5c3e71b
+Revises: c9e4f7a1d2b6
+Create Date: 2026-10-19 21:03:52.718340
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a8f5c3e71b'
+down_revision = 'c9e4f7a1d2b6'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = [
+    ('post', sa.Column('comment_count', sa.Integer(), nullable=True, server_default='0')),
+    ('post', sa.Column('content_count', sa.Integer(), nullable=True, server_default='0')),
+    ('reddit_object_statistics',
+     sa.Column('significant_content_count', sa.Integer(), nullable=True, server_default='0')),
+    ('reddit_object_statistics',
+     sa.Column('significant_comment_count', sa.Integer(), nullable=True, server_default='0')),
+    ('reddit_object_statistics', sa.Column('significant_comment_score', sa.Integer(), nullable=True)),
+    ('reddit_object_statistics', sa.Column('download_count', sa.Integer(), nullable=True, server_default='0')),
+    ('reddit_object_statistics', sa.Column('last_post_date', sa.DateTime(), nullable=True)),
+]
+
+
+def get_existing_columns(table_name):
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table_name)}
+
+
+def upgrade():
+    for table_name, column in COLUMNS:
+        if column.name not in get_existing_columns(table_name):
+            op.add_column(table_name, column)
+    # the existing rows do not have the new columns filled in.  They are removed so that the statistics are rebuilt on
+    # a background thread when the application starts, as filling them in here would hold up the migration
+    op.execute('DELETE FROM reddit_object_statistics')
+    if 'download_session_statistics' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'download_session_statistics',
+        sa.Column('download_session_id', sa.Integer(), nullable=False),
+        sa.Column('reddit_object_count', sa.Integer(), nullable=True),
+        sa.Column('post_count', sa.Integer(), nullable=True),
+        sa.Column('comment_count', sa.Integer(), nullable=True),
+        sa.Column('content_count', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['download_session_id'], ['download_session.id'], ),
+        sa.PrimaryKeyConstraint('download_session_id')
+    )
+
+
+def downgrade():
+    op.drop_table('download_session_statistics')
+    for table_name in ('reddit_object_statistics', 'post'):
+        with op.batch_alter_table(table_name) as batch:
+            for column_table_name, column in reversed(COLUMNS):
+                if column_table_name == table_name:
+                    batch.drop_column(column.name)
@@ -0,0 +1,39 @@
+"""add name validation table
+
+Revision ID: e83b9d1c4a60
+Revises: c51f0a7e2d3b
+Create Date: 2026-10-19 13:48:05.207316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e83b9d1c4a60'
+down_revision = 'c51f0a7e2d3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the table may already have been created from the models when the database was opened
+    if 'name_validation' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'name_validation',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('object_type', sa.String(length=15), nullable=True),
+        sa.Column('name', sa.String(collation='NOCASE'), nullable=True),
+        sa.Column('actual_name', sa.String(), nullable=True),
+        sa.Column('date_created', sa.DateTime(), nullable=True),
+        sa.Column('valid', sa.Boolean(), nullable=True),
+        sa.Column('validation_date', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_name_validation_name'), 'name_validation', ['name'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_name_validation_name'), table_name='name_validation')
+    op.drop_table('name_validation')
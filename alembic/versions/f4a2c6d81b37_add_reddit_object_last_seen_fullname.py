@@ -0,0 +1,25 @@
+"""add reddit object last seen fullname
+
+Revision ID: f4a2c6d81b37
+Revises: e83b9d1c4a60
+Create Date: 2026-10-19 15:41:07.236518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a2c6d81b37'
+down_revision = 'e83b9d1c4a60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('reddit_object', sa.Column('last_seen_fullname', sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('reddit_object') as batch:
+        batch.drop_column('last_seen_fullname')